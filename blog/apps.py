@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name: str = "blog"
+
+    def ready(self) -> None:
+        import blog.signals  # noqa: F401
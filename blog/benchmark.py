@@ -0,0 +1,225 @@
+import re
+import time
+import uuid
+from typing import Any, Iterator, Optional
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db.models import Count, Q
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.resolvers import RoutePattern
+
+from blog.models import Comment, Post
+from chat.models import Room, ShoutBox
+from django_social.querybudget import QueryRecorder
+from events.models import Event
+from users.views import got_online
+
+# Routes that are not the app's own pages, or that log out or change data on GET
+EXCLUDED_ROUTES: tuple[str, ...] = (
+    "__debug__/",
+    "admin/",
+    "accounts/",
+    "protected/",
+    "logout/",
+    "events/<str:uid>home/delevent",
+    "vc/delete_member/",
+    "friend/friend_request_accept/",
+    "friend/friend_request_decline/",
+)
+
+_PARAMETER = re.compile(r"<(?:(?P<converter>[^>:]+):)?(?P<name>[^>]+)>")
+
+
+def iter_routes(
+    patterns: Optional[list] = None, prefix: str = "", namespace: str = ""
+) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Every route of the URL configuration with its namespaced name, in order.
+    Regex patterns can not be filled in generically and are left out.
+
+    Yields:
+        tuple[str, Optional[str]]: Full route such as "post/<int:pk>/" and URL name
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if not isinstance(pattern.pattern, RoutePattern):
+            continue
+        route: str = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            inner: str = namespace
+            if pattern.namespace:
+                inner = f"{namespace}{pattern.namespace}:"
+            yield from iter_routes(pattern.url_patterns, route, inner)
+        elif isinstance(pattern, URLPattern):
+            yield route, f"{namespace}{pattern.name}" if pattern.name else None
+
+
+class BenchmarkTarget:
+    """The user the benchmark logs in as, and the objects URL parameters point at."""
+
+    def __init__(self) -> None:
+        # A verified user with a chat room, so every page has something to show
+        room: Optional[Room] = (
+            Room.objects.filter(author__profile__verified=True).order_by("pk").first()
+        )
+        self.viewer: User = room.author if room else User.objects.order_by("pk").first()
+        self.friend_id: int = room.friend_id if room else self.viewer.pk
+        self.room_id: int = room.pk if room else 0
+
+        shoutbox: Optional[ShoutBox] = (
+            ShoutBox.objects.filter(
+                Q(author=self.viewer) | Q(participants=self.viewer)
+            ).first()
+            or ShoutBox.objects.order_by("pk").first()
+        )
+        self.shoutbox_id: int = shoutbox.pk if shoutbox else 0
+        # The most commented post and the most replied comment
+        post: Optional[Post] = Post.objects.order_by("-comment_count", "pk").first()
+        self.post_id: int = post.pk if post else 0
+        comment: Optional[Comment] = Comment.objects.order_by(
+            "-reply_count", "pk"
+        ).first()
+        self.comment_id: int = comment.pk if comment else 0
+        event: Optional[Event] = (
+            Event.objects.annotate(participants=Count("event_participants"))
+            .order_by("-participants", "pk")
+            .first()
+        )
+        self.event_id: str = event.event_id if event else "0"
+
+    def value(self, route: str, name: str) -> Optional[str]:
+        """
+        Value to fill a URL parameter with.
+
+        Args:
+            route: The full route the parameter is part of
+            name: Name of the parameter
+
+        Returns:
+            Optional[str]: The value, None when the parameter is unknown
+        """
+        if name == "pk":
+            if route.startswith("user/"):
+                return str(self.viewer.profile.pk)
+            if route.startswith("post/comment/"):
+                return str(self.comment_id)
+            return str(self.post_id)
+        values: dict[str, Any] = {
+            "username": self.viewer.username,
+            "user_id": self.viewer.pk,
+            "uid": self.viewer.pk,
+            "friend_id": self.friend_id,
+            "room_name": self.room_id,
+            "shoutbox_id": self.shoutbox_id,
+            "eid": self.event_id,
+            "upload_id": uuid.UUID(int=0),
+            "uidb64": "invalid",
+            "token": "invalid",
+        }
+        return str(values[name]) if name in values else None
+
+    def path(self, route: str) -> Optional[str]:
+        """
+        Fill in the parameters of a route.
+
+        Args:
+            route: A route from iter_routes
+
+        Returns:
+            Optional[str]: The URL path, None when a parameter is unknown
+        """
+        missing: list[str] = []
+
+        def fill(match: re.Match) -> str:
+            value: Optional[str] = self.value(route, match["name"])
+            if value is None:
+                missing.append(match["name"])
+                return ""
+            return value
+
+        path: str = "/" + _PARAMETER.sub(fill, route)
+        return None if missing else path
+
+
+def log_in(client: Client, user: User) -> None:
+    """force_login without got_online, which needs the request.user of a real log in."""
+    user_logged_in.disconnect(got_online)
+    try:
+        client.force_login(user)
+    finally:
+        user_logged_in.connect(got_online)
+
+
+def _percentile(timings: list[float], percent: float) -> float:
+    ordered: list[float] = sorted(timings)
+    index: int = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def benchmark_path(client: Client, path: str, requests: int) -> dict[str, Any]:
+    """
+    GET a path requests times after one warm up request.
+
+    Args:
+        client: Logged in test client
+        path: URL path to request
+        requests: Number of timed requests
+
+    Returns:
+        dict[str, Any]: Status code, p50/p95/p99 latency in milliseconds and the
+        median and maximum number of queries of the timed requests
+    """
+    client.get(path)
+    timings: list[float] = []
+    queries: list[int] = []
+    status: int = 0
+    for _ in range(requests):
+        recorder: QueryRecorder = QueryRecorder()
+        with recorder.record():
+            start: float = time.perf_counter()
+            status = client.get(path).status_code
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(recorder))
+    return {
+        "status": status,
+        "p50": _percentile(timings, 50),
+        "p95": _percentile(timings, 95),
+        "p99": _percentile(timings, 99),
+        "queries": _percentile(queries, 50),
+        "max_queries": max(queries),
+    }
+
+
+def run_benchmark(requests: int = 20) -> list[dict[str, Any]]:
+    """
+    Drive every GET-able route of the URL configuration with the test client,
+    logged in as a user of the current dataset.
+
+    Args:
+        requests: Timed requests per route
+
+    Returns:
+        list[dict[str, Any]]: Route, URL name, path and the benchmark_path results
+        of every route that is not excluded, with "skipped" set instead for
+        routes with parameters that could not be filled in
+    """
+    target: BenchmarkTarget = BenchmarkTarget()
+    client: Client = Client(raise_request_exception=False)
+    log_in(client, target.viewer)
+
+    results: list[dict[str, Any]] = []
+    for route, name in iter_routes():
+        if route.startswith(EXCLUDED_ROUTES):
+            continue
+        result: dict[str, Any] = {"route": route, "name": name}
+        path: Optional[str] = target.path(route)
+        if path is None:
+            result["skipped"] = "unknown parameter"
+        else:
+            result["path"] = path
+            result.update(benchmark_path(client, path, requests))
+        results.append(result)
+    return results
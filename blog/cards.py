@@ -0,0 +1,204 @@
+import logging
+from typing import Any, Callable, Iterable, Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model, Prefetch, QuerySet
+
+from blog.models import Images, Post
+from users.models import Profile
+
+# Bump when the layout of a cached card changes so old entries are never read
+CARD_SCHEMA: int = 1
+POST_CARD_KEY: str = "blog:post-card:{schema}:{post_id}:{version}"
+AUTHOR_CARD_KEY: str = "blog:author-card:{schema}:{user_id}"
+# Cards are also dropped whenever something on them changes, see blog.signals
+CARD_TTL: int = 24 * 60 * 60
+
+# The only columns listing pages have to read from the database themselves: the
+# keys they are ordered and paginated by and the version the card is cached under
+CARD_LOOKUP_FIELDS: tuple[str, ...] = ("id", "date_posted", "score", "fragment_version")
+
+# Author snapshot stored with the cards, other columns load lazily when used
+AUTHOR_FIELDS: set[str] = {"id", "username", "first_name", "last_name", "is_staff"}
+PROFILE_FIELDS: set[str] = {"id", "user_id", "image", "verified", "is_online"}
+
+
+def post_card_key(post_id: int, version: int) -> str:
+    return POST_CARD_KEY.format(schema=CARD_SCHEMA, post_id=post_id, version=version)
+
+
+def author_card_key(user_id: int) -> str:
+    return AUTHOR_CARD_KEY.format(schema=CARD_SCHEMA, user_id=user_id)
+
+
+def invalidate_author_card(user_id: int) -> None:
+    cache.delete(author_card_key(user_id))
+
+
+def card_queryset(queryset: QuerySet[Post]) -> QuerySet[Post]:
+    """
+    Narrow a listing queryset down to the columns needed to look its cards up,
+    everything the cards render is filled in by load_post_cards.
+
+    Args:
+        queryset: The posts of a listing page
+
+    Returns:
+        QuerySet[Post]: The same posts with every other column deferred
+    """
+    return queryset.only(*CARD_LOOKUP_FIELDS)
+
+
+def _row(instance: Model, fields: Optional[set[str]] = None) -> dict[str, Any]:
+    # In concrete field order, which is what Model.from_db expects for partial rows
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if fields is None or field.attname in fields
+    }
+
+
+def _from_row(model: type[Model], row: dict[str, Any]) -> Model:
+    return model.from_db(DEFAULT_DB_ALIAS, list(row), list(row.values()))
+
+
+def _build_post_cards(post_ids: list[int]) -> dict[int, dict[str, Any]]:
+    posts: QuerySet[Post] = Post.objects.filter(pk__in=post_ids).prefetch_related(
+        Prefetch("images", queryset=Images.objects.order_by("id"))
+    )
+    cards: dict[int, dict[str, Any]] = {}
+    for post in posts:
+        images: list[dict[str, Any]] = []
+        for image in post.images.all():
+            thumbnail_url: Optional[str] = None
+            if image.is_ready:
+                try:
+                    thumbnail_url = image.thumbnail_url
+                except Exception as e:
+                    logging.error(f"No thumbnail for image {image.pk}: {e}")
+            images.append({"row": _row(image), "thumbnail_url": thumbnail_url})
+        cards[post.pk] = {"post": _row(post), "images": images}
+    return cards
+
+
+def _build_author_cards(user_ids: list[int]) -> dict[int, dict[str, Any]]:
+    cards: dict[int, dict[str, Any]] = {}
+    for user in User.objects.filter(pk__in=user_ids).select_related("profile"):
+        profile: Optional[Profile] = getattr(user, "profile", None)
+        cards[user.pk] = {
+            "user": _row(user, AUTHOR_FIELDS),
+            "profile": _row(profile, PROFILE_FIELDS) if profile else None,
+        }
+    return cards
+
+
+def _read_through(
+    keys: dict[str, int], build: Callable[[list[int]], dict[int, dict[str, Any]]]
+) -> tuple[dict[int, dict[str, Any]], dict[int, dict[str, Any]]]:
+    """
+    Fetch cards with one cache round trip, building the missing ones.
+
+    Args:
+        keys: Cache key of every wanted card mapped to the id it is built from
+        build: Function building the cards of a list of ids
+
+    Returns:
+        tuple: Every card found or built by id, and the newly built ones which
+        the caller still has to cache
+    """
+    found: dict[str, Any] = cache.get_many(list(keys))
+    cards: dict[int, dict[str, Any]] = {keys[key]: card for key, card in found.items()}
+    missing: list[int] = [pk for key, pk in keys.items() if key not in found]
+    if missing:
+        built: dict[int, dict[str, Any]] = build(missing)
+        cards.update(built)
+        return cards, built
+    return cards, {}
+
+
+def get_many(posts: Iterable[Post]) -> dict[int, dict[str, Any]]:
+    """
+    Fetch the cached cards of the given posts, building the missing ones from
+    the database in three queries and caching them.
+
+    Args:
+        posts: Posts with at least CARD_LOOKUP_FIELDS loaded
+
+    Returns:
+        dict[int, dict[str, Any]]: The card of each post by post id, with the
+        author snapshot under "author"
+    """
+    posts = list(posts)
+    if not posts:
+        return {}
+
+    post_keys: dict[str, int] = {
+        post_card_key(post.pk, post.fragment_version): post.pk for post in posts
+    }
+    cards, built = _read_through(post_keys, _build_post_cards)
+    if built:
+        # Cached under the version they were built at, which may be newer than
+        # the one the listing read a moment earlier
+        cache.set_many(
+            {
+                post_card_key(pk, card["post"]["fragment_version"]): card
+                for pk, card in built.items()
+            },
+            CARD_TTL,
+        )
+
+    author_keys: dict[str, int] = {
+        author_card_key(card["post"]["author_id"]): card["post"]["author_id"]
+        for card in cards.values()
+    }
+    authors, built_authors = _read_through(author_keys, _build_author_cards)
+    if built_authors:
+        cache.set_many(
+            {author_card_key(pk): card for pk, card in built_authors.items()},
+            CARD_TTL,
+        )
+
+    for card in cards.values():
+        card["author"] = authors.get(card["post"]["author_id"])
+    return cards
+
+
+def load_post_cards(posts: Iterable[Post]) -> None:
+    """
+    Fill the posts of a listing page in place from their cached cards: all post
+    columns, author with profile, and images with their thumbnail URLs, so
+    rendering the cards runs no further queries.
+
+    Args:
+        posts: Posts with at least CARD_LOOKUP_FIELDS loaded
+    """
+    posts = list(posts)
+    cards: dict[int, dict[str, Any]] = get_many(posts)
+    for post in posts:
+        card: Optional[dict[str, Any]] = cards.get(post.pk)
+        if card is None:
+            # Deleted since the listing was read
+            continue
+        post.__dict__.update(card["post"])
+
+        if card["author"] is not None:
+            author: User = _from_row(User, card["author"]["user"])
+            if card["author"]["profile"] is not None:
+                author._state.fields_cache["profile"] = _from_row(
+                    Profile, card["author"]["profile"]
+                )
+            post._state.fields_cache["author"] = author
+
+        images: list[Images] = []
+        for image_card in card["images"]:
+            image: Images = _from_row(Images, image_card["row"])
+            image._state.fields_cache["post"] = post
+            if image_card["thumbnail_url"] is not None:
+                image.__dict__["thumbnail_url"] = image_card["thumbnail_url"]
+            images.append(image)
+        related: QuerySet[Images] = post.images.get_queryset()
+        related._result_cache = images
+        related._prefetch_done = True
+        post._prefetched_objects_cache = {"images": related}
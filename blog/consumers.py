@@ -0,0 +1,15 @@
+from channels.consumer import SyncConsumer
+
+from blog.images import process_image, process_post_image
+
+
+class ImageProcessingConsumer(SyncConsumer):
+    """Background worker generating post image thumbnails, run with
+    `manage.py runworker image-processing`."""
+
+    def process_images(self, message) -> None:
+        for image_id in message["image_ids"]:
+            process_image(image_id)
+
+    def process_post_image(self, message) -> None:
+        process_post_image(message["post_id"])
@@ -0,0 +1,533 @@
+import io
+import logging
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, Model
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Comment, FeedEntry, Images, Post, PostLike, PostSave
+from blog.search import rebuild_search_index
+from chat.models import Chat, Room, RoomUnread, Shout, ShoutBox
+from events.models import Event
+from friend.models import FriendList, FriendRequest
+from notification.models import Notification
+from users.models import Profile
+
+USERNAME_PREFIX: str = "synthetic"
+# Every synthetic user can log in with this password
+PASSWORD: str = "synthetic-password"
+# Single small image every synthetic post image points at
+PLACEHOLDER_IMAGE: str = "post_images/synthetic-placeholder.jpg"
+BATCH_SIZE: int = 1000
+# Posts, likes and follows are spread over this many days before now
+SPAN_DAYS: int = 90
+
+# Average amount of each kind of row per user, or per post, room or shoutbox for
+# the rows hanging off those
+RATIOS: dict[str, float] = {
+    "follows": 10,
+    "friends": 4,
+    "friend_requests": 1,
+    "posts": 3,
+    "images_per_post": 0.5,
+    "comments_per_post": 2,
+    "replies_per_comment": 0.5,
+    "comment_likes_per_comment": 1,
+    "likes_per_post": 5,
+    "saves_per_post": 1,
+    "notifications": 5,
+    "rooms": 2,
+    "chats_per_room": 10,
+    "shoutboxes": 0.02,
+    "shoutbox_members": 8,
+    "shouts_per_shoutbox": 20,
+    "events": 0.02,
+    "participants_per_event": 10,
+}
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    # Whole number of rows averaging mean, so fractional ratios still produce some
+    whole: int = int(mean)
+    return whole + (1 if rng.random() < mean - whole else 0)
+
+
+def _others(
+    rng: random.Random, population: list[int], k: int, me: Optional[int] = None
+) -> set[int]:
+    # k distinct ids out of population, never me
+    k = min(k, len(population) - (me is not None))
+    picked: set[int] = set()
+    while len(picked) < k:
+        other: int = rng.choice(population)
+        if other != me:
+            picked.add(other)
+    return picked
+
+
+def _bulk(model: type[Model], rows: Iterable[Model]) -> int:
+    """
+    Insert rows in batches without building them all in memory first.
+
+    Args:
+        model: Model of the rows
+        rows: Unsaved instances, generated lazily
+
+    Returns:
+        int: Number of rows inserted
+    """
+    rows = iter(rows)
+    inserted: int = 0
+    while batch := list(islice(rows, BATCH_SIZE)):
+        model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        inserted += len(batch)
+    return inserted
+
+
+def _ids(queryset) -> list[int]:
+    # Read back in insertion order, bulk_create does not return ids on every backend
+    return list(queryset.order_by("pk").values_list("pk", flat=True))
+
+
+def _reset_sequences(*models: type[Model]) -> None:
+    # Rows inserted with explicit ids leave the id sequences behind on PostgreSQL
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), list(models)):
+            cursor.execute(sql)
+
+
+def _placeholder_image() -> str:
+    storage = Images._meta.get_field("image").storage
+    if not storage.exists(PLACEHOLDER_IMAGE):
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), (90, 120, 160)).save(buffer, "JPEG")
+        return storage.save(PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+    return PLACEHOLDER_IMAGE
+
+
+class DatasetGenerator:
+    """
+    Fill the database with a reproducible synthetic social graph: the same number
+    of users and seed always produce the same users, relations and content.
+    Rows are bulk inserted, so no signals run, and everything they would have
+    maintained (profiles, friend lists, feeds, counters, scores, search index) is
+    written or rebuilt here instead.
+    """
+
+    def __init__(
+        self, users: int, seed: int = 0, log: Optional[Callable[[str], None]] = None
+    ) -> None:
+        self.users: int = users
+        self.rng: random.Random = random.Random(seed)
+        self.log: Callable[[str], None] = log or logging.info
+        self.now: datetime = timezone.now()
+        self.counts: dict[str, int] = {}
+
+    def _date(self, after: Optional[datetime] = None) -> datetime:
+        start: datetime = after or self.now - timedelta(days=SPAN_DAYS)
+        seconds: float = (self.now - start).total_seconds()
+        return start + timedelta(seconds=self.rng.random() * seconds)
+
+    def _insert(self, name: str, model: type[Model], rows: Iterable[Model]) -> None:
+        self.counts[name] = _bulk(model, rows)
+        self.log(f"{self.counts[name]} {name}")
+
+    def generate(self) -> dict[str, int]:
+        """
+        Generate the whole dataset in one transaction.
+
+        Returns:
+            dict[str, int]: Number of rows inserted of each kind
+        """
+        with transaction.atomic():
+            self._users()
+            self._relations()
+            self._posts()
+            self._engagement()
+            self._notifications()
+            self._chats()
+            self._events()
+            self._feeds()
+        self._derived()
+        return self.counts
+
+    def _users(self) -> None:
+        password: str = make_password(PASSWORD)
+        self._insert(
+            "users",
+            User,
+            (
+                User(
+                    username=f"{USERNAME_PREFIX}{n}",
+                    email=f"{USERNAME_PREFIX}{n}@example.com",
+                    first_name=f"Synthetic{n}",
+                    password=password,
+                    date_joined=self._date(),
+                )
+                for n in range(self.users)
+            ),
+        )
+        self.user_ids: list[int] = _ids(
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+        )
+        # Profiles and friend lists share the id of their user, which the events
+        # views rely on
+        self._insert(
+            "profiles",
+            Profile,
+            (
+                Profile(
+                    id=user_id,
+                    user_id=user_id,
+                    bio=f"Synthetic user {user_id}",
+                    verified=self.rng.random() < 0.5,
+                    is_online=self.rng.random() < 0.1,
+                )
+                for user_id in self.user_ids
+            ),
+        )
+        self._insert(
+            "friend lists",
+            FriendList,
+            (FriendList(id=user_id, user_id=user_id) for user_id in self.user_ids),
+        )
+        _reset_sequences(Profile, FriendList)
+
+    def _relations(self) -> None:
+        self.followers: dict[int, list[int]] = {}
+        following: list[Any] = []
+        for user_id in self.user_ids:
+            for followee in _others(
+                self.rng, self.user_ids, _count(self.rng, RATIOS["follows"]), user_id
+            ):
+                following.append(
+                    Profile.following.through(profile_id=user_id, user_id=followee)
+                )
+                self.followers.setdefault(followee, []).append(user_id)
+        self._insert("follows", Profile.following.through, following)
+
+        pairs: set[tuple[int, int]] = set()
+        for user_id in self.user_ids:
+            for friend in _others(
+                self.rng,
+                self.user_ids,
+                _count(self.rng, RATIOS["friends"] / 2),
+                user_id,
+            ):
+                pairs.add((min(user_id, friend), max(user_id, friend)))
+        self.friend_pairs: list[tuple[int, int]] = sorted(pairs)
+        both_ways: list[tuple[int, int]] = self.friend_pairs + [
+            (b, a) for a, b in self.friend_pairs
+        ]
+        self._insert(
+            "friendships",
+            FriendList.friends.through,
+            (
+                FriendList.friends.through(friendlist_id=a, user_id=b)
+                for a, b in both_ways
+            ),
+        )
+        _bulk(
+            Profile.friends.through,
+            (Profile.friends.through(profile_id=a, user_id=b) for a, b in both_ways),
+        )
+        self._insert(
+            "friend requests",
+            FriendRequest,
+            (
+                FriendRequest(sender_id=user_id, receiver_id=receiver)
+                for user_id in self.user_ids
+                for receiver in _others(
+                    self.rng,
+                    self.user_ids,
+                    _count(self.rng, RATIOS["friend_requests"]),
+                    user_id,
+                )
+            ),
+        )
+
+    def _posts(self) -> None:
+        self._insert(
+            "posts",
+            Post,
+            (
+                Post(
+                    title=f"Synthetic post {n} by {user_id}",
+                    content=f"<p>Synthetic content {n}</p>",
+                    author_id=user_id,
+                    date_posted=self._date(),
+                )
+                for user_id in self.user_ids
+                for n in range(_count(self.rng, RATIOS["posts"]))
+            ),
+        )
+        self.posts: list[tuple[int, int, datetime]] = list(
+            Post.objects.order_by("pk").values_list("pk", "author_id", "date_posted")
+        )
+
+        image: str = _placeholder_image()
+        self._insert(
+            "images",
+            Images,
+            (
+                Images(post_id=post_id, image=image, status=Images.READY)
+                for post_id, _, _ in self.posts
+                for _ in range(_count(self.rng, RATIOS["images_per_post"]))
+            ),
+        )
+        sample: Optional[Images] = Images.objects.first()
+        if sample is not None:
+            # Every image shares the placeholder, so its thumbnails serve them all
+            for size in settings.IMAGE_PROCESSING_SIZES:
+                try:
+                    sample.image.thumbnails.create(size)
+                except Exception as e:
+                    logging.error(
+                        f"Could not create the {size} placeholder thumbnail: {e}"
+                    )
+
+        self._insert(
+            "comments",
+            Comment,
+            (
+                Comment(
+                    post_id=post_id,
+                    name_id=self.rng.choice(self.user_ids),
+                    body=f"Synthetic comment on {post_id}",
+                )
+                for post_id, _, _ in self.posts
+                for _ in range(_count(self.rng, RATIOS["comments_per_post"]))
+            ),
+        )
+        self.comments: list[tuple[int, int]] = list(
+            Comment.objects.order_by("pk").values_list("pk", "post_id")
+        )
+        self._insert(
+            "replies",
+            Comment,
+            (
+                Comment(
+                    post_id=post_id,
+                    reply_id=comment_id,
+                    is_reply=True,
+                    name_id=self.rng.choice(self.user_ids),
+                    body=f"Synthetic reply to {comment_id}",
+                )
+                for comment_id, post_id in self.comments
+                for _ in range(_count(self.rng, RATIOS["replies_per_comment"]))
+            ),
+        )
+
+    def _engagement(self) -> None:
+        self.likes: list[tuple[int, int]] = []
+        likes: list[PostLike] = []
+        saves: list[PostSave] = []
+        for post_id, _, date_posted in self.posts:
+            for user_id in _others(
+                self.rng, self.user_ids, _count(self.rng, RATIOS["likes_per_post"])
+            ):
+                likes.append(
+                    PostLike(
+                        post_id=post_id,
+                        user_id=user_id,
+                        created=self._date(date_posted),
+                    )
+                )
+                self.likes.append((post_id, user_id))
+            for user_id in _others(
+                self.rng, self.user_ids, _count(self.rng, RATIOS["saves_per_post"])
+            ):
+                saves.append(
+                    PostSave(
+                        post_id=post_id,
+                        user_id=user_id,
+                        created=self._date(date_posted),
+                    )
+                )
+        self._insert("likes", PostLike, likes)
+        self._insert("saves", PostSave, saves)
+        self._insert(
+            "comment likes",
+            Comment.likes.through,
+            (
+                Comment.likes.through(comment_id=comment_id, user_id=user_id)
+                for comment_id, _ in self.comments
+                for user_id in _others(
+                    self.rng,
+                    self.user_ids,
+                    _count(self.rng, RATIOS["comment_likes_per_comment"]),
+                )
+            ),
+        )
+
+    def _notifications(self) -> None:
+        authors: dict[int, int] = {post_id: author for post_id, author, _ in self.posts}
+        likes: Iterator[tuple[int, int]] = iter(self.likes)
+
+        def notifications() -> Iterator[Notification]:
+            for user_id in self.user_ids:
+                for _ in range(_count(self.rng, RATIOS["notifications"])):
+                    liked: Optional[tuple[int, int]] = next(likes, None)
+                    if liked is None or self.rng.random() < 0.3:
+                        yield Notification(
+                            sender_id=self.rng.choice(self.user_ids),
+                            user_id=user_id,
+                            notification_type=2,
+                            is_seen=self.rng.random() < 0.5,
+                        )
+                    else:
+                        post_id, sender = liked
+                        yield Notification(
+                            post_id=post_id,
+                            sender_id=sender,
+                            user_id=authors[post_id],
+                            notification_type=1,
+                            is_seen=self.rng.random() < 0.5,
+                        )
+
+        self._insert("notifications", Notification, notifications())
+
+    def _chats(self) -> None:
+        pairs: list[tuple[int, int]] = self.friend_pairs[:]
+        self.rng.shuffle(pairs)
+        rooms: int = min(len(pairs), int(self.users * RATIOS["rooms"] / 2))
+        self._insert(
+            "rooms",
+            Room,
+            (Room(author_id=a, friend_id=b) for a, b in pairs[:rooms]),
+        )
+        self._insert(
+            "chats",
+            Chat,
+            (
+                Chat(
+                    room_id_id=room_id,
+                    author_id=sender,
+                    friend_id=receiver,
+                    text=f"Synthetic message {n}",
+                    has_seen=self.rng.random() < 0.7,
+                )
+                for room_id, a, b in Room.objects.order_by("pk").values_list(
+                    "pk", "author_id", "friend_id"
+                )
+                for n in range(_count(self.rng, RATIOS["chats_per_room"]))
+                for sender, receiver in [(a, b) if self.rng.random() < 0.5 else (b, a)]
+            ),
+        )
+        self._insert(
+            "room unread counters",
+            RoomUnread,
+            (
+                RoomUnread(
+                    room_id=row["room_id"], user_id=row["friend_id"], count=row["n"]
+                )
+                for row in Chat.objects.filter(has_seen=False)
+                .values("room_id", "friend_id")
+                .annotate(n=Count("pk"))
+                .order_by()
+            ),
+        )
+
+        self._insert(
+            "shoutboxes",
+            ShoutBox,
+            (
+                ShoutBox(shoutbox_name=f"Synthetic shoutbox {n}", author_id=author)
+                for n in range(max(1, int(self.users * RATIOS["shoutboxes"])))
+                for author in [self.rng.choice(self.user_ids)]
+            ),
+        )
+        members: dict[int, list[int]] = {}
+        for shoutbox_id, author in ShoutBox.objects.order_by("pk").values_list(
+            "pk", "author_id"
+        ):
+            members[shoutbox_id] = [author] + sorted(
+                _others(
+                    self.rng,
+                    self.user_ids,
+                    _count(self.rng, RATIOS["shoutbox_members"]),
+                    author,
+                )
+            )
+        _bulk(
+            ShoutBox.participants.through,
+            (
+                ShoutBox.participants.through(shoutbox_id=shoutbox_id, user_id=user_id)
+                for shoutbox_id, user_ids in members.items()
+                for user_id in user_ids
+            ),
+        )
+        self._insert(
+            "shouts",
+            Shout,
+            (
+                Shout(
+                    shoutbox_id=shoutbox_id,
+                    author_id=self.rng.choice(user_ids),
+                    text=f"Synthetic shout {n}",
+                )
+                for shoutbox_id, user_ids in members.items()
+                for n in range(_count(self.rng, RATIOS["shouts_per_shoutbox"]))
+            ),
+        )
+
+    def _events(self) -> None:
+        def events() -> Iterator[Event]:
+            for n in range(max(1, int(self.users * RATIOS["events"]))):
+                start: datetime = self.now + timedelta(days=self.rng.randint(7, 60))
+                yield Event(
+                    event_id=f"{USERNAME_PREFIX}-{n}",
+                    event_posted=self._date(),
+                    event_author_id=self.rng.choice(self.user_ids),
+                    event_name=f"Synthetic event {n}",
+                    event_start=start,
+                    event_end=start + timedelta(hours=4),
+                    registration_deadline=start - timedelta(days=1),
+                    host_email=f"host{n}@example.com",
+                    host_name=f"Host {n}",
+                    event_description=f"Synthetic event number {n}",
+                )
+
+        self._insert("events", Event, events())
+        self._insert(
+            "participants",
+            Event.event_participants.through,
+            (
+                Event.event_participants.through(event_id=event_id, profile_id=user_id)
+                for event_id in _ids(Event.objects.all())
+                for user_id in _others(
+                    self.rng,
+                    self.user_ids,
+                    _count(self.rng, RATIOS["participants_per_event"]),
+                )
+            ),
+        )
+
+    def _feeds(self) -> None:
+        # What fanning out every post would have written, see blog.feed
+        self._insert(
+            "feed entries",
+            FeedEntry,
+            (
+                FeedEntry(owner_id=owner_id, post_id=post_id, date_posted=date_posted)
+                for post_id, author, date_posted in self.posts
+                for owner_id in [author] + self.followers.get(author, [])
+            ),
+        )
+
+    def _derived(self) -> None:
+        call_command("recount_engagement", stdout=io.StringIO())
+        call_command("rescore_posts", stdout=io.StringIO())
+        self.counts["search documents"] = rebuild_search_index()
+        self.log(f"{self.counts['search documents']} search documents")
@@ -0,0 +1,104 @@
+import logging
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F, QuerySet
+
+from blog.cards import card_queryset
+from blog.models import FeedEntry, Post
+from users.models import Profile
+
+
+def fan_out_post(post: Post) -> None:
+    """
+    Write a newly created post into the feed of its author and of everyone following them.
+
+    Args:
+        post: The post that was just created
+    """
+    follower_ids: list[int] = list(
+        Profile.objects.filter(following=post.author_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    owner_ids: set[int] = set(follower_ids) | {post.author_id}
+    logging.debug(f"Fanning out post {post.pk} to {len(owner_ids)} feeds")
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(owner_id=owner_id, post=post, date_posted=post.date_posted)
+            for owner_id in owner_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_follow(follower_id: int, followee_ids: Iterable[int]) -> None:
+    """
+    Copy the newest posts of freshly followed users into the follower's feed.
+
+    Args:
+        follower_id: User id of the follower
+        followee_ids: User ids that were just followed
+    """
+    for followee_id in followee_ids:
+        recent_posts = Post.objects.filter(author_id=followee_id).order_by(
+            "-date_posted", "-id"
+        )[: settings.FEED_BACKFILL_LIMIT]
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    owner_id=follower_id, post_id=post_id, date_posted=date_posted
+                )
+                for post_id, date_posted in recent_posts.values_list(
+                    "id", "date_posted"
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def trim_unfollow(follower_id: int, followee_ids: Iterable[int]) -> None:
+    """
+    Drop the posts of unfollowed users from the follower's feed.
+
+    Args:
+        follower_id: User id of the follower
+        followee_ids: User ids that were just unfollowed
+    """
+    FeedEntry.objects.filter(
+        owner_id=follower_id, post__author_id__in=list(followee_ids)
+    ).exclude(post__author_id=follower_id).delete()
+
+
+def rebuild_feed(user: User) -> None:
+    """
+    Rebuild a user's feed from scratch out of their own and their followed users' posts.
+
+    Args:
+        user: The user whose feed is rebuilt
+    """
+    FeedEntry.objects.filter(owner=user).delete()
+    followee_ids: list[int] = list(user.profile.following.values_list("id", flat=True))
+    backfill_follow(user.id, followee_ids + [user.id])
+
+
+def get_feed_posts(user: User) -> QuerySet[Post]:
+    """
+    Posts in a user's feed, newest first, read off the feed entry index. Only
+    the card lookup columns are read, see blog.cards.
+
+    Args:
+        user: The user whose feed is read
+
+    Returns:
+        QuerySet[Post]: Posts annotated and ordered by the feed entry timestamp
+    """
+    return (
+        card_queryset(Post.objects.filter(feed_entries__owner=user))
+        .annotate(
+            feed_date_posted=F("feed_entries__date_posted"),
+            feed_post_id=F("feed_entries__post_id"),
+        )
+        .order_by("-feed_date_posted", "-feed_post_id")
+    )
@@ -0,0 +1,106 @@
+from typing import Iterable
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db.models import F
+
+from blog.cards import load_post_cards
+from blog.models import Comment, Post
+from blog.ranking import rescore_post
+from blog.threads import load_comment_threads
+from blog.utils import liked_comment_ids, viewer_state_key
+
+
+def bump_fragment_version(post_id: int) -> None:
+    """
+    Invalidate every cached like/save/comment fragment of a post by moving it to
+    a new version, the old entries are never read again and expire on their own.
+
+    Args:
+        post_id: Id of the post whose engagement changed
+    """
+    Post.objects.filter(pk=post_id).update(fragment_version=F("fragment_version") + 1)
+
+
+def adjust_post_counter(post: Post, field: str, delta: int) -> None:
+    """
+    blog.utils.adjust_counter for posts, bumping the fragment version in the same
+    UPDATE, refreshing both columns on the instance and rescoring the post.
+
+    Args:
+        post: The post holding the counter
+        field: Name of the counter column
+        delta: Amount to add, negative to decrement
+    """
+    Post.objects.filter(pk=post.pk).update(
+        **{field: F(field) + delta}, fragment_version=F("fragment_version") + 1
+    )
+    post.refresh_from_db(fields=[field, "fragment_version"])
+    rescore_post(post.pk)
+
+
+def bump_commented_posts(user_id: int) -> None:
+    """
+    Invalidate the cached comment fragments showing a user's name and picture,
+    those of every post they commented or replied on.
+
+    Args:
+        user_id: Id of the commenter whose name or picture changed
+    """
+    Post.objects.filter(
+        pk__in=Comment.objects.filter(name_id=user_id).values("post_id")
+    ).update(fragment_version=F("fragment_version") + 1)
+
+
+def liked_post_ids(viewer: User | AnonymousUser, post_ids: Iterable[int]) -> set[int]:
+    if not viewer.is_authenticated:
+        return set()
+    return set(
+        Post.likes.through.objects.filter(
+            user_id=viewer.id, post_id__in=post_ids
+        ).values_list("post_id", flat=True)
+    )
+
+
+def annotate_viewer_state(
+    viewer: User | AnonymousUser, posts: Iterable[Post], liked_comments: set[int]
+) -> None:
+    """
+    Set viewer_liked and viewer_comment_likes on the posts of a listing page so
+    the cached like and comment fragments can be looked up without rendering.
+    The posts must already carry their comment_thread.
+
+    Args:
+        viewer: The user looking at the page
+        posts: The posts rendered on the page
+        liked_comments: Ids of the loaded comments the viewer has liked
+    """
+    posts = list(posts)
+    liked: set[int] = liked_post_ids(viewer, [post.pk for post in posts])
+    for post in posts:
+        post.viewer_liked = post.pk in liked
+        thread_ids: set[int] = {comment.pk for comment in post.comment_thread} | {
+            reply.pk
+            for comment in post.comment_thread
+            for reply in comment.thread_replies
+        }
+        post.viewer_comment_likes = viewer_state_key(thread_ids & liked_comments)
+
+
+def prepare_post_cards(viewer: User | AnonymousUser, posts: Iterable[Post]) -> set[int]:
+    """
+    Load everything the post cards of a listing page render: the cached cards,
+    comment threads, the viewer's liked comments and the viewer state of the
+    fragment cache keys.
+
+    Args:
+        viewer: The user looking at the page
+        posts: The posts rendered on the page
+
+    Returns:
+        set[int]: Ids of the loaded comments the viewer has liked
+    """
+    posts = list(posts)
+    load_post_cards(posts)
+    liked_comments: set[int] = liked_comment_ids(viewer, load_comment_threads(posts))
+    annotate_viewer_state(viewer, posts, liked_comments)
+    return liked_comments
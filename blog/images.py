@@ -0,0 +1,137 @@
+import logging
+from datetime import timedelta
+from typing import Any, Iterable, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from blog.fragments import bump_fragment_version
+from blog.models import Images, Post
+from blog.variants import delete_variants, generate_variants, variants_are_current
+
+# Channel the image processing workers consume, see blog.consumers
+IMAGE_CHANNEL: str = "image-processing"
+
+
+def _send_after_commit(message: dict[str, Any]) -> None:
+    def send() -> None:
+        try:
+            async_to_sync(get_channel_layer().send)(IMAGE_CHANNEL, message)
+        except Exception as e:
+            logging.error(f"Could not queue {message} for image processing: {e}")
+
+    transaction.on_commit(send)
+
+
+def enqueue_image_processing(image_ids: Iterable[int]) -> None:
+    """
+    Hand freshly uploaded images to the image processing workers once the
+    current transaction commits. Images that could not be queued stay pending
+    and are picked up by the reprocess_images command.
+
+    Args:
+        image_ids: Ids of the pending Images rows
+    """
+    image_ids = list(image_ids)
+    if image_ids:
+        _send_after_commit({"type": "process.images", "image_ids": image_ids})
+
+
+def enqueue_post_image_processing(post_id: int) -> None:
+    _send_after_commit({"type": "process.post.image", "post_id": post_id})
+
+
+def process_image(image_id: int) -> bool:
+    """
+    Generate the thumbnails and responsive variants of one image. The row is
+    claimed with a conditional UPDATE first, so an image queued twice or picked
+    up by several workers is only processed once.
+
+    Args:
+        image_id: Id of the Images row
+
+    Returns:
+        bool: Whether this call processed the image successfully
+    """
+    claimed: int = Images.objects.filter(
+        pk=image_id, status__in=[Images.PENDING, Images.FAILED]
+    ).update(status=Images.PROCESSING, status_changed=timezone.now())
+    if not claimed:
+        logging.debug(f"Image {image_id} is gone or already claimed")
+        return False
+
+    try:
+        image: Images = Images.objects.get(pk=image_id)
+    except Images.DoesNotExist:
+        logging.debug(f"Image {image_id} was deleted once claimed")
+        return False
+    status: str = Images.READY
+    variants: dict[str, Any] = image.variants
+    try:
+        if image.image:
+            for size in settings.IMAGE_PROCESSING_SIZES:
+                # Drop a thumbnail left behind by an earlier run before regenerating
+                image.image.thumbnails.delete(size)
+                image.image.thumbnails.create(size)
+            delete_variants(image.image, image.variants)
+            variants = {}
+            variants = generate_variants(image.image)
+    except Exception as e:
+        logging.error(f"Processing image {image_id} failed: {e}")
+        status = Images.FAILED
+
+    Images.objects.filter(pk=image_id).update(
+        status=status, status_changed=timezone.now(), variants=variants
+    )
+    # Drop the cached card of the post, see blog.cards
+    bump_fragment_version(image.post_id)
+    return status == Images.READY
+
+
+def process_post_image(post_id: int) -> bool:
+    """
+    Generate the responsive variants of a post's own image unless they already
+    match the current file.
+
+    Args:
+        post_id: Id of the post
+
+    Returns:
+        bool: Whether new variants were written
+    """
+    post: Optional[Post] = (
+        Post.objects.filter(pk=post_id).only("id", "image", "image_variants").first()
+    )
+    if post is None or not post.image:
+        return False
+    if variants_are_current(post.image, post.image_variants):
+        return False
+
+    try:
+        variants: dict[str, Any] = generate_variants(post.image)
+    except Exception as e:
+        logging.error(f"Generating variants of post {post_id} image failed: {e}")
+        return False
+    delete_variants(post.image, post.image_variants)
+    # Only store them if the image was not replaced in the meantime
+    Post.objects.filter(pk=post_id, image=post.image.name).update(
+        image_variants=variants
+    )
+    bump_fragment_version(post_id)
+    return True
+
+
+def release_stale_images() -> int:
+    """
+    Put images whose worker died mid-processing back into the pending state.
+
+    Returns:
+        int: Number of images released
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.IMAGE_PROCESSING_TIMEOUT)
+    return Images.objects.filter(
+        status=Images.PROCESSING, status_changed__lt=cutoff
+    ).update(status=Images.PENDING, status_changed=timezone.now())
@@ -0,0 +1,100 @@
+import json
+from typing import Any
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from blog.benchmark import run_benchmark
+
+# The generated datasets are cached apart from the site's shared cache
+BENCHMARK_CACHES: dict[str, dict[str, str]] = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every page of the site with the test client and report latency "
+        "percentiles and query counts, against the current data or against datasets "
+        "of the given sizes generated with generate_dataset in a throwaway test "
+        "database"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--scales",
+            type=int,
+            nargs="+",
+            help="Generate a dataset of each of these numbers of users in a test "
+            "database and benchmark it, e.g. --scales 1000 10000 100000",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=20, help="Timed requests per page"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Also write the results to this file")
+
+    def handle(self, *args, **options) -> None:
+        report: dict[str, list[dict[str, Any]]] = {}
+        if options["scales"]:
+            self._benchmark_scales(report, options)
+        else:
+            report["current data"] = run_benchmark(options["requests"])
+            self._write_table("current data", report["current data"])
+
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(report, f, indent=2)
+
+    def _benchmark_scales(
+        self, report: dict[str, list[dict[str, Any]]], options: dict[str, Any]
+    ) -> None:
+        # Same test database as manage.py test, the site's own data and cache are
+        # never touched
+        setup_test_environment()
+        old_name: str = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        self.stdout.write(f"Benchmarking in {connection.settings_dict['NAME']}")
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                for scale in options["scales"]:
+                    label: str = f"{scale} users"
+                    self.stdout.write(f"Generating {label}")
+                    call_command(
+                        "generate_dataset",
+                        users=scale,
+                        seed=options["seed"],
+                        flush=True,
+                        stdout=self.stdout,
+                    )
+                    cache.clear()
+                    report[label] = run_benchmark(options["requests"])
+                    self._write_table(label, report[label])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _write_table(self, label: str, results: list[dict[str, Any]]) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        self.stdout.write(
+            f"{'page':<50} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>7} {'max':>5}"
+        )
+        for result in results:
+            page: str = result["name"] or result["route"]
+            if "skipped" in result:
+                self.stdout.write(f"{page:<50} skipped, {result['skipped']}")
+                continue
+            self.stdout.write(
+                f"{page:<50} {result['status']:>6} {result['p50']:>8.1f} "
+                f"{result['p95']:>8.1f} {result['p99']:>8.1f} "
+                f"{result['queries']:>7} {result['max_queries']:>5}"
+            )
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.dataset import PASSWORD, USERNAME_PREFIX, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a reproducible synthetic dataset of users, follows, "
+        "friends, posts, comments, likes, notifications, chats and events, for "
+        "benchmarking. Only meant for throwaway databases"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--users", type=int, default=1000, help="Number of users to generate"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator"
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete ALL data in the database first",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["flush"]:
+            call_command("flush", interactive=False, verbosity=0)
+        elif User.objects.exists():
+            raise CommandError(
+                "The database already has users, pass --flush to wipe it first"
+            )
+
+        counts: dict[str, int] = DatasetGenerator(
+            options["users"], options["seed"], log=self.stdout.write
+        ).generate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {sum(counts.values())} row(s), log in as "
+                f"{USERNAME_PREFIX}0 with password {PASSWORD!r}"
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete chunked uploads that were abandoned or never attached to a post or "
+        "event, along with their stored chunks and files"
+    )
+
+    def handle(self, *args, **options) -> None:
+        purged: int = purge_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} upload(s)"))
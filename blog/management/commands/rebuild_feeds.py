@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from blog.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized follow feed of every user (or of the given users)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("usernames", nargs="*", help="Only rebuild these users' feeds")
+
+    def handle(self, *args, **options) -> None:
+        users = User.objects.select_related("profile")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+
+        rebuilt: int = 0
+        for user in users.iterator():
+            rebuild_feed(user)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} feed(s)"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reindex every post, profile and event for full text search"
+
+    def handle(self, *args, **options) -> None:
+        written: int = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} document(s)"))
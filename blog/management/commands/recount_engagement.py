@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Model, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+def _count_of(model: type[Model], fk_field: str, **filters) -> Coalesce:
+    counted = (
+        model.objects.filter(**{fk_field: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(fk_field)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like/save/comment/reply counters on posts and comments"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows have drifted",
+        )
+
+    def handle(self, *args, **options) -> None:
+        counters = [
+            (Post, "like_count", _count_of(Post.likes.through, "post")),
+            (Post, "save_count", _count_of(Post.saves.through, "post")),
+            (Post, "comment_count", _count_of(Comment, "post")),
+            (Comment, "like_count", _count_of(Comment.likes.through, "comment")),
+            (Comment, "reply_count", _count_of(Comment, "reply")),
+        ]
+
+        with transaction.atomic():
+            for model, field, actual in counters:
+                drifted = model.objects.annotate(actual=actual).exclude(
+                    **{field: F("actual")}
+                )
+                if options["dry_run"]:
+                    fixed: int = drifted.count()
+                else:
+                    # Move the affected posts' cached fragments to a new version
+                    post_ids = drifted.values("pk" if model is Post else "post_id")
+                    Post.objects.filter(pk__in=post_ids).update(
+                        fragment_version=F("fragment_version") + 1
+                    )
+                    fixed = model.objects.filter(pk__in=drifted.values("pk")).update(
+                        **{field: actual}
+                    )
+                self.stdout.write(f"{model.__name__}.{field}: {fixed} drifted row(s)")
+
+        self.stdout.write(self.style.SUCCESS("Engagement counters checked"))
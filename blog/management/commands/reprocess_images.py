@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import (
+    enqueue_image_processing,
+    enqueue_post_image_processing,
+    process_image,
+    process_post_image,
+    release_stale_images,
+)
+from blog.models import Images, Post
+from blog.variants import variants_are_current
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue every unprocessed or failed post image for thumbnail and variant "
+        "generation. Safe to run repeatedly, finished images are left alone unless "
+        "--all is given"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "post_ids", nargs="*", type=int, help="Only reprocess these posts' images"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate the thumbnails of finished images as well",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Process in this process instead of queueing for the workers",
+        )
+
+    def handle(self, *args, **options) -> None:
+        released: int = release_stale_images()
+        if released:
+            self.stdout.write(f"Released {released} stale image(s)")
+
+        images = Images.objects.all()
+        posts = Post.objects.exclude(image="").exclude(image=None)
+        if options["post_ids"]:
+            images = images.filter(post_id__in=options["post_ids"])
+            posts = posts.filter(pk__in=options["post_ids"])
+        if options["all"]:
+            images.filter(status=Images.READY).update(status=Images.PENDING)
+            posts.update(image_variants={})
+
+        image_ids: list[int] = list(
+            images.filter(status__in=[Images.PENDING, Images.FAILED]).values_list(
+                "id", flat=True
+            )
+        )
+        post_ids: list[int] = [
+            post.pk
+            for post in posts.only("id", "image", "image_variants").iterator()
+            if not variants_are_current(post.image, post.image_variants)
+        ]
+
+        if options["sync"]:
+            processed: int = sum(process_image(image_id) for image_id in image_ids)
+            processed += sum(process_post_image(post_id) for post_id in post_ids)
+            total: int = len(image_ids) + len(post_ids)
+            self.stdout.write(
+                self.style.SUCCESS(f"Processed {processed} of {total} image(s)")
+            )
+            return
+
+        for start in range(0, len(image_ids), 50):
+            enqueue_image_processing(image_ids[start : start + 50])
+        for post_id in post_ids:
+            enqueue_post_image_processing(post_id)
+        self.stdout.write(
+            self.style.SUCCESS(f"Queued {len(image_ids) + len(post_ids)} image(s)")
+        )
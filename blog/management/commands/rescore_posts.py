@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+from blog.ranking import rescore_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the top feed score of posts. Likes, saves and comments rescore a "
+        "post as they happen, run this periodically to pick up follower changes and "
+        "after changing RANKING_WEIGHTS or RANKING_DECAY"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only rescore posts published in the last DAYS days",
+        )
+
+    def handle(self, *args, **options) -> None:
+        posts = Post.objects.all()
+        if options["days"]:
+            posts = posts.filter(
+                date_posted__gte=timezone.now() - timedelta(days=options["days"])
+            )
+        updated: int = rescore_posts(posts)
+        self.stdout.write(self.style.SUCCESS(f"Rescored {updated} post(s)"))
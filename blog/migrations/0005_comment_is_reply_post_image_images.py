@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:47
+
+import blog.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_auto_20210215_1727"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="is_reply",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="image",
+            field=models.ImageField(
+                blank=True, null=True, upload_to=blog.models.get_image_filename
+            ),
+        ),
+        migrations.CreateModel(
+            name="Images",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "image",
+                    blog.models.ImageModelField(
+                        blank=True, null=True, upload_to=blog.models.get_image_filename
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="images",
+                        to="blog.post",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+# The database specific full text index over blog_searchdocument, which the
+# search module queries directly, see blog.search
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_searchdocument_fts USING fts5(
+        kind UNINDEXED, title, body,
+        content='blog_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_searchdocument_fts_ai
+    AFTER INSERT ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(rowid, kind, title, body)
+        VALUES (new.id, new.kind, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_searchdocument_fts_ad
+    AFTER DELETE ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(
+            blog_searchdocument_fts, rowid, kind, title, body
+        )
+        VALUES ('delete', old.id, old.kind, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_searchdocument_fts_au
+    AFTER UPDATE ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(
+            blog_searchdocument_fts, rowid, kind, title, body
+        )
+        VALUES ('delete', old.id, old.kind, old.title, old.body);
+        INSERT INTO blog_searchdocument_fts(rowid, kind, title, body)
+        VALUES (new.id, new.kind, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS blog_searchdocument_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_searchdocument_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_searchdocument_fts_au",
+    "DROP TABLE IF EXISTS blog_searchdocument_fts",
+]
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE blog_searchdocument ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS blog_searchdocument_vector_idx
+    ON blog_searchdocument USING gin (search_vector)
+    """,
+]
+
+POSTGRES_TEARDOWN = [
+    "DROP INDEX IF EXISTS blog_searchdocument_vector_idx",
+    "ALTER TABLE blog_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_engagement_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("post", "Post"),
+                            ("profile", "Profile"),
+                            ("event", "Event"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("title", models.CharField(blank=True, max_length=255)),
+                ("body", models.TextField(blank=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"), name="unique_search_document"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({"sqlite": SQLITE_SETUP, "postgresql": POSTGRES_SETUP}),
+            run_for_vendor(
+                {"sqlite": SQLITE_TEARDOWN, "postgresql": POSTGRES_TEARDOWN}
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0009_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="fragment_version",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
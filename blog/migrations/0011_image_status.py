@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_images_ready(apps, schema_editor):
+    # Their thumbnails were generated when they were uploaded
+    Images = apps.get_model("blog", "Images")
+    Images.objects.update(status="ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0010_post_fragment_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="images",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="images",
+            name="status_changed",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(mark_existing_images_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,141 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the implicit through tables of Post.likes and Post.saves into the PostLike
+    and PostSave models. The tables and their rows are kept, only the state moves
+    over, then the created column is added. Likes and saves made before this
+    migration are dated when it runs.
+    """
+
+    dependencies = [
+        ("blog", "0014_post_score"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PostLike",
+                    fields=[
+                        (
+                            "id",
+                            models.AutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="like_entries",
+                                to="blog.post",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="post_like_entries",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={"db_table": "blog_post_likes"},
+                ),
+                migrations.CreateModel(
+                    name="PostSave",
+                    fields=[
+                        (
+                            "id",
+                            models.AutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="save_entries",
+                                to="blog.post",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="post_save_entries",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={"db_table": "blog_post_saves"},
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="likes",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="blogpost",
+                        through="blog.PostLike",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="saves",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="blogsave",
+                        through="blog.PostSave",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="postlike",
+            name="created",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="postsave",
+            name="created",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name="postlike",
+            constraint=models.UniqueConstraint(
+                fields=("post", "user"), name="unique_post_like"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="postsave",
+            constraint=models.UniqueConstraint(
+                fields=("post", "user"), name="unique_post_save"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="postlike",
+            index=models.Index(
+                fields=["user", "-created", "-id"], name="post_like_user_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="postsave",
+            index=models.Index(
+                fields=["user", "-created", "-id"], name="post_save_user_idx"
+            ),
+        ),
+    ]
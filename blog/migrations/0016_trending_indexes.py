@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0015_postlike_postsave"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["date_added"], name="comment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="postlike",
+            index=models.Index(fields=["created"], name="post_like_created_idx"),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import logging
+import uuid
 
 from ckeditor.fields import RichTextField
 from django.contrib.auth.models import User
@@ -6,6 +7,7 @@ from django.db import models
 from django.template.defaultfilters import slugify
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from protected_media.models import ProtectedImageField
 from thumbnails.fields import ImageField
 
@@ -36,18 +38,47 @@ class Post(models.Model):
     image: models.ImageField = models.ImageField(
         upload_to=get_image_filename, null=True, blank=True
     )
+    # Responsive WebP/AVIF copies of image, written by blog.variants
+    image_variants: models.JSONField = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     likes: models.ManyToManyField = models.ManyToManyField(
-        User, related_name="blogpost", blank=True
+        User, related_name="blogpost", blank=True, through="PostLike"
     )
     saves: models.ManyToManyField = models.ManyToManyField(
-        User, related_name="blogsave", blank=True
+        User, related_name="blogsave", blank=True, through="PostSave"
     )
+    # Denormalized engagement counters, kept in step by blog.views
+    like_count: models.IntegerField = models.IntegerField(default=0, editable=False)
+    save_count: models.IntegerField = models.IntegerField(default=0, editable=False)
+    comment_count: models.IntegerField = models.IntegerField(default=0, editable=False)
+    # Bumped on every like/save/comment change, part of the cached fragment keys
+    fragment_version: models.IntegerField = models.IntegerField(default=0, editable=False)
+    # Ranking score of the top feed, kept up to date by blog.ranking
+    score: models.FloatField = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-date_posted", "-id"], name="post_date_idx"),
+            models.Index(fields=["author", "-date_posted", "-id"], name="post_author_date_idx"),
+            models.Index(fields=["-score", "-id"], name="post_score_idx"),
+        ]
 
     def total_likes(self) -> int:
-        return self.likes.count()
+        return self.like_count
 
     def total_saves(self) -> int:
-        return self.saves.count()
+        return self.save_count
+
+    def image_progress(self) -> dict:
+        images: list = list(self.images.all())
+        ready: int = sum(image.is_ready for image in images)
+        return {
+            "images": images,
+            "ready": ready,
+            "total": len(images),
+            "processing": ready < len(images),
+        }
 
     def __str__(self) -> str:
         return self.title
@@ -57,19 +88,94 @@ class Post(models.Model):
 
 
 class Images(models.Model):
+    PENDING: str = "pending"
+    PROCESSING: str = "processing"
+    READY: str = "ready"
+    FAILED: str = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
     post: models.ForeignKey = models.ForeignKey(
         Post, related_name="images", on_delete=models.CASCADE
     )
+    # Thumbnails are generated by the image processing workers, see blog.images
     image: ImageModelField = ImageModelField(
         upload_to=get_image_filename,
         null=True,
         blank=True,
-        pregenerated_sizes=["small", "large"],
     )
+    status: models.CharField = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    status_changed: models.DateTimeField = models.DateTimeField(default=timezone.now)
+    # Responsive WebP/AVIF copies of image, written by blog.variants
+    variants: models.JSONField = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self) -> str:
         return self.post.title
 
+    @property
+    def is_ready(self) -> bool:
+        return self.status == self.READY
+
+    @cached_property
+    def thumbnail_url(self) -> str:
+        # Filled in from the post card cache on listing pages, see blog.cards
+        return self.image.thumbnails.small.url
+
+
+""" Like and save models, recording when a post was liked or saved """
+
+
+class PostLike(models.Model):
+    post: models.ForeignKey = models.ForeignKey(
+        Post, related_name="like_entries", on_delete=models.CASCADE
+    )
+    user: models.ForeignKey = models.ForeignKey(
+        User, related_name="post_like_entries", on_delete=models.CASCADE
+    )
+    created: models.DateTimeField = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Same table as the implicit through table it replaces
+        db_table = "blog_post_likes"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "user"], name="unique_post_like"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created", "-id"], name="post_like_user_idx"),
+            models.Index(fields=["created"], name="post_like_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} likes {self.post_id}"
+
+
+class PostSave(models.Model):
+    post: models.ForeignKey = models.ForeignKey(
+        Post, related_name="save_entries", on_delete=models.CASCADE
+    )
+    user: models.ForeignKey = models.ForeignKey(
+        User, related_name="post_save_entries", on_delete=models.CASCADE
+    )
+    created: models.DateTimeField = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "blog_post_saves"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "user"], name="unique_post_save"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created", "-id"], name="post_save_user_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} saved {self.post_id}"
+
 
 """ Comment model """
 
@@ -88,12 +194,110 @@ class Comment(models.Model):
         "self", null=True, related_name="replies", on_delete=models.CASCADE
     )
     is_reply: models.BooleanField = models.BooleanField(default=False)
+    # Denormalized engagement counters, kept in step by blog.views
+    like_count: models.IntegerField = models.IntegerField(default=0, editable=False)
+    reply_count: models.IntegerField = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_added"], name="comment_date_idx"),
+        ]
 
     def total_clikes(self) -> int:
-        return self.likes.count()
+        return self.like_count
 
     def __str__(self) -> str:
         return "%s - %s - %s" % (self.post.title, self.name, self.id)
 
     def get_absolute_url(self) -> str:
         return reverse("post-detail", kwargs={"pk": self.pk})
+
+
+""" Feed entry model """
+
+
+class FeedEntry(models.Model):
+    owner: models.ForeignKey = models.ForeignKey(
+        User, related_name="feed_entries", on_delete=models.CASCADE
+    )
+    post: models.ForeignKey = models.ForeignKey(
+        Post, related_name="feed_entries", on_delete=models.CASCADE
+    )
+    # Copied from the post so the feed can be read newest-first straight off the index
+    date_posted: models.DateTimeField = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "post"], name="unique_feed_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["owner", "-date_posted", "-post"], name="feed_owner_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.owner} - {self.post_id}"
+
+
+""" Search document model """
+
+
+class SearchDocument(models.Model):
+    POST: str = "post"
+    PROFILE: str = "profile"
+    EVENT: str = "event"
+    KIND_CHOICES = [(POST, "Post"), (PROFILE, "Profile"), (EVENT, "Event")]
+
+    kind: models.CharField = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id: models.PositiveIntegerField = models.PositiveIntegerField()
+    # Plain text copies of the indexed fields, the full text index is built off these
+    title: models.CharField = models.CharField(max_length=255, blank=True)
+    body: models.TextField = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_search_document"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.object_id}"
+
+
+""" Chunked upload model """
+
+
+class ChunkedUpload(models.Model):
+    # What the finished file is attached to, see blog.uploads
+    POST_IMAGES: str = "images"
+    POST_IMAGE: str = "post_image"
+    EVENT_POSTER: str = "event_poster"
+    TARGET_CHOICES = [
+        (POST_IMAGES, "Post gallery image"),
+        (POST_IMAGE, "Post cover image"),
+        (EVENT_POSTER, "Event poster"),
+    ]
+
+    upload_id: models.UUIDField = models.UUIDField(
+        default=uuid.uuid4, unique=True, editable=False
+    )
+    owner: models.ForeignKey = models.ForeignKey(
+        User, related_name="chunked_uploads", on_delete=models.CASCADE
+    )
+    target: models.CharField = models.CharField(max_length=12, choices=TARGET_CHOICES)
+    filename: models.CharField = models.CharField(max_length=255)
+    # Size announced by the client and bytes stored so far, the next chunk starts at received
+    size: models.PositiveBigIntegerField = models.PositiveBigIntegerField()
+    received: models.PositiveBigIntegerField = models.PositiveBigIntegerField(default=0)
+    # Storage names of the accepted chunks in offset order
+    parts: models.JSONField = models.JSONField(default=list, editable=False)
+    # Name and SHA-256 of the assembled file in the target field's storage, set once complete
+    sha256: models.CharField = models.CharField(max_length=64, blank=True)
+    file: models.CharField = models.CharField(max_length=255, blank=True)
+    created: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    updated: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(self.file)
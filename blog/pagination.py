@@ -0,0 +1,227 @@
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from django.db import models
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_PARAM: str = "cursor"
+
+
+def encode_cursor(
+    date_posted: datetime | float, pk: int, backwards: bool = False
+) -> str:
+    """
+    Build an opaque, url-safe token pointing just past the given row.
+
+    Args:
+        date_posted: Timestamp, or numeric sort key such as a score, of the row the
+            cursor points at
+        pk: Primary key of the row the cursor points at
+        backwards: Whether the cursor pages towards newer rows
+
+    Returns:
+        str: The cursor token
+    """
+    key: str | float = (
+        date_posted.isoformat() if isinstance(date_posted, datetime) else date_posted
+    )
+    payload: str = json.dumps({"d": key, "i": pk, "b": backwards})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    token: Optional[str],
+) -> Optional[tuple[datetime | float, int, bool]]:
+    """
+    Reverse of encode_cursor, tampered or malformed tokens decode to None.
+
+    Args:
+        token: The cursor token taken from the query string
+
+    Returns:
+        Optional[tuple[datetime | float, int, bool]]: Timestamp or sort key, primary
+        key and direction
+    """
+    if not token or not isinstance(token, str):
+        return None
+    try:
+        padded: str = token + "=" * (-len(token) % 4)
+        payload: dict[str, Any] = json.loads(base64.urlsafe_b64decode(padded))
+        key: Any = payload["d"]
+        return (
+            key if isinstance(key, (int, float)) else datetime.fromisoformat(key),
+            int(payload["i"]),
+            bool(payload["b"]),
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        logging.debug(f"Ignoring invalid cursor {token!r}: {e}")
+        return None
+
+
+class CursorPage(Sequence):
+    """One page of a CursorPaginator, usable in templates like a Paginator page."""
+
+    def __init__(
+        self,
+        object_list: list[Any],
+        paginator: "CursorPaginator",
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ) -> None:
+        self.object_list: list[Any] = object_list
+        self.paginator: CursorPaginator = paginator
+        self.next_cursor: Optional[str] = next_cursor
+        self.previous_cursor: Optional[str] = previous_cursor
+
+    def __repr__(self) -> str:
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over a queryset ordered newest first by (date, id), or
+    highest first by (sort key, id) for any other indexed column such as a score.
+
+    Every page is a single range read of per_page + 1 rows, no matter how deep
+    the reader has paged, and no COUNT query is issued unless count is used.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        date_field: str = "date_posted",
+        id_field: str = "id",
+    ) -> None:
+        self.queryset: QuerySet = queryset
+        self.per_page: int = per_page
+        self.date_field: str = date_field
+        self.id_field: str = id_field
+
+    @cached_property
+    def count(self) -> int:
+        return self.queryset.count()
+
+    def _cursor_for(self, obj: Any, backwards: bool) -> str:
+        return encode_cursor(
+            getattr(obj, self.date_field), getattr(obj, self.id_field), backwards
+        )
+
+    @cached_property
+    def _key_type(self) -> type | tuple[type, ...]:
+        annotation = self.queryset.query.annotations.get(self.date_field)
+        field = (
+            annotation.output_field
+            if annotation is not None
+            else self.queryset.model._meta.get_field(self.date_field)
+        )
+        if isinstance(field, (models.DateTimeField, models.DateField)):
+            return datetime
+        return (int, float)
+
+    def page(self, token: Optional[str]) -> CursorPage:
+        cursor = decode_cursor(token)
+        if cursor is not None and not isinstance(cursor[0], self._key_type):
+            # A cursor of another ordering, such as a score one sent to a date page
+            logging.debug(f"Ignoring cursor {token!r} not keyed by {self.date_field}")
+            cursor = None
+        date_field, id_field = self.date_field, self.id_field
+        queryset: QuerySet = self.queryset
+
+        if cursor is None:
+            backwards: bool = False
+            queryset = queryset.order_by(f"-{date_field}", f"-{id_field}")
+        else:
+            date_value, pk, backwards = cursor
+            if backwards:
+                queryset = queryset.filter(
+                    Q(**{f"{date_field}__gt": date_value})
+                    | Q(**{date_field: date_value, f"{id_field}__gt": pk})
+                ).order_by(date_field, id_field)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{date_field}__lt": date_value})
+                    | Q(**{date_field: date_value, f"{id_field}__lt": pk})
+                ).order_by(f"-{date_field}", f"-{id_field}")
+
+        rows: list[Any] = list(queryset[: self.per_page + 1])
+        has_more: bool = len(rows) > self.per_page
+        if backwards and not has_more:
+            # Paged all the way back to the newest rows, serve a full first page
+            return self.page(None)
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage([], self, None, None)
+
+        # Moving forwards there are always newer rows once a cursor has been followed
+        has_newer: bool = backwards or cursor is not None
+        has_older: bool = True if backwards else has_more
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self._cursor_for(rows[-1], False) if has_older else None,
+            previous_cursor=self._cursor_for(rows[0], True) if has_newer else None,
+        )
+
+
+class CursorPaginationMixin:
+    """ListView mixin swapping the OFFSET based Paginator for a CursorPaginator."""
+
+    paginate_by: int
+    cursor_date_field: str = "date_posted"
+    cursor_id_field: str = "id"
+
+    def get_cursor_date_field(self) -> str:
+        return self.cursor_date_field
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator: CursorPaginator = CursorPaginator(
+            queryset,
+            page_size,
+            date_field=self.get_cursor_date_field(),
+            id_field=self.cursor_id_field,
+        )
+        page: CursorPage = paginator.page(self.request.GET.get(CURSOR_PARAM))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+def paginate_by_cursor(
+    request, queryset: QuerySet, per_page: int, **kwargs: str
+) -> CursorPage:
+    """
+    Paginate a queryset for function based views using the request's cursor.
+
+    Args:
+        request: The current request object
+        queryset: The rows to paginate
+        per_page: Rows per page
+        **kwargs: date_field / id_field overrides passed to CursorPaginator
+
+    Returns:
+        CursorPage: The requested page
+    """
+    paginator: CursorPaginator = CursorPaginator(queryset, per_page, **kwargs)
+    return paginator.page(request.GET.get(CURSOR_PARAM))
@@ -0,0 +1,116 @@
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Post
+from users.models import Profile
+
+# Scores count seconds from here so they stay small enough for a float column
+RANKING_EPOCH: float = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def post_score(
+    like_count: int,
+    save_count: int,
+    comment_count: int,
+    author_followers: int,
+    date_posted: datetime,
+) -> float:
+    """
+    Ranking score of a post: the log of its weighted engagement plus a recency
+    term. Because every settings.RANKING_DECAY seconds of age cost as much as ten
+    times the engagement, older posts decay without their score ever having to be
+    rewritten, and ordering by the stored score stays correct over time.
+
+    Args:
+        like_count: Likes of the post
+        save_count: Saves of the post
+        comment_count: Comments on the post
+        author_followers: Number of profiles following the author
+        date_posted: When the post was published
+
+    Returns:
+        float: The score, higher ranks first
+    """
+    weights: dict[str, float] = settings.RANKING_WEIGHTS
+    engagement: float = (
+        weights["like"] * like_count
+        + weights["save"] * save_count
+        + weights["comment"] * comment_count
+        + weights["follower"] * author_followers
+    )
+    age: float = date_posted.timestamp() - RANKING_EPOCH
+    return math.log10(max(engagement, 1)) + age / settings.RANKING_DECAY
+
+
+def with_author_followers(queryset: QuerySet[Post]) -> QuerySet[Post]:
+    followers = (
+        Profile.following.through.objects.filter(user_id=OuterRef("author_id"))
+        .order_by()
+        .values("user_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return queryset.annotate(
+        author_followers=Coalesce(Subquery(followers, output_field=IntegerField()), 0)
+    )
+
+
+def _score_of(post: Post) -> float:
+    return post_score(
+        post.like_count,
+        post.save_count,
+        post.comment_count,
+        post.author_followers,
+        post.date_posted,
+    )
+
+
+def rescore_post(post_id: int) -> None:
+    """
+    Recompute the stored score of one post off its current counters, called
+    whenever a like, save or comment changes them.
+
+    Args:
+        post_id: Id of the post to rescore
+    """
+    post: Post | None = (
+        with_author_followers(Post.objects.filter(pk=post_id))
+        .only("like_count", "save_count", "comment_count", "date_posted", "author_id")
+        .first()
+    )
+    if post is not None:
+        Post.objects.filter(pk=post_id).update(score=_score_of(post))
+
+
+def rescore_posts(queryset: QuerySet[Post], batch_size: int = 500) -> int:
+    """
+    Recompute the stored scores of many posts, picking up follower changes and
+    new ranking settings.
+
+    Args:
+        queryset: The posts to rescore
+        batch_size: Rows read and written per query
+
+    Returns:
+        int: Number of posts whose score changed
+    """
+    posts = with_author_followers(queryset).only(
+        "score", "like_count", "save_count", "comment_count", "date_posted", "author_id"
+    )
+    changed: list[Post] = []
+    updated: int = 0
+    for post in posts.iterator(chunk_size=batch_size):
+        score: float = _score_of(post)
+        if score != post.score:
+            post.score = score
+            changed.append(post)
+        if len(changed) >= batch_size:
+            updated += Post.objects.bulk_update(changed, ["score"])
+            changed = []
+    if changed:
+        updated += Post.objects.bulk_update(changed, ["score"])
+    return updated
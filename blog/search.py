@@ -0,0 +1,243 @@
+import logging
+import re
+from html import unescape
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Model, Q, QuerySet
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import SafeString, mark_safe
+
+from blog.cards import card_queryset
+from blog.models import Post, SearchDocument
+from events.models import Event
+from users.models import Profile
+
+FTS_TABLE: str = "blog_searchdocument_fts"
+MAX_QUERY_TERMS: int = 10
+
+# Control characters never appear in indexed text, so the database wraps matches in
+# these and they are swapped for <mark> tags only after the text has been escaped
+MATCH_START: str = "\x02"
+MATCH_END: str = "\x03"
+
+SEARCH_MODELS: dict[str, type[Model]] = {
+    SearchDocument.POST: Post,
+    SearchDocument.PROFILE: Profile,
+    SearchDocument.EVENT: Event,
+}
+
+
+def _plain_text(html: Optional[str]) -> str:
+    return unescape(strip_tags(html or "")).strip()
+
+
+def _document_fields(kind: str, obj: Any) -> tuple[str, str]:
+    if kind == SearchDocument.POST:
+        return obj.title, f"{obj.author.username}\n{_plain_text(obj.content)}"
+    if kind == SearchDocument.PROFILE:
+        user = obj.user
+        return user.username, f"{user.first_name} {user.last_name}".strip()
+    return obj.event_name, _plain_text(obj.event_description)
+
+
+def index_object(kind: str, obj: Any) -> None:
+    """
+    Create or refresh the search document of a post, profile or event.
+
+    Args:
+        kind: One of the SearchDocument kinds
+        obj: The post, profile or event to index
+    """
+    title, body = _document_fields(kind, obj)
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=obj.pk, defaults={"title": title[:255], "body": body}
+    )
+
+
+def unindex_object(kind: str, object_id: int) -> None:
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_search_index() -> int:
+    """
+    Throw away every search document and index all posts, profiles and events again.
+
+    Returns:
+        int: Number of documents written
+    """
+    SearchDocument.objects.all().delete()
+    querysets: dict[str, QuerySet] = {
+        SearchDocument.POST: Post.objects.select_related("author"),
+        SearchDocument.PROFILE: Profile.objects.select_related("user"),
+        SearchDocument.EVENT: Event.objects.all(),
+    }
+    written: int = 0
+    for kind, queryset in querysets.items():
+        documents: list[SearchDocument] = []
+        for obj in queryset.iterator(chunk_size=500):
+            title, body = _document_fields(kind, obj)
+            documents.append(
+                SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], body=body)
+            )
+        SearchDocument.objects.bulk_create(documents, batch_size=500)
+        written += len(documents)
+    return written
+
+
+""" Running a query """
+
+
+class SearchPage(list):
+    """One page of ranked results of one kind, fetched without counting every match."""
+
+    def __init__(self, results: Iterable[Any], number: int, has_next: bool) -> None:
+        super().__init__(results)
+        self.number: int = number
+        self._has_next: bool = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+
+def query_terms(query: str) -> list[str]:
+    """
+    Split user input into word tokens, dropping anything the full text query
+    syntax of either backend would interpret.
+
+    Args:
+        query: The raw search box input
+
+    Returns:
+        list[str]: At most MAX_QUERY_TERMS lower cased words
+    """
+    return [term.lower() for term in re.findall(r"\w+", query)][:MAX_QUERY_TERMS]
+
+
+def highlight(text: str) -> SafeString:
+    return mark_safe(
+        escape(text).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    )
+
+
+def _sqlite_matches(
+    terms: list[str], kind: str, limit: int, offset: int
+) -> list[tuple[int, str, str]]:
+    match: str = " ".join(f'"{term}"*' for term in terms)
+    sql: str = f"""
+        SELECT d.object_id,
+               highlight({FTS_TABLE}, 1, %s, %s),
+               snippet({FTS_TABLE}, 2, %s, %s, '…', 24)
+        FROM {FTS_TABLE}
+        JOIN blog_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.kind = %s
+        ORDER BY bm25({FTS_TABLE}, 0.0, 10.0, 1.0), d.id DESC
+        LIMIT %s OFFSET %s
+    """
+    params: list[Any] = [MATCH_START, MATCH_END] * 2 + [match, kind, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _postgres_matches(
+    terms: list[str], kind: str, limit: int, offset: int
+) -> list[tuple[int, str, str]]:
+    tsquery: str = " & ".join(f"{term}:*" for term in terms)
+    title_options: str = f"StartSel={MATCH_START}, StopSel={MATCH_END}, HighlightAll=true"
+    body_options: str = (
+        f"StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords=35, MinWords=15"
+    )
+    sql: str = """
+        SELECT d.object_id,
+               ts_headline('english', d.title, q, %s),
+               ts_headline('english', d.body, q, %s)
+        FROM blog_searchdocument d, to_tsquery('english', %s) q
+        WHERE d.kind = %s AND d.search_vector @@ q
+        ORDER BY ts_rank_cd(d.search_vector, q) DESC, d.id DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [title_options, body_options, tsquery, kind, limit, offset])
+        return cursor.fetchall()
+
+
+def _fallback_matches(
+    terms: list[str], kind: str, limit: int, offset: int
+) -> list[tuple[int, str, str]]:
+    condition: Q = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    rows = SearchDocument.objects.filter(condition, kind=kind).order_by("-id")
+    return [
+        (object_id, title, body[:200])
+        for object_id, title, body in rows.values_list("object_id", "title", "body")[
+            offset : offset + limit
+        ]
+    ]
+
+
+def search_documents(query: str, kind: str, page: int = 1) -> SearchPage:
+    """
+    Rank the documents of one kind against the query and load one page of the
+    matching objects, each with search_title / search_snippet set for display.
+
+    Args:
+        query: The raw search box input
+        kind: One of the SearchDocument kinds
+        page: 1-based page number
+
+    Returns:
+        SearchPage: The matching posts, profiles or events in rank order
+    """
+    terms: list[str] = query_terms(query)
+    if not terms:
+        return SearchPage([], 1, False)
+
+    per_page: int = settings.SEARCH_PAGE_SIZE
+    page = max(page, 1)
+    matcher = {"sqlite": _sqlite_matches, "postgresql": _postgres_matches}.get(
+        connection.vendor, _fallback_matches
+    )
+    args: tuple = (terms, kind, per_page + 1, (page - 1) * per_page)
+    try:
+        rows = matcher(*args)
+    except DatabaseError as e:
+        # Index not installed yet (e.g. migrate has not run since deploying)
+        logging.error(f"Full text search failed, falling back to substring search: {e}")
+        rows = _fallback_matches(*args)
+
+    has_next: bool = len(rows) > per_page
+    rows = rows[:per_page]
+
+    model: type[Model] = SEARCH_MODELS[kind]
+    queryset: QuerySet = model.objects.all()
+    if kind == SearchDocument.POST:
+        # Filled in from the post card cache by the view, see blog.cards
+        queryset = card_queryset(queryset)
+    elif kind == SearchDocument.PROFILE:
+        queryset = queryset.select_related("user")
+    objects: dict[int, Any] = queryset.in_bulk([row[0] for row in rows])
+
+    results: list[Any] = []
+    for object_id, title, snippet in rows:
+        obj = objects.get(object_id)
+        if obj is None:
+            continue
+        obj.search_title = highlight(title)
+        obj.search_snippet = highlight(snippet)
+        results.append(obj)
+    return SearchPage(results, page, has_next)
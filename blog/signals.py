@@ -0,0 +1,183 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from blog.cards import invalidate_author_card
+from blog.feed import backfill_follow, fan_out_post, trim_unfollow
+from blog.fragments import bump_commented_posts, bump_fragment_version
+from blog.images import enqueue_post_image_processing
+from blog.models import FeedEntry, Images, Post, SearchDocument
+from blog.ranking import rescore_post
+from blog.search import index_object, unindex_object
+from blog.variants import variants_are_current
+from events.models import Event
+from users.models import Profile
+
+""" Writing a post into follower feeds when it is created """
+
+
+@receiver(post_save, sender=Post)
+def post_saved_update_feeds(sender, instance, created, **kwargs) -> None:
+    if created:
+        fan_out_post(instance)
+    else:
+        FeedEntry.objects.filter(post=instance).exclude(
+            date_posted=instance.date_posted
+        ).update(date_posted=instance.date_posted)
+
+
+""" Backfilling and trimming feeds when a user follows or unfollows someone """
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def following_changed_update_feeds(
+    sender, instance, action, reverse, pk_set, **kwargs
+) -> None:
+    if action == "pre_clear":
+        if reverse:
+            followers = Profile.objects.filter(following=instance)
+            for follower_id in followers.values_list("user_id", flat=True):
+                trim_unfollow(follower_id, [instance.pk])
+        else:
+            followee_ids = list(instance.following.values_list("id", flat=True))
+            trim_unfollow(instance.user_id, followee_ids)
+        return
+
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    update_feed = backfill_follow if action == "post_add" else trim_unfollow
+    if reverse:
+        # instance is the followed User, pk_set holds follower Profile ids
+        follower_ids = Profile.objects.filter(pk__in=pk_set).values_list(
+            "user_id", flat=True
+        )
+        for follower_id in follower_ids:
+            update_feed(follower_id, [instance.pk])
+    else:
+        update_feed(instance.user_id, pk_set)
+
+
+""" Refreshing cached comments when a commenter changes their name or picture """
+
+# What the comment fragments show of their authors
+COMMENT_AUTHOR_FIELDS: dict[type, tuple[str, ...]] = {
+    User: ("username",),
+    Profile: ("image",),
+}
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Profile)
+def comment_author_saving(sender, instance, raw=False, **kwargs) -> None:
+    # Profiles are saved on every log in and out, only a change of what the
+    # comments show moves their fragments
+    if raw or instance.pk is None:
+        return
+    fields: tuple[str, ...] = COMMENT_AUTHOR_FIELDS[sender]
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._comment_author_changed = stored is not None and any(
+        stored[field]
+        != sender._meta.get_field(field).get_prep_value(getattr(instance, field))
+        for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def comment_author_saved_bump_fragments(sender, instance, **kwargs) -> None:
+    if getattr(instance, "_comment_author_changed", False):
+        user_id: int = instance.pk if sender is User else instance.user_id
+        bump_commented_posts(user_id)
+
+
+""" Generating responsive variants when a post's own image changes """
+
+
+@receiver(post_save, sender=Post)
+def post_saved_process_image(sender, instance, raw=False, **kwargs) -> None:
+    if not raw and instance.image and not variants_are_current(
+        instance.image, instance.image_variants
+    ):
+        enqueue_post_image_processing(instance.pk)
+
+
+""" Scoring new and edited posts for the top feed """
+
+
+@receiver(post_save, sender=Post)
+def post_saved_update_score(sender, instance, raw=False, **kwargs) -> None:
+    if not raw:
+        rescore_post(instance.pk)
+
+
+""" Invalidating cached post cards, see blog.cards """
+
+
+@receiver(post_save, sender=Post)
+def post_saved_invalidate_card(sender, instance, created, raw=False, **kwargs) -> None:
+    if not raw and not created:
+        # Cards are keyed on the fragment version, moving it on drops them
+        bump_fragment_version(instance.pk)
+        instance.refresh_from_db(fields=["fragment_version"])
+
+
+@receiver(post_save, sender=Images)
+@receiver(post_delete, sender=Images)
+def image_changed_invalidate_card(sender, instance, raw=False, **kwargs) -> None:
+    if not raw:
+        bump_fragment_version(instance.post_id)
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+@receiver(m2m_changed, sender=Post.saves.through)
+def engagement_changed_invalidate_card(
+    sender, instance, action, reverse, pk_set, **kwargs
+) -> None:
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        bump_fragment_version(instance.pk)
+    else:
+        # instance is the User, pk_set holds post ids (None once cleared)
+        for post_id in pk_set or ():
+            bump_fragment_version(post_id)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved_invalidate_author_card(sender, instance, **kwargs) -> None:
+    invalidate_author_card(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved_invalidate_author_card(sender, instance, **kwargs) -> None:
+    invalidate_author_card(instance.pk)
+
+
+""" Keeping search documents in step with posts, profiles and events """
+
+SEARCH_KINDS: dict[type, str] = {
+    Post: SearchDocument.POST,
+    Profile: SearchDocument.PROFILE,
+    Event: SearchDocument.EVENT,
+}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Event)
+def searchable_saved_update_index(sender, instance, raw=False, **kwargs) -> None:
+    if not raw:
+        index_object(SEARCH_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Event)
+def searchable_deleted_update_index(sender, instance, **kwargs) -> None:
+    unindex_object(SEARCH_KINDS[sender], instance.pk)
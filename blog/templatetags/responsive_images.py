@@ -0,0 +1,63 @@
+from typing import Any, Optional
+
+from django import template
+from django.db.models.fields.files import FieldFile
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import SafeString
+
+register = template.Library()
+
+# Post images sit in the col-md-8 content column
+DEFAULT_SIZES: str = "(max-width: 768px) 100vw, 730px"
+
+
+@register.simple_tag
+def responsive_image(
+    image_file: FieldFile,
+    variants: Optional[dict[str, Any]],
+    sizes: str = DEFAULT_SIZES,
+    fallback_url: Optional[str] = None,
+    css_class: str = "img-fluid",
+) -> SafeString:
+    """
+    Render a <picture> offering the AVIF/WebP variants of an image through
+    srcset, falling back to fallback_url (or the original) for old browsers.
+
+    Usage:
+        {% load responsive_images %}
+        {% responsive_image image.image image.variants fallback_url=image.image.thumbnails.small.url %}
+
+    Args:
+        image_file: The stored original
+        variants: The variants field written by blog.variants.generate_variants
+        sizes: The sizes attribute of the sources
+        fallback_url: src of the <img>, defaults to the original
+        css_class: class of the <img>
+
+    Returns:
+        SafeString: The <picture> element
+    """
+    img: SafeString = format_html(
+        '<img src="{}" class="{}" loading="lazy" decoding="async">',
+        fallback_url or image_file.url,
+        css_class,
+    )
+    files: dict[str, list] = (variants or {}).get("files", {})
+    if not files or (variants or {}).get("source") != image_file.name:
+        return img
+
+    storage = image_file.storage
+    sources: SafeString = format_html_join(
+        "",
+        '<source type="image/{}" srcset="{}" sizes="{}">',
+        (
+            (
+                ext,
+                ", ".join(f"{storage.url(name)} {width}w" for width, name in pairs),
+                sizes,
+            )
+            for ext, pairs in files.items()
+            if pairs
+        ),
+    )
+    return format_html("<picture>{}{}</picture>", sources, img)
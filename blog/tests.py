@@ -1,3 +1,513 @@
-from django.test import TestCase  # noqa: F401
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from django_social.querybudget import assert_max_queries
+
+from blog.benchmark import log_in
+from blog.cards import card_queryset, load_post_cards
+from blog.fragments import adjust_post_counter
+from blog.models import (
+    ChunkedUpload,
+    Comment,
+    FeedEntry,
+    Images,
+    Post,
+    SearchDocument,
+)
+from blog.pagination import CursorPaginator, encode_cursor
+from blog.search import query_terms, search_documents
+from blog.uploads import UploadError, complete_upload, receive_chunk, start_upload
+from blog.utils import toggle_relation
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                author=cls.author,
+                date_posted=now - timedelta(hours=i),
+            )
+            for i in range(5)
+        ]
+
+    def paginator(self, per_page: int = 2) -> CursorPaginator:
+        return CursorPaginator(Post.objects.all(), per_page)
+
+    def test_pages_forward_newest_first(self) -> None:
+        first = self.paginator().page(None)
+        self.assertEqual(list(first), self.posts[:2])
+        self.assertFalse(first.has_previous())
+
+        second = self.paginator().page(first.next_cursor)
+        self.assertEqual(list(second), self.posts[2:4])
+        self.assertTrue(second.has_previous())
+
+        last = self.paginator().page(second.next_cursor)
+        self.assertEqual(list(last), self.posts[4:])
+        self.assertFalse(last.has_next())
+
+    def test_pages_backward_to_the_newest(self) -> None:
+        first = self.paginator().page(None)
+        second = self.paginator().page(first.next_cursor)
+        third = self.paginator().page(second.next_cursor)
+
+        back = self.paginator().page(third.previous_cursor)
+        self.assertEqual(list(back), self.posts[2:4])
+        self.assertTrue(back.has_previous())
+
+        newest = self.paginator().page(back.previous_cursor)
+        self.assertEqual(list(newest), self.posts[:2])
+        self.assertFalse(newest.has_previous())
+
+    def test_equal_dates_are_ordered_by_id(self) -> None:
+        Post.objects.update(date_posted=timezone.now())
+        newest_first = list(Post.objects.order_by("-id"))
+
+        seen: list[Post] = []
+        page = self.paginator().page(None)
+        while True:
+            seen.extend(page)
+            if not page.has_next():
+                break
+            page = self.paginator().page(page.next_cursor)
+        self.assertEqual(seen, newest_first)
+
+        back = self.paginator().page(page.previous_cursor)
+        self.assertEqual(list(back), newest_first[2:4])
+
+    def test_invalid_cursor_serves_the_first_page(self) -> None:
+        page = self.paginator().page("not-a-cursor")
+        self.assertEqual(list(page), self.posts[:2])
+
+    def test_cursor_of_another_ordering_serves_the_first_page(self) -> None:
+        score_cursor: str = encode_cursor(12.5, self.posts[1].pk)
+        self.assertEqual(list(self.paginator().page(score_cursor)), self.posts[:2])
+        self.assertEqual(list(self.paginator().page(123)), self.posts[:2])
+
+        by_score = CursorPaginator(Post.objects.all(), 2, date_field="score")
+        date_cursor: str = encode_cursor(timezone.now(), self.posts[1].pk)
+        self.assertEqual(len(by_score.page(date_cursor)), 2)
+
+        # Annotated sort keys are checked against the annotation's type
+        annotated = CursorPaginator(
+            Post.objects.annotate(posted=F("date_posted")), 2, date_field="posted"
+        )
+        first = annotated.page(None)
+        self.assertEqual(list(annotated.page(first.next_cursor)), self.posts[2:4])
+        self.assertEqual(list(annotated.page(score_cursor)), self.posts[:2])
+
+
+class EngagementCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.post = Post.objects.create(title="Post", author=cls.author)
+        cls.comment = Comment.objects.create(
+            name=cls.author, post=cls.post, body="Comment"
+        )
+
+    def setUp(self) -> None:
+        log_in(self.client, self.reader)
+
+    def toggle(self, url_name: str, **data) -> None:
+        response = self.client.post(
+            reverse(url_name), data, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def assertCountsInStep(self) -> None:
+        post = Post.objects.get(pk=self.post.pk)
+        comment = Comment.objects.get(pk=self.comment.pk)
+        self.assertEqual(post.like_count, post.likes.count())
+        self.assertEqual(post.save_count, post.saves.count())
+        self.assertEqual(comment.like_count, comment.likes.count())
+
+    def test_post_like_and_save_toggle_the_counters(self) -> None:
+        for url_name in ("post-like", "post-save"):
+            self.toggle(url_name, id=self.post.pk)
+        self.assertCountsInStep()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 1)
+
+        for url_name in ("post-like", "post-save"):
+            self.toggle(url_name, id=self.post.pk)
+        self.assertCountsInStep()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).save_count, 0)
+
+    def test_comment_like_toggles_the_counter(self) -> None:
+        data = {"comment_pk": self.comment.pk, "post_pk": self.post.pk}
+        self.toggle("comment-like", **data)
+        self.assertEqual(Comment.objects.get(pk=self.comment.pk).like_count, 1)
+        self.toggle("comment-like", **data)
+        self.assertCountsInStep()
+
+    def test_toggle_relation_and_counter_move_together(self) -> None:
+        post = Post.objects.get(pk=self.post.pk)
+        version = post.fragment_version
+        for expected in (True, False, True):
+            liked = toggle_relation(post.likes, self.reader)
+            adjust_post_counter(post, "like_count", 1 if liked else -1)
+            self.assertEqual(liked, expected)
+            self.assertEqual(post.like_count, post.likes.count())
+        self.assertEqual(post.fragment_version, version + 3)
+        self.assertEqual(Post.objects.get(pk=post.pk).like_count, 1)
+
+    def test_recount_repairs_drifted_counters(self) -> None:
+        self.post.likes.add(self.reader)
+        Post.objects.filter(pk=self.post.pk).update(like_count=5, comment_count=0)
+
+        call_command("recount_engagement", stdout=StringIO())
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.like_count, 1)
+        self.assertEqual(post.comment_count, 1)
+
+
+class EngagementJsonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.post = Post.objects.create(title="Post", author=cls.author)
+        cls.comment = Comment.objects.create(
+            name=cls.author, post=cls.post, body="Comment"
+        )
+
+    def setUp(self) -> None:
+        log_in(self.client, self.reader)
+
+    def post_json(self, url_name: str, **data) -> dict:
+        response = self.client.post(reverse(url_name), {**data, "format": "json"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_post_like_and_save_return_their_state(self) -> None:
+        self.assertEqual(
+            self.post_json("post-like", id=self.post.pk), {"liked": True, "count": 1}
+        )
+        self.assertEqual(
+            self.post_json("post-like", id=self.post.pk), {"liked": False, "count": 0}
+        )
+        self.assertEqual(
+            self.post_json("post-save", id=self.post.pk), {"saved": True, "count": 1}
+        )
+
+    def test_comment_like_returns_its_state(self) -> None:
+        data = {"comment_pk": self.comment.pk, "post_pk": self.post.pk}
+        self.assertEqual(
+            self.post_json("comment-like", **data),
+            {"liked": True, "count": 1, "comment": self.comment.pk},
+        )
+
+    def test_plain_posts_redirect_to_the_post(self) -> None:
+        detail: str = reverse("post-detail", kwargs={"pk": self.post.pk})
+        for url_name, data in (
+            ("post-like", {"id": self.post.pk}),
+            ("post-save", {"id": self.post.pk}),
+            ("comment-like", {"comment_pk": self.comment.pk}),
+        ):
+            with self.subTest(url_name):
+                response = self.client.post(reverse(url_name), data)
+                self.assertRedirects(response, detail, fetch_redirect_response=False)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 1)
+        self.assertEqual(Comment.objects.get(pk=self.comment.pk).like_count, 1)
+
+
+class CommentFragmentVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.commenter = User.objects.create_user("commenter", password="password")
+        cls.post = Post.objects.create(title="Post", author=cls.author)
+        cls.other_post = Post.objects.create(title="Other post", author=cls.author)
+        Comment.objects.create(name=cls.commenter, post=cls.post, body="Comment")
+
+    def versions(self) -> tuple[int, int]:
+        return tuple(
+            Post.objects.get(pk=post.pk).fragment_version
+            for post in (self.post, self.other_post)
+        )
+
+    def test_renaming_a_commenter_moves_their_posts(self) -> None:
+        before = self.versions()
+        self.commenter.username = "renamed"
+        self.commenter.save()
+        self.assertEqual(self.versions(), (before[0] + 1, before[1]))
+
+    def test_new_picture_moves_their_posts(self) -> None:
+        before = self.versions()
+        profile = self.commenter.profile
+        profile.image = "profile_pics/new.png"
+        profile.save()
+        self.assertEqual(self.versions(), (before[0] + 1, before[1]))
+
+    def test_other_profile_changes_keep_the_version(self) -> None:
+        before = self.versions()
+        profile = self.commenter.profile
+        profile.is_online = not profile.is_online
+        profile.save()
+        self.assertEqual(self.versions(), before)
+
+
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.owner = User.objects.create_user("owner", password="password")
+        image = BytesIO()
+        Image.new("RGB", (32, 32), "red").save(image, "PNG")
+        cls.data = image.getvalue()
+
+    def setUp(self) -> None:
+        media_root: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.upload = start_upload(
+            self.owner, ChunkedUpload.POST_IMAGE, "red.png", len(self.data)
+        )
+
+    def send(self, upload: ChunkedUpload, start: int, end: int) -> ChunkedUpload:
+        return receive_chunk(upload, start, BytesIO(self.data[start:end]), end - start)
+
+    def test_chunks_out_of_order_are_rejected(self) -> None:
+        with self.assertRaises(UploadError) as raised:
+            self.send(self.upload, 10, 20)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).received, 0)
+
+        self.send(self.upload, 0, 10)
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).received, 10)
+
+    def test_duplicate_chunks_are_stored_once(self) -> None:
+        stale = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.send(self.upload, 0, 10)
+
+        # Resent, and sent concurrently by a request that loaded the upload first
+        for upload in (self.upload, stale):
+            with self.assertRaises(UploadError) as raised:
+                self.send(upload, 0, 10)
+            self.assertEqual(raised.exception.status, 409)
+
+        stored = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.assertEqual(stored.received, 10)
+        self.assertEqual(len(stored.parts), 1)
+        _, files = default_storage.listdir(f"chunked_uploads/{stored.upload_id.hex}")
+        self.assertEqual(len(files), 1)
+
+    def test_complete_checks_the_file_checksum(self) -> None:
+        size = len(self.data)
+        self.send(self.send(self.upload, 0, size // 2), size // 2, size)
+
+        with self.assertRaises(UploadError):
+            complete_upload(self.upload, hashlib.sha256(b"other").hexdigest())
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).file, "")
+        _, files = default_storage.listdir("post_images")
+        self.assertEqual(files, [])
+
+        upload = complete_upload(self.upload, hashlib.sha256(self.data).hexdigest())
+        with default_storage.open(upload.file, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.follower = User.objects.create_user("follower", password="password")
+        cls.stranger = User.objects.create_user("stranger", password="password")
+        cls.follower.profile.following.add(cls.author)
+        cls.own_post = Post.objects.create(title="Own post", author=cls.follower)
+
+    def feed(self, user: User) -> set[int]:
+        return set(
+            FeedEntry.objects.filter(owner=user).values_list("post_id", flat=True)
+        )
+
+    def test_new_posts_reach_the_author_and_their_followers(self) -> None:
+        post = Post.objects.create(title="Post", author=self.author)
+        self.assertIn(post.pk, self.feed(self.author))
+        self.assertEqual(self.feed(self.follower), {self.own_post.pk, post.pk})
+        self.assertEqual(self.feed(self.stranger), set())
+
+    @override_settings(FEED_BACKFILL_LIMIT=2)
+    def test_following_backfills_the_newest_posts(self) -> None:
+        now = timezone.now()
+        posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                author=self.author,
+                date_posted=now - timedelta(hours=i),
+            )
+            for i in range(3)
+        ]
+        self.stranger.profile.following.add(self.author)
+        self.assertEqual(self.feed(self.stranger), {posts[0].pk, posts[1].pk})
+
+    def test_unfollowing_keeps_only_the_followers_own_posts(self) -> None:
+        post = Post.objects.create(title="Post", author=self.author)
+        self.stranger.profile.following.add(self.author)
+
+        self.follower.profile.following.remove(self.author)
+        self.assertEqual(self.feed(self.follower), {self.own_post.pk})
+
+        # From the followed user's side, as when they remove a follower
+        self.author.following.clear()
+        self.assertEqual(self.feed(self.stranger), set())
+        self.assertIn(post.pk, self.feed(self.author))
+
+    def test_rebuild_restores_dropped_entries(self) -> None:
+        post = Post.objects.create(title="Post", author=self.author)
+        FeedEntry.objects.all().delete()
+
+        call_command("rebuild_feeds", stdout=StringIO())
+
+        self.assertEqual(self.feed(self.follower), {self.own_post.pk, post.pk})
+        self.assertEqual(self.feed(self.author), {post.pk})
+        self.assertEqual(self.feed(self.stranger), set())
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.post = Post.objects.create(
+            title="Gardening <tips>",
+            content="<p>Growing tomatoes on a balcony</p>",
+            author=cls.author,
+        )
+        Post.objects.create(title="Cooking", content="Pasta", author=cls.author)
+
+    def document(self, kind: str, obj) -> SearchDocument:
+        return SearchDocument.objects.get(kind=kind, object_id=obj.pk)
+
+    def test_documents_follow_their_objects(self) -> None:
+        document = self.document(SearchDocument.POST, self.post)
+        self.assertEqual(document.title, "Gardening <tips>")
+        self.assertEqual(document.body, "author\nGrowing tomatoes on a balcony")
+        self.assertEqual(
+            self.document(SearchDocument.PROFILE, self.author.profile).title, "author"
+        )
+
+        self.post.title = "Balcony gardening"
+        self.post.save()
+        self.assertEqual(
+            self.document(SearchDocument.POST, self.post).title, "Balcony gardening"
+        )
+
+        post_pk: int = self.post.pk
+        self.post.delete()
+        self.assertFalse(
+            SearchDocument.objects.filter(
+                kind=SearchDocument.POST, object_id=post_pk
+            ).exists()
+        )
+
+    def test_query_terms_drop_the_query_syntax(self) -> None:
+        self.assertEqual(
+            query_terms('Tomato* "OR" -balcony NEAR(a'),
+            ["tomato", "or", "balcony", "near", "a"],
+        )
+
+    def test_prefixes_match_and_are_highlighted_after_escaping(self) -> None:
+        results = search_documents("garden tomat", SearchDocument.POST)
+        self.assertEqual(results, [self.post])
+        self.assertFalse(results.has_next())
+        self.assertIn("<mark>Gardening</mark> &lt;tips&gt;", results[0].search_title)
+        self.assertIn("<mark>tomatoes</mark>", results[0].search_snippet)
+
+        self.assertEqual(search_documents("gardening pasta", SearchDocument.POST), [])
+        self.assertEqual(search_documents("?!", SearchDocument.POST), [])
+
+    def test_rebuild_reindexes_everything(self) -> None:
+        SearchDocument.objects.all().delete()
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(search_documents("tomatoes", SearchDocument.POST), [self.post])
+        self.assertTrue(
+            SearchDocument.objects.filter(
+                kind=SearchDocument.PROFILE, object_id=self.author.profile.pk
+            ).exists()
+        )
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "post-card-tests",
+        }
+    }
+)
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.post = Post.objects.create(title="Post", author=cls.author)
+        Images.objects.create(post=cls.post, image="post_images/first.jpg")
+
+    def setUp(self) -> None:
+        cache.clear()
+        # Warm the card of the post and of its author
+        self.card()
+
+    def card(self) -> Post:
+        posts: list[Post] = list(card_queryset(Post.objects.filter(pk=self.post.pk)))
+        load_post_cards(posts)
+        return posts[0]
+
+    def test_warm_cards_run_only_the_listing_query(self) -> None:
+        with assert_max_queries(1):
+            post = self.card()
+            rendered = (
+                post.title,
+                post.author.username,
+                post.author.profile.image.url,
+                [image.image.name for image in post.images.all()],
+            )
+        self.assertEqual(rendered[0], "Post")
+        self.assertEqual(rendered[3], ["post_images/first.jpg"])
+
+    def test_title_edits_show_up(self) -> None:
+        post = Post.objects.get(pk=self.post.pk)
+        post.title = "Edited"
+        post.save()
+        self.assertEqual(self.card().title, "Edited")
+
+    def test_added_and_deleted_images_show_up(self) -> None:
+        added = Images.objects.create(post=self.post, image="post_images/second.jpg")
+        self.assertEqual(
+            [image.image.name for image in self.card().images.all()],
+            ["post_images/first.jpg", "post_images/second.jpg"],
+        )
+
+        Images.objects.get(image="post_images/first.jpg").delete()
+        self.assertEqual([image.pk for image in self.card().images.all()], [added.pk])
+
+    def test_author_changes_show_up(self) -> None:
+        self.author.username = "renamed"
+        self.author.save()
+        self.assertEqual(self.card().author.username, "renamed")
+
+        profile = self.author.profile
+        profile.image = "profile_pics/new.png"
+        profile.save()
+        self.assertEqual(self.card().author.profile.image.name, "profile_pics/new.png")
@@ -0,0 +1,174 @@
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.db.models import F, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from blog.models import Comment, Post
+from blog.utils import liked_comment_ids, viewer_state_key
+
+
+def _with_authors(queryset: QuerySet[Comment]) -> QuerySet[Comment]:
+    return queryset.select_related("name__profile")
+
+
+def _attach_replies(parents: list[Comment], limit: Optional[int]) -> list[int]:
+    """
+    Fetch the first replies of every parent comment in one query and hang them off
+    the parents as thread_replies, with replies_cursor set when more remain.
+
+    Args:
+        parents: Top level comments to load replies for
+        limit: Maximum number of replies loaded per parent, None loads them all
+
+    Returns:
+        list[int]: Ids of the parents and of every reply that was loaded
+    """
+    if not parents:
+        return []
+
+    replies: QuerySet[Comment] = _with_authors(
+        Comment.objects.filter(reply_id__in=[parent.pk for parent in parents])
+    )
+    if limit is not None:
+        replies = replies.annotate(
+            reply_rank=Window(
+                RowNumber(), partition_by=F("reply_id"), order_by=F("id").asc()
+            )
+        ).filter(reply_rank__lte=limit)
+
+    loaded_ids: list[int] = [parent.pk for parent in parents]
+    by_parent: dict[int, list[Comment]] = {parent.pk: [] for parent in parents}
+    for reply in replies.order_by("id"):
+        by_parent[reply.reply_id].append(reply)
+        loaded_ids.append(reply.pk)
+
+    for parent in parents:
+        parent.thread_replies = by_parent[parent.pk]
+        has_more: bool = parent.reply_count > len(parent.thread_replies)
+        parent.replies_cursor = parent.thread_replies[-1].pk if has_more else None
+    return loaded_ids
+
+
+def load_post_comments(
+    post: Post, before: Optional[int] = None, limit: Optional[int] = None
+) -> tuple[list[Comment], Optional[int]]:
+    """
+    Load one page of a post's top level comments, newest first, with their first
+    replies, authors and author profiles in two queries.
+
+    Args:
+        post: The post whose comments are loaded
+        before: Only load comments older than this comment id
+        limit: Page size, defaults to settings.COMMENTS_PAGE_SIZE
+
+    Returns:
+        tuple[list[Comment], Optional[int]]: The comments and the cursor of the next
+        page, None when there are no older comments
+    """
+    limit = limit or settings.COMMENTS_PAGE_SIZE
+    comments: QuerySet[Comment] = _with_authors(post.comments.filter(reply=None))
+    if before:
+        comments = comments.filter(id__lt=before)
+
+    page: list[Comment] = list(comments.order_by("-id")[: limit + 1])
+    next_cursor: Optional[int] = page[limit - 1].pk if len(page) > limit else None
+    page = page[:limit]
+    _attach_replies(page, settings.REPLIES_PAGE_SIZE)
+    return page, next_cursor
+
+
+def comment_section_context(
+    viewer: User | AnonymousUser, post: Post, before: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Template context for comments.html / comment_list.html: one page of the post's
+    comment thread plus the viewer's liked state for everything on it.
+
+    Args:
+        viewer: The user looking at the comments
+        post: The post whose comments are rendered
+        before: Only load comments older than this comment id
+
+    Returns:
+        dict[str, Any]: comments, comments_cursor, liked_comment_ids and the
+        comment_likes_key of the cached comments fragment
+    """
+    comments, comments_cursor = load_post_comments(post, before=before)
+    loaded_ids: list[int] = [comment.pk for comment in comments] + [
+        reply.pk for comment in comments for reply in comment.thread_replies
+    ]
+    liked: set[int] = liked_comment_ids(viewer, loaded_ids)
+    return {
+        "post": post,
+        "comments": comments,
+        "comments_cursor": comments_cursor,
+        "liked_comment_ids": liked,
+        "comment_likes_key": viewer_state_key(liked),
+    }
+
+
+def load_comment_threads(posts: Iterable[Post]) -> list[int]:
+    """
+    Load the first page of comments of every post on a listing page in two queries,
+    setting comment_thread and comments_cursor on each post.
+
+    Args:
+        posts: The posts rendered on the page
+
+    Returns:
+        list[int]: Ids of every comment and reply that was loaded
+    """
+    posts = list(posts)
+    if not posts:
+        return []
+
+    limit: int = settings.COMMENTS_PAGE_SIZE
+    comments: QuerySet[Comment] = (
+        _with_authors(
+            Comment.objects.filter(post_id__in=[post.pk for post in posts], reply=None)
+        )
+        .annotate(
+            comment_rank=Window(
+                RowNumber(), partition_by=F("post_id"), order_by=F("id").desc()
+            )
+        )
+        .filter(comment_rank__lte=limit + 1)
+        .order_by("-id")
+    )
+
+    by_post: dict[int, list[Comment]] = {post.pk: [] for post in posts}
+    for comment in comments:
+        by_post[comment.post_id].append(comment)
+
+    shown: list[Comment] = []
+    for post in posts:
+        thread: list[Comment] = by_post[post.pk]
+        post.comments_cursor = thread[limit - 1].pk if len(thread) > limit else None
+        post.comment_thread = thread[:limit]
+        shown.extend(post.comment_thread)
+    return _attach_replies(shown, settings.REPLIES_PAGE_SIZE)
+
+
+def load_more_replies(
+    parent: Comment, after: int = 0, limit: Optional[int] = None
+) -> tuple[list[Comment], Optional[int]]:
+    """
+    Load the next page of replies to a comment, oldest first.
+
+    Args:
+        parent: The comment being replied to
+        after: Only load replies newer than this reply id
+        limit: Page size, defaults to settings.REPLIES_PAGE_SIZE
+
+    Returns:
+        tuple[list[Comment], Optional[int]]: The replies and the cursor of the next
+        page, None when there are no more replies
+    """
+    limit = limit or settings.REPLIES_PAGE_SIZE
+    replies: list[Comment] = list(
+        _with_authors(parent.replies.filter(id__gt=after)).order_by("id")[: limit + 1]
+    )
+    next_cursor: Optional[int] = replies[limit - 1].pk if len(replies) > limit else None
+    return replies[:limit], next_cursor
@@ -0,0 +1,147 @@
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.models import Comment, Post, PostLike
+
+BOARD_KEY: str = "blog:trending:board"
+# One Redis sorted set of weighted engagement per post and bucket
+BUCKET_KEY: str = "blog:trending:bucket:{bucket}"
+# When the buckets started being filled, they only cover the whole window once
+# it lies that far back
+TRACKING_SINCE_KEY: str = "blog:trending:since"
+
+
+def _redis() -> Optional[RedisCache]:
+    """The default cache when it is Redis, the only backend buckets are kept in."""
+    backend = caches["default"]
+    return backend if isinstance(backend, RedisCache) else None
+
+
+def _bucket(timestamp: float) -> int:
+    return int(timestamp // settings.TRENDING_BUCKET)
+
+
+def _window_buckets(backend: RedisCache, now: float) -> list[str]:
+    last: int = _bucket(now)
+    first: int = _bucket(now - settings.TRENDING_WINDOW) + 1
+    return [
+        backend.make_and_validate_key(BUCKET_KEY.format(bucket=bucket))
+        for bucket in range(first, last + 1)
+    ]
+
+
+def _board(top: list[tuple[int, float]]) -> list[dict[str, Any]]:
+    top = [(post_id, score) for post_id, score in top if score > 0]
+    titles: dict[int, str] = dict(
+        Post.objects.filter(pk__in=[post_id for post_id, _ in top]).values_list(
+            "id", "title"
+        )
+    )
+    # Posts deleted since are skipped, hence the extra candidates
+    return [
+        {"id": post_id, "title": titles[post_id], "score": score}
+        for post_id, score in top
+        if post_id in titles
+    ][: settings.TRENDING_SIZE]
+
+
+def _top_from_buckets(now: float) -> Optional[list[tuple[int, float]]]:
+    backend: Optional[RedisCache] = _redis()
+    if backend is None:
+        return None
+    since: Optional[float] = cache.get(TRACKING_SINCE_KEY)
+    if since is None or since > now - settings.TRENDING_WINDOW:
+        return None
+    # Summed server side into a scratch set, read and dropped in one transaction
+    union: str = backend.make_and_validate_key(f"{BOARD_KEY}:union")
+    pipeline = backend._cache.get_client(union, write=True).pipeline()
+    pipeline.zunionstore(union, _window_buckets(backend, now))
+    pipeline.zrevrange(union, 0, settings.TRENDING_SIZE * 2 - 1, withscores=True)
+    pipeline.delete(union)
+    top: list[tuple[bytes, float]] = pipeline.execute()[1]
+    return [(int(post_id), score) for post_id, score in top]
+
+
+def _top_from_database() -> list[tuple[int, float]]:
+    start = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    weights: dict[str, float] = settings.RANKING_WEIGHTS
+    scores: Counter = Counter()
+    for post_id, likes in (
+        PostLike.objects.filter(created__gte=start)
+        .values("post_id")
+        .annotate(total=Count("id"))
+        .values_list("post_id", "total")
+    ):
+        scores[post_id] += weights["like"] * likes
+    for post_id, comments in (
+        Comment.objects.filter(date_added__gte=start)
+        .values("post_id")
+        .annotate(total=Count("id"))
+        .values_list("post_id", "total")
+    ):
+        scores[post_id] += weights["comment"] * comments
+    return scores.most_common(settings.TRENDING_SIZE * 2)
+
+
+def rebuild_trending() -> list[dict[str, Any]]:
+    """
+    Recompute the leaderboard, from the Redis buckets when they cover the whole
+    window and from the likes and comments tables otherwise, and cache it.
+
+    Returns:
+        list[dict[str, Any]]: The leaderboard, see trending_posts
+    """
+    top: Optional[list[tuple[int, float]]] = _top_from_buckets(time.time())
+    if top is None:
+        top = _top_from_database()
+    board: list[dict[str, Any]] = _board(top)
+    # Expires so the window keeps sliding and new engagement shows up
+    cache.set(BOARD_KEY, board, settings.TRENDING_REFRESH)
+    return board
+
+
+def trending_posts() -> list[dict[str, Any]]:
+    """
+    The posts with the most weighted likes and comments within the last
+    settings.TRENDING_WINDOW seconds, a single cache read unless the leaderboard
+    has to be rebuilt, which happens every settings.TRENDING_REFRESH seconds.
+
+    Returns:
+        list[dict[str, Any]]: id, title and score of each post, best first
+    """
+    board: Optional[list[dict[str, Any]]] = cache.get(BOARD_KEY)
+    if board is None:
+        board = rebuild_trending()
+    return board
+
+
+def record_engagement(post_id: int, kind: str, delta: int = 1) -> None:
+    """
+    Add a like or comment to the sorted set of the current time bucket with an
+    atomic ZINCRBY, so concurrent updates are all counted. The leaderboard picks
+    it up when it is next rebuilt. Without a Redis cache nothing is recorded and
+    the leaderboard is always rebuilt from the database.
+
+    Args:
+        post_id: Id of the post engaged with
+        kind: "like" or "comment", the key of its weight in RANKING_WEIGHTS
+        delta: 1, or -1 when a like is taken back
+    """
+    backend: Optional[RedisCache] = _redis()
+    if backend is None:
+        return
+    now: float = time.time()
+    cache.add(TRACKING_SINCE_KEY, now, None)
+    key: str = backend.make_and_validate_key(BUCKET_KEY.format(bucket=_bucket(now)))
+    pipeline = backend._cache.get_client(key, write=True).pipeline()
+    pipeline.zincrby(key, settings.RANKING_WEIGHTS[kind] * delta, post_id)
+    pipeline.expire(key, settings.TRENDING_WINDOW + settings.TRENDING_BUCKET)
+    pipeline.execute()
@@ -0,0 +1,326 @@
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+from typing import Any, BinaryIO, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.db.models import Model
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from PIL import Image
+
+from blog.models import ChunkedUpload, Images, Post
+from events.models import Event
+
+# Chunks are stored as separate files under this directory of the default storage
+# until the upload is completed
+PARTS_DIR: str = "chunked_uploads"
+
+# Model, field and directory the assembled file of each upload target ends up in
+TARGETS: dict[str, tuple[type[Model], str, str]] = {
+    ChunkedUpload.POST_IMAGES: (Images, "image", "post_images"),
+    ChunkedUpload.POST_IMAGE: (Post, "image", "post_images"),
+    ChunkedUpload.EVENT_POSTER: (Event, "event_poster", "event_posters"),
+}
+
+
+class UploadError(Exception):
+    """A chunk or upload was rejected, status is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.message: str = message
+        self.status: int = status
+
+
+class HashingReader:
+    """Read-only view of the first limit bytes of a stream, hashing them on the way."""
+
+    def __init__(self, stream: BinaryIO, limit: int) -> None:
+        self.stream: BinaryIO = stream
+        self.remaining: int = limit
+        self.size: int = 0
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data: bytes = self.stream.read(size)
+        self.remaining = self.remaining - len(data) if data else 0
+        self.size += len(data)
+        self.sha256.update(data)
+        return data
+
+
+class PartsReader:
+    """Read the stored chunks of an upload back as one stream, in offset order."""
+
+    def __init__(self, storage: Storage, names: list[str]) -> None:
+        self.storage: Storage = storage
+        self.names: list[str] = list(names)
+        self.current: Optional[Any] = None
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return b""
+                self.current = self.storage.open(self.names.pop(0), "rb")
+            data: bytes = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+    def close(self) -> None:
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def target_storage(target: str) -> Storage:
+    model, field_name, _ = TARGETS[target]
+    return model._meta.get_field(field_name).storage
+
+
+def _parts_prefix(upload: ChunkedUpload) -> str:
+    return f"{PARTS_DIR}/{upload.upload_id.hex}"
+
+
+def _part_name(upload: ChunkedUpload, offset: int) -> str:
+    # Every attempt at an offset writes its own file, only the one that moves
+    # received on is recorded in upload.parts
+    return f"{_parts_prefix(upload)}/{offset:015d}-{uuid.uuid4().hex[:8]}.part"
+
+
+def delete_parts(upload: ChunkedUpload) -> None:
+    """Delete every stored chunk of an upload, including those of failed attempts."""
+    prefix: str = _parts_prefix(upload)
+    try:
+        _, files = default_storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for name in files:
+        default_storage.delete(f"{prefix}/{name}")
+
+
+def start_upload(owner: Any, target: str, filename: str, size: int) -> ChunkedUpload:
+    """
+    Register a new chunked upload after checking it against the size cap.
+
+    Args:
+        owner: The user uploading
+        target: One of the ChunkedUpload targets
+        filename: Original name of the file on the client
+        size: Total size of the file in bytes
+
+    Returns:
+        ChunkedUpload: The new upload, chunks are sent against its upload_id
+    """
+    if target not in TARGETS:
+        raise UploadError(f"Unknown upload target {target!r}")
+    if size <= 0:
+        raise UploadError("Upload size must be positive")
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f"File is larger than the {settings.UPLOAD_MAX_SIZE} byte limit", status=413
+        )
+    filename = get_valid_filename(filename.rsplit("/", 1)[-1].rsplit("\\", 1)[-1])
+    return ChunkedUpload.objects.create(
+        owner=owner, target=target, filename=filename[-100:] or "upload", size=size
+    )
+
+
+def receive_chunk(
+    upload: ChunkedUpload,
+    offset: int,
+    stream: BinaryIO,
+    length: int,
+    expected_sha256: Optional[str] = None,
+) -> ChunkedUpload:
+    """
+    Stream one chunk of the request body straight into storage, hashing it as it
+    goes. Chunks have to arrive in order: a chunk is only accepted at the offset the
+    upload has reached, so a client that lost track resumes from upload.received.
+
+    Args:
+        upload: The upload the chunk belongs to
+        offset: Byte offset of the chunk in the file
+        stream: The request body
+        length: Content length of the chunk
+        expected_sha256: Hex SHA-256 the client computed for the chunk, if any
+
+    Returns:
+        ChunkedUpload: The upload with received moved past the chunk
+    """
+    if upload.is_complete:
+        raise UploadError("Upload is already complete", status=409)
+    if offset != upload.received:
+        raise UploadError(f"Expected a chunk at offset {upload.received}", status=409)
+    if length <= 0:
+        raise UploadError("Empty chunk")
+    if length > settings.UPLOAD_CHUNK_SIZE or offset + length > upload.size:
+        raise UploadError("Chunk is too large", status=413)
+
+    reader: HashingReader = HashingReader(stream, length)
+    content: File = File(reader, name=upload.filename)
+    content.size = length
+    stored_name: str = default_storage.save(_part_name(upload, offset), content)
+
+    error: Optional[UploadError] = None
+    if reader.size != length:
+        error = UploadError(f"Chunk ended after {reader.size} of {length} bytes")
+    elif expected_sha256 and reader.sha256.hexdigest() != expected_sha256.lower():
+        error = UploadError("Chunk checksum mismatch")
+    elif not ChunkedUpload.objects.filter(pk=upload.pk, received=offset).update(
+        received=offset + length,
+        parts=upload.parts + [stored_name],
+        updated=timezone.now(),
+    ):
+        # Another request stored a chunk at this offset first
+        error = UploadError("Chunk was already received", status=409)
+    if error is not None:
+        default_storage.delete(stored_name)
+        raise error
+
+    upload.received = offset + length
+    upload.parts = upload.parts + [stored_name]
+    return upload
+
+
+def complete_upload(
+    upload: ChunkedUpload, expected_sha256: Optional[str] = None
+) -> ChunkedUpload:
+    """
+    Stream the chunks of a fully received upload into one file in the storage of
+    its target field, check that it is an image and drop the chunks.
+
+    Args:
+        upload: The upload to finish
+        expected_sha256: Hex SHA-256 of the whole file the client computed, if any
+
+    Returns:
+        ChunkedUpload: The upload with file and sha256 set
+    """
+    if upload.is_complete:
+        return upload
+    if upload.received != upload.size:
+        raise UploadError(
+            f"Only {upload.received} of {upload.size} bytes were received", status=409
+        )
+
+    _, _, directory = TARGETS[upload.target]
+    storage: Storage = target_storage(upload.target)
+    parts: PartsReader = PartsReader(default_storage, upload.parts)
+    reader: HashingReader = HashingReader(parts, upload.size)
+    content: File = File(reader, name=upload.filename)
+    content.size = upload.size
+    try:
+        name: str = storage.save(
+            f"{directory}/{upload.upload_id.hex[:12]}-{upload.filename}", content
+        )
+    finally:
+        parts.close()
+
+    try:
+        if reader.size != upload.size:
+            raise UploadError(
+                "Stored chunks do not add up to the upload size", status=409
+            )
+        if expected_sha256 and reader.sha256.hexdigest() != expected_sha256.lower():
+            raise UploadError("File checksum mismatch")
+        with storage.open(name, "rb") as f:
+            Image.open(f).verify()
+    except UploadError:
+        storage.delete(name)
+        raise
+    except Exception as e:
+        storage.delete(name)
+        raise UploadError("Image files only") from e
+
+    upload.file = name
+    upload.sha256 = reader.sha256.hexdigest()
+    upload.parts = []
+    upload.save(update_fields=["file", "sha256", "parts", "updated"])
+    delete_parts(upload)
+    logging.debug(f"Assembled upload {upload.upload_id} into {name}")
+    return upload
+
+
+def take_uploads(owner: Any, target: str, upload_ids: list[str]) -> list[str]:
+    """
+    Claim the finished uploads of a user for one target. The upload rows are
+    deleted, the caller stores the returned names on the target field.
+
+    Args:
+        owner: The user the uploads have to belong to
+        target: One of the ChunkedUpload targets
+        upload_ids: upload_id values sent with a form
+
+    Returns:
+        list[str]: Storage names of the assembled files, in the order given
+    """
+    ids: list[uuid.UUID] = []
+    for value in upload_ids:
+        try:
+            ids.append(uuid.UUID(value))
+        except ValueError:
+            logging.debug(f"Ignoring invalid upload id {value!r}")
+    if not ids:
+        return []
+
+    uploads: dict[uuid.UUID, ChunkedUpload] = {
+        upload.upload_id: upload
+        for upload in ChunkedUpload.objects.filter(
+            owner=owner, target=target, upload_id__in=ids
+        ).exclude(file="")
+    }
+    names: list[str] = []
+    for upload_id in ids:
+        upload: Optional[ChunkedUpload] = uploads.pop(upload_id, None)
+        if upload is not None:
+            names.append(upload.file)
+            upload.delete()
+    return names
+
+
+def attach_post_images(owner: Any, post: Post, upload_ids: list[str]) -> list[int]:
+    """
+    Add the finished gallery image uploads of a user to a post as pending images.
+
+    Args:
+        owner: The user the uploads have to belong to
+        post: The post the images are added to
+        upload_ids: upload_id values sent with the post form
+
+    Returns:
+        list[int]: Ids of the new Images rows, to be queued for processing
+    """
+    return [
+        Images.objects.create(post=post, image=name).pk
+        for name in take_uploads(owner, ChunkedUpload.POST_IMAGES, upload_ids)
+    ]
+
+
+def purge_stale_uploads() -> int:
+    """
+    Delete uploads untouched for longer than settings.UPLOAD_EXPIRY along with
+    their chunks and any assembled file that was never attached.
+
+    Returns:
+        int: Number of uploads deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_EXPIRY)
+    purged: int = 0
+    for upload in ChunkedUpload.objects.filter(updated__lt=cutoff).iterator():
+        delete_parts(upload)
+        if upload.file:
+            target_storage(upload.target).delete(upload.file)
+        upload.delete()
+        purged += 1
+    return purged
@@ -6,14 +6,20 @@ from . import views
 from .views import (
     AllLikeView,
     AllSaveView,
+    CommentRepliesView,
     LikeCommentView,
     LikeView,
     PostCreateView,
     PostDeleteView,
+    PostCommentsView,
     PostDetailView,
+    PostImagesView,
     PostListView,
     PostUpdateView,
     SaveView,
+    UploadChunkView,
+    UploadCompleteView,
+    UploadStartView,
     UserPostListView,
     posts_of_following_profiles,
 )
@@ -34,6 +40,16 @@ urlpatterns: List[Union[URLResolver, URLPattern]] = [
     path("post/save/", SaveView, name="post-save"),
     path("saved-posts/", AllSaveView, name="all-save"),
     path("post/comment/like/", LikeCommentView, name="comment-like"),
+    path("post/<int:pk>/comments/", PostCommentsView, name="post-comments"),
+    path("post/<int:pk>/images/", PostImagesView, name="post-images"),
+    path("post/comment/<int:pk>/replies/", CommentRepliesView, name="comment-replies"),
+    path("upload/", UploadStartView, name="upload-start"),
+    path("upload/<uuid:upload_id>/", UploadChunkView, name="upload-chunk"),
+    path(
+        "upload/<uuid:upload_id>/complete/",
+        UploadCompleteView,
+        name="upload-complete",
+    ),
     path("about/", views.about, name="blog-about"),
     path("search/", views.search, name="search"),
 ]
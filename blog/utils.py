@@ -1,6 +1,15 @@
+import random
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db.models import F, Max, Min, Model
 from django.http import HttpRequest
 from users.models import Profile
 
+from blog.models import Comment
+
 RELATIONSHIP_BLOCKLIST: list[str] = ["single_male", "single_female"]
 
 
@@ -17,6 +26,20 @@ def is_ajax(request: HttpRequest) -> bool:
     return request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest"
 
 
+def wants_json(request: HttpRequest) -> bool:
+    """
+    Whether the client asked for the compact JSON state of an endpoint instead
+    of a re-rendered HTML fragment.
+
+    Args:
+        request (request)
+
+    Returns:
+        bool: True when format=json was sent
+    """
+    return request.POST.get("format", request.GET.get("format")) == "json"
+
+
 def is_user_verified(userobj: Profile) -> bool:
     if userobj.verified or userobj.user.is_staff:
         return True
@@ -38,3 +61,128 @@ def handle_uploaded_file(filedata, dest_filepath: str) -> None:
     with open(dest_filepath, "wb+") as destination:
         for chunk in filedata.chunks():
             destination.write(chunk)
+
+
+def adjust_counter(instance: Model, field: str, delta: int) -> None:
+    """
+    Atomically add delta to a denormalized counter column and refresh it on instance.
+
+    Args:
+        instance: Row holding the counter
+        field: Name of the counter column
+        delta: Amount to add, negative to decrement
+    """
+    type(instance).objects.filter(pk=instance.pk).update(**{field: F(field) + delta})
+    instance.refresh_from_db(fields=[field])
+
+
+def toggle_relation(manager: Any, user: User) -> bool:
+    """
+    Add user to a many to many relation, or remove them when already present,
+    with one DELETE and at most one INSERT on the through table.
+
+    Args:
+        manager: The related manager, e.g. post.likes
+        user: The user to toggle
+
+    Returns:
+        bool: Whether the user is in the relation afterwards
+    """
+    lookup: dict[str, Any] = {
+        manager.source_field_name: manager.instance,
+        manager.target_field_name: user,
+    }
+    deleted, _ = manager.through.objects.filter(**lookup).delete()
+    if deleted:
+        return False
+    manager.through.objects.create(**lookup)
+    return True
+
+
+def liked_comment_ids(
+    viewer: User | AnonymousUser, comment_ids: Iterable[int]
+) -> set[int]:
+    """
+    Resolve which of the given comments the viewer has liked with a single query.
+
+    Args:
+        viewer: The user looking at the comments
+        comment_ids: Comment ids, or a queryset of them which is used as a subquery
+
+    Returns:
+        set[int]: Ids of the comments the viewer has liked
+    """
+    if not viewer.is_authenticated:
+        return set()
+    return set(
+        Comment.likes.through.objects.filter(
+            user_id=viewer.id, comment_id__in=comment_ids
+        ).values_list("comment_id", flat=True)
+    )
+
+
+def viewer_state_key(ids: Iterable[int]) -> str:
+    """
+    Compact, order independent cache key part for the viewer's liked comments.
+
+    Args:
+        ids: Ids of the comments in a fragment the viewer has liked
+
+    Returns:
+        str: The sorted ids joined by commas
+    """
+    return ",".join(str(pk) for pk in sorted(ids))
+
+
+USER_ID_BOUNDS_CACHE_KEY: str = "blog:user-id-bounds"
+
+
+def _user_id_bounds() -> Optional[tuple[int, int]]:
+    bounds: Optional[tuple[int, int]] = cache.get(USER_ID_BOUNDS_CACHE_KEY)
+    if bounds is None:
+        aggregate = User.objects.aggregate(low=Min("id"), high=Max("id"))
+        if aggregate["low"] is None:
+            return None
+        bounds = (aggregate["low"], aggregate["high"])
+        cache.set(USER_ID_BOUNDS_CACHE_KEY, bounds, settings.USER_ID_BOUNDS_TTL)
+    return bounds
+
+
+def random_users_to_follow(viewer: User, count: int) -> list[User]:
+    """
+    Pick up to count random users the viewer does not follow yet. Each pick is a
+    single primary key index probe from a random id, so neither time nor memory
+    grows with the number of users.
+
+    Args:
+        viewer: The user the suggestions are for
+        count: Number of users wanted
+
+    Returns:
+        list[User]: The suggested users, fewer when not enough candidates exist
+    """
+    bounds: Optional[tuple[int, int]] = _user_id_bounds()
+    if bounds is None:
+        return []
+
+    candidates = User.objects.exclude(pk=viewer.pk).exclude(
+        pk__in=Profile.following.through.objects.filter(profile__user=viewer).values(
+            "user_id"
+        )
+    )
+    picked: set[int] = set()
+    for _ in range(count):
+        start: int = random.randint(*bounds)
+        remaining = candidates.exclude(pk__in=picked).order_by("pk")
+        # First candidate at or after the random id, wrapping around to the lowest
+        pk: Optional[int] = (
+            remaining.filter(pk__gte=start).values_list("pk", flat=True).first()
+            or remaining.values_list("pk", flat=True).first()
+        )
+        if pk is None:
+            break
+        picked.add(pk)
+
+    users: list[User] = list(User.objects.filter(pk__in=picked))
+    random.shuffle(users)
+    return users
@@ -0,0 +1,83 @@
+import io
+import logging
+import os
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps
+
+# Best compressing format first, browsers use the first <source> they support
+VARIANT_FORMATS: dict[str, str] = {"avif": "AVIF", "webp": "WEBP"}
+
+
+def supported_formats() -> list[str]:
+    Image.init()
+    return [
+        ext for ext, pil_format in VARIANT_FORMATS.items() if pil_format in Image.SAVE
+    ]
+
+
+def variant_name(source_name: str, width: int, ext: str) -> str:
+    root, _ = os.path.splitext(source_name)
+    return f"{root}_{width}w.{ext}"
+
+
+def generate_variants(image_file: FieldFile) -> dict[str, Any]:
+    """
+    Write resized WebP (and AVIF, when Pillow can encode it) copies of an image
+    next to it in the same storage, one per configured width not wider than
+    the original.
+
+    Args:
+        image_file: The stored original
+
+    Returns:
+        dict[str, Any]: The source name and, per format, [width, name] pairs,
+        ready to be stored in the model's variants field
+    """
+    storage = image_file.storage
+    with image_file.open("rb") as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+
+    widths: list[int] = [
+        width for width in settings.IMAGE_VARIANT_WIDTHS if width <= original.width
+    ] or [original.width]
+
+    files: dict[str, list[list[Any]]] = {}
+    for ext in supported_formats():
+        files[ext] = []
+        for width in widths:
+            height: int = max(1, round(original.height * width / original.width))
+            buffer = io.BytesIO()
+            original.resize((width, height), Image.LANCZOS).save(
+                buffer,
+                format=VARIANT_FORMATS[ext],
+                quality=settings.IMAGE_VARIANT_QUALITY,
+            )
+            name: str = variant_name(image_file.name, width, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            files[ext].append(
+                [width, storage.save(name, ContentFile(buffer.getvalue()))]
+            )
+    logging.debug(
+        f"Generated {sum(map(len, files.values()))} variants of {image_file.name}"
+    )
+    return {"source": image_file.name, "files": files}
+
+
+def delete_variants(image_file: FieldFile, variants: Optional[dict[str, Any]]) -> None:
+    for pairs in (variants or {}).get("files", {}).values():
+        for _, name in pairs:
+            image_file.storage.delete(name)
+
+
+def variants_are_current(
+    image_file: FieldFile, variants: Optional[dict[str, Any]]
+) -> bool:
+    return bool(variants) and variants.get("source") == image_file.name
@@ -1,15 +1,14 @@
 import logging
-import random
-from itertools import chain
 from typing import Any, Dict, List, Optional, Sequence, Union
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import User
 from django.core.exceptions import SuspiciousOperation
 from django.core.files.uploadedfile import UploadedFile
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Model, Q
+from django.db import transaction
+from django.db.models import F, Model, QuerySet
 from django.db.models.manager import BaseManager
 from django.forms import BaseModelForm
 from django.http import (
@@ -22,15 +21,42 @@ from django.http import (
 from django.shortcuts import get_object_or_404, redirect, render, render_to_response
 from django.template import RequestContext
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
-from blog.utils import can_user_see_images, is_ajax, is_user_verified
-from events.models import Event
+from blog.cards import card_queryset, load_post_cards
+from blog.feed import get_feed_posts
+from blog.fragments import (
+    adjust_post_counter,
+    bump_fragment_version,
+    prepare_post_cards,
+)
+from blog.images import enqueue_image_processing
+from blog.pagination import CursorPage, CursorPaginationMixin, paginate_by_cursor
+from blog.search import SearchPage, search_documents
+from blog.threads import comment_section_context, load_more_replies
+from blog.trending import record_engagement, trending_posts
+from blog.uploads import (
+    UploadError,
+    attach_post_images,
+    complete_upload,
+    receive_chunk,
+    start_upload,
+    take_uploads,
+)
+from blog.utils import (
+    adjust_counter,
+    is_ajax,
+    liked_comment_ids,
+    random_users_to_follow,
+    toggle_relation,
+    wants_json,
+)
 from notification.models import Notification
 from users.models import Profile
 
 from .forms import CommentForm, CreateUpdatePostForm
-from .models import Comment, Images, Post
+from .models import ChunkedUpload, Comment, Images, Post, SearchDocument
 
 
 def handler500(request: HttpRequest, *args, **argv) -> HttpResponse:
@@ -45,8 +71,7 @@ def handler500(request: HttpRequest, *args, **argv) -> HttpResponse:
 def first(request: HttpRequest) -> HttpResponse:
     context: dict[str, BaseManager[Post]] = {"posts": Post.objects.all()}
     if request.user.is_authenticated:
-        userobj: Profile = Profile.objects.get(id=request.user.id)
-        if not is_user_verified(userobj):
+        if not request.viewer.is_verified:
             return redirect("profile")
 
     return render(request, "blog/first.html", context)
@@ -57,56 +82,48 @@ def first(request: HttpRequest) -> HttpResponse:
 
 @login_required
 def posts_of_following_profiles(request: HttpRequest) -> HttpResponse:
-    profile: Profile = Profile.objects.get(user=request.user)
-
-    if not is_user_verified(profile):
+    if not request.viewer.is_verified:
         return redirect("profile")
+    profile: Profile = request.viewer.profile
 
-    users: list[User] = [user for user in profile.following.all()]
-    posts: list[Post] = []
-    qs: Optional[str] = None
-    for u in users:
-        p: Profile = Profile.objects.get(user=u)
-        p_posts = p.user.post_set.all()
-        posts.append(p_posts)
-    my_posts = profile.profile_posts()
-    posts.append(my_posts)
-    if len(posts) > 0:
-        qs = sorted(chain(*posts), reverse=True, key=lambda obj: obj.date_posted)
-
-    paginator: Paginator = Paginator(qs, 5)
-    page = request.GET.get("page")
-    try:
-        posts_list = paginator.page(page)
-    except PageNotAnInteger:
-        posts_list = paginator.page(1)
-    except EmptyPage:
-        posts_list = paginator.page(paginator.num_pages)
+    qs: QuerySet[Post] = get_feed_posts(request.user)
+    posts_list: CursorPage = paginate_by_cursor(
+        request, qs, 5, date_field="feed_date_posted", id_field="feed_post_id"
+    )
 
-    return render(request, "blog/feeds.html", {"profile": profile, "posts": posts_list})
+    context: dict[str, Any] = {
+        "profile": profile,
+        "posts": posts_list,
+        "liked_comment_ids": prepare_post_cards(request.user, posts_list),
+    }
+    return render(request, "blog/feeds.html", context)
 
 
 """ Post Like """
 
 
 @login_required
-def LikeView(request: HttpRequest) -> Optional[JsonResponse]:
-    post: Post = get_object_or_404(Post, id=request.POST.get("id"))
-    liked: bool = False
-    if post.likes.filter(id=request.user.id).exists():
-        post.likes.remove(request.user)
-        liked = False
-        notify: BaseManager[Notification] = Notification.objects.filter(
-            post=post, sender=request.user, notification_type=1
+def LikeView(request: HttpRequest) -> Union[JsonResponse, HttpResponseRedirect]:
+    with transaction.atomic():
+        post: Post = get_object_or_404(
+            Post.objects.select_for_update(), id=request.POST.get("id")
         )
-        notify.delete()
-    else:
-        post.likes.add(request.user)
-        liked = True
-        notification = Notification(
-            post=post, sender=request.user, user=post.author, notification_type=1
-        )
-        notification.save()
+        liked: bool = toggle_relation(post.likes, request.user)
+        adjust_post_counter(post, "like_count", 1 if liked else -1)
+        if liked:
+            notification = Notification(
+                post=post, sender=request.user, user=post.author, notification_type=1
+            )
+            notification.save()
+        else:
+            notify: BaseManager[Notification] = Notification.objects.filter(
+                post=post, sender=request.user, notification_type=1
+            )
+            notify.delete()
+    record_engagement(post.pk, "like", 1 if liked else -1)
+
+    if wants_json(request):
+        return JsonResponse({"liked": liked, "count": post.like_count})
 
     context: Dict[str, Any] = {
         "post": post,
@@ -117,21 +134,23 @@ def LikeView(request: HttpRequest) -> Optional[JsonResponse]:
     if is_ajax(request=request):
         html: str = render_to_string("blog/like_section.html", context, request=request)
         return JsonResponse({"form": html})
+    return redirect("post-detail", pk=post.pk)
 
 
 """ Post save """
 
 
 @login_required
-def SaveView(request: HttpRequest) -> Optional[JsonResponse]:
-    post: Post = get_object_or_404(Post, id=request.POST.get("id"))
-    saved: bool = False
-    if post.saves.filter(id=request.user.id).exists():
-        post.saves.remove(request.user)
-        saved = False
-    else:
-        post.saves.add(request.user)
-        saved = True
+def SaveView(request: HttpRequest) -> Union[JsonResponse, HttpResponseRedirect]:
+    with transaction.atomic():
+        post: Post = get_object_or_404(
+            Post.objects.select_for_update(), id=request.POST.get("id")
+        )
+        saved: bool = toggle_relation(post.saves, request.user)
+        adjust_post_counter(post, "save_count", 1 if saved else -1)
+
+    if wants_json(request):
+        return JsonResponse({"saved": saved, "count": post.save_count})
 
     context: Dict[str, Any] = {
         "post": post,
@@ -142,84 +161,120 @@ def SaveView(request: HttpRequest) -> Optional[JsonResponse]:
     if is_ajax(request=request):
         html: str = render_to_string("blog/save_section.html", context, request=request)
         return JsonResponse({"form": html})
+    return redirect("post-detail", pk=post.pk)
 
 
 """ Like post comments """
 
 
 @login_required
-def LikeCommentView(request: HttpRequest) -> Optional[JsonResponse]:
-    # , id1, id2              id1=post.pk id2=reply.pk
+def LikeCommentView(request: HttpRequest) -> Union[JsonResponse, HttpResponseRedirect]:
     comment_pk = request.POST.get("comment_pk")
-    post_pk = request.POST.get("post_pk")
     logging.debug(f"{comment_pk=}")
-    logging.debug(f"{post_pk=}")
-    post: Comment = Comment.objects.get(pk=comment_pk)
-    # post: Comment = get_object_or_404(Comment, pk=comment_pk)
-    cliked: bool = False
-    if post.likes.filter(id=request.user.id).exists():
-        post.likes.remove(request.user)
-        cliked = False
-    else:
-        post.likes.add(request.user)
-        cliked = True
-
-    cpost: Post = get_object_or_404(Post, pk=post_pk)
-    total_comments2 = cpost.comments.all().order_by("-id")
-    total_comments = cpost.comments.all().filter(reply=None).order_by("-id")
-    tcl = {}
-    for cmt in total_comments2:
-        total_clikes = cmt.total_clikes()  # noqa: F841
-        cliked = False
-        if cmt.likes.filter(id=request.user.id).exists():
-            cliked = True
+    with transaction.atomic():
+        comment: Comment = get_object_or_404(
+            Comment.objects.select_for_update(), pk=comment_pk
+        )
+        cliked: bool = toggle_relation(comment.likes, request.user)
+        adjust_counter(comment, "like_count", 1 if cliked else -1)
+        bump_fragment_version(comment.post_id)
 
-        tcl[cmt.id] = cliked
+    if wants_json(request):
+        return JsonResponse(
+            {"liked": cliked, "count": comment.like_count, "comment": comment.pk}
+        )
 
-    context: dict[str, Any] = {
-        "comment_form": CommentForm(),
-        "post": cpost,
-        "comments": total_comments,
-        "total_clikes": post.total_clikes(),
-        "clikes": tcl,
-    }
+    cpost: Post = get_object_or_404(Post, pk=comment.post_id)
+    context: dict[str, Any] = comment_section_context(request.user, cpost)
+    context["comment_form"] = CommentForm()
+    context["total_clikes"] = comment.total_clikes()
 
     if is_ajax(request=request):
         html: str = render_to_string("blog/comments.html", context, request=request)
         return JsonResponse({"form": html})
+    return redirect("post-detail", pk=cpost.pk)
+
+
+""" Load older top level comments of a post """
+
+
+@login_required
+def PostCommentsView(request: HttpRequest, pk: int) -> JsonResponse:
+    post: Post = get_object_or_404(Post, pk=pk)
+    try:
+        before: Optional[int] = int(request.GET.get("before", ""))
+    except ValueError:
+        before = None
+
+    context: dict[str, Any] = comment_section_context(request.user, post, before=before)
+    html: str = render_to_string("blog/comment_list.html", context, request=request)
+    return JsonResponse({"form": html})
+
+
+""" Load more replies to a comment """
+
+
+@login_required
+def CommentRepliesView(request: HttpRequest, pk: int) -> JsonResponse:
+    parent: Comment = get_object_or_404(Comment, pk=pk)
+    try:
+        after: int = int(request.GET.get("after", ""))
+    except ValueError:
+        after = 0
+
+    replies, replies_cursor = load_more_replies(parent, after=after)
+    context: dict[str, Any] = {
+        "replies": replies,
+        "parent": parent,
+        "replies_cursor": replies_cursor,
+        "liked_comment_ids": liked_comment_ids(
+            request.user, [reply.pk for reply in replies]
+        ),
+    }
+    html: str = render_to_string("blog/comment_replies.html", context, request=request)
+    return JsonResponse({"form": html})
 
 
 """ Home page with all posts """
 
 
-class PostListView(LoginRequiredMixin, ListView):
+class PostListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Post
     template_name: str = "blog/home.html"
     context_object_name: Optional[str] = "posts"
     ordering: Sequence[str] = ["-date_posted"]
     paginate_by: int = 5
 
+    def get_queryset(self) -> QuerySet[Post]:
+        return card_queryset(super().get_queryset())
+
+    def is_ranked(self) -> bool:
+        return self.request.GET.get("sort") == "top"
+
+    def get_cursor_date_field(self) -> str:
+        # The top feed pages through the score index instead of the date index
+        return "score" if self.is_ranked() else self.cursor_date_field
+
     def get_context_data(self, *args, **kwargs) -> Dict[str, Any]:
         context: Dict[str, Any] = super(PostListView, self).get_context_data()
-        users: List[User] = list(User.objects.exclude(pk=self.request.user.pk))
-
-        if len(users) > 3:
-            cnt: int = 3
-        else:
-            cnt = len(users)
-        random_users: list[User] = random.sample(users, cnt)
-        context["random_users"] = random_users
+        context["ranked"] = self.is_ranked()
+        context["cursor_query"] = "sort=top&" if context["ranked"] else ""
+        context["trending_posts"] = trending_posts()
+        context["random_users"] = random_users_to_follow(
+            self.request.user, settings.FOLLOW_SUGGESTIONS
+        )
+        context["liked_comment_ids"] = prepare_post_cards(
+            self.request.user, context["posts"]
+        )
         return context
 
     def render_to_response(
         self, context, **response_kwargs
     ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)
-
-        if not is_user_verified(userobj):
+        if not self.request.viewer.is_verified:
             return redirect("profile")
 
-        context["render_images"] = can_user_see_images(userobj)
+        context["render_images"] = self.request.viewer.can_see_images
 
         return super(PostListView, self).render_to_response(context)
 
@@ -227,7 +282,7 @@ class PostListView(LoginRequiredMixin, ListView):
 """ All the posts of the user """
 
 
-class UserPostListView(LoginRequiredMixin, ListView):
+class UserPostListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Post
     template_name: str = "blog/user_posts.html"
     context_object_name: str = "posts"
@@ -235,17 +290,24 @@ class UserPostListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self) -> BaseManager[Post]:
         user: User = get_object_or_404(User, username=self.kwargs.get("username"))
-        return Post.objects.filter(author=user).order_by("-date_posted")
+        return card_queryset(Post.objects.filter(author=user)).order_by(
+            "-date_posted"
+        )
+
+    def get_context_data(self, *args, **kwargs) -> Dict[str, Any]:
+        context: Dict[str, Any] = super(UserPostListView, self).get_context_data()
+        context["liked_comment_ids"] = prepare_post_cards(
+            self.request.user, context["posts"]
+        )
+        return context
 
     def render_to_response(
         self, context, **response_kwargs
     ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)
-
-        if not is_user_verified(userobj):
+        if not self.request.viewer.is_verified:
             return redirect("profile")
 
-        context["render_images"] = can_user_see_images(userobj)
+        context["render_images"] = self.request.viewer.can_see_images
 
         return super(UserPostListView, self).render_to_response(context)
 
@@ -255,18 +317,15 @@ class UserPostListView(LoginRequiredMixin, ListView):
 
 @login_required
 def PostDetailView(request: HttpRequest, pk: str) -> Union[JsonResponse, HttpResponse]:
-    userobj: Profile = Profile.objects.get(id=request.user.id)
-
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         return redirect("profile")
 
-    stuff: Post = get_object_or_404(Post, id=pk)
+    stuff: Post = get_object_or_404(
+        Post.objects.select_related("author__profile"), id=pk
+    )
     total_likes: int = stuff.total_likes()
     total_saves: int = stuff.total_saves()
-    total_comments = stuff.comments.all().filter(reply=None).order_by("-id")
-    total_comments2 = stuff.comments.all().order_by("-id")
-
-    context = {}
+    context: dict[str, Any] = {}
 
     if request.method == "POST":
         comment_qs = None
@@ -275,18 +334,22 @@ def PostDetailView(request: HttpRequest, pk: str) -> Union[JsonResponse, HttpRes
             is_reply: bool = False
             form = request.POST.get("body")
             reply_id = request.POST.get("comment_id")
-            if reply_id:
-                comment_qs: Comment = Comment.objects.get(id=reply_id)
-                is_reply = True
-
-            comment: Comment = Comment.objects.create(
-                name=request.user,
-                post=stuff,
-                body=form,
-                reply=comment_qs,
-                is_reply=is_reply,
-            )
-            comment.save()
+            with transaction.atomic():
+                if reply_id:
+                    comment_qs: Comment = Comment.objects.get(id=reply_id)
+                    is_reply = True
+
+                comment: Comment = Comment.objects.create(
+                    name=request.user,
+                    post=stuff,
+                    body=form,
+                    reply=comment_qs,
+                    is_reply=is_reply,
+                )
+                adjust_post_counter(stuff, "comment_count", 1)
+                if comment_qs:
+                    adjust_counter(comment_qs, "reply_count", 1)
+            record_engagement(stuff.pk, "comment")
             if reply_id:
                 notify: Notification = Notification(
                     post=stuff,
@@ -305,20 +368,10 @@ def PostDetailView(request: HttpRequest, pk: str) -> Union[JsonResponse, HttpRes
                     notification_type=3,
                 )
                 notify.save()
-            total_comments = stuff.comments.all().filter(reply=None).order_by("-id")
-            total_comments2 = stuff.comments.all().order_by("-id")
     else:
         comment_form = CommentForm()
 
-    tcl = {}
-    for cmt in total_comments2:
-        total_clikes = cmt.total_clikes()  # noqa: F841
-        cliked: bool = False
-        if cmt.likes.filter(id=request.user.id).exists():
-            cliked = True
-
-        tcl[cmt.id] = cliked
-    context["clikes"] = tcl
+    context.update(comment_section_context(request.user, stuff))
 
     liked: bool = False
     if stuff.likes.filter(id=request.user.id).exists():
@@ -334,10 +387,7 @@ def PostDetailView(request: HttpRequest, pk: str) -> Union[JsonResponse, HttpRes
 
     context["comment_form"] = comment_form
 
-    context["post"] = stuff
-    context["comments"] = total_comments
-
-    context["render_images"] = can_user_see_images(userobj)
+    context["render_images"] = request.viewer.can_see_images
 
     if is_ajax(request=request):
         html: str = render_to_string("blog/comments.html", context, request=request)
@@ -360,7 +410,15 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         form.instance.author = self.request.user
         post: Post = form.instance
         if form.is_valid():
+            cover: list[str] = take_uploads(
+                request.user,
+                ChunkedUpload.POST_IMAGE,
+                request.POST.getlist("image_upload_id"),
+            )
+            if cover:
+                post.image = cover[0]
             post.save()
+            image_ids: list[int] = []
             for f in files:
                 logging.debug(f"Creating image {f}")
                 img: Images = Images(image=f, post=post)
@@ -368,6 +426,11 @@ class PostCreateView(LoginRequiredMixin, CreateView):
                     img.save()
                 except Exception as e:
                     raise SuspiciousOperation("Image submission failed") from e
+                image_ids.append(img.pk)
+            image_ids += attach_post_images(
+                request.user, post, request.POST.getlist("upload_ids")
+            )
+            enqueue_image_processing(image_ids)
 
             return self.form_valid(form)
         else:
@@ -376,9 +439,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     def render_to_response(
         self, context, **response_kwargs
     ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)
-
-        if not is_user_verified(userobj):
+        if not self.request.viewer.is_verified:
             return redirect("profile")
 
         return super(PostCreateView, self).render_to_response(context)
@@ -408,11 +469,24 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         form.instance.author = self.request.user
         post: Post = form.instance
         if form.is_valid():
+            cover: list[str] = take_uploads(
+                request.user,
+                ChunkedUpload.POST_IMAGE,
+                request.POST.getlist("image_upload_id"),
+            )
+            if cover:
+                post.image = cover[0]
             post.save()
+            image_ids: list[int] = []
             for f in files:
                 logging.debug(f"Creating image {f}")
                 img: Images = Images(image=f, post=post)
                 img.save()
+                image_ids.append(img.pk)
+            image_ids += attach_post_images(
+                request.user, post, request.POST.getlist("upload_ids")
+            )
+            enqueue_image_processing(image_ids)
 
             return self.form_valid(form)
         else:
@@ -421,14 +495,112 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     def render_to_response(
         self, context, **response_kwargs
     ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)
-
-        if not is_user_verified(userobj):
+        if not self.request.viewer.is_verified:
             return redirect("profile")
 
         return super(PostUpdateView, self).render_to_response(context)
 
 
+""" Image processing progress of a post """
+
+
+@login_required
+def PostImagesView(request: HttpRequest, pk: int) -> JsonResponse:
+    post: Post = get_object_or_404(Post, pk=pk)
+    if not request.viewer.can_see_images:
+        return JsonResponse({"form": ""}, status=403)
+
+    html: str = render_to_string(
+        "blog/post_image_section.html", {"post": post}, request=request
+    )
+    return JsonResponse({"form": html})
+
+
+""" Chunked uploads """
+
+
+def _upload_state(upload: ChunkedUpload) -> dict[str, Any]:
+    return {
+        "upload_id": str(upload.upload_id),
+        "size": upload.size,
+        "received": upload.received,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        "complete": upload.is_complete,
+        "sha256": upload.sha256,
+    }
+
+
+@login_required
+def UploadStartView(request: HttpRequest) -> JsonResponse:
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    target: str = request.POST.get("target", ChunkedUpload.POST_IMAGES)
+    if not request.viewer.is_verified or (
+        target == ChunkedUpload.EVENT_POSTER and not request.user.is_staff
+    ):
+        return JsonResponse({"error": "Not allowed to upload"}, status=403)
+
+    try:
+        size: int = int(request.POST.get("size", ""))
+    except ValueError:
+        return JsonResponse({"error": "size must be a number of bytes"}, status=400)
+    try:
+        upload: ChunkedUpload = start_upload(
+            request.user, target, request.POST.get("filename", ""), size
+        )
+    except UploadError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@login_required
+def UploadChunkView(request: HttpRequest, upload_id: str) -> JsonResponse:
+    """
+    GET reports how far an upload got so an interrupted client can resume.
+    PUT appends the request body at ?offset=, optionally checked against the hex
+    SHA-256 in the X-Chunk-SHA256 header.
+    """
+    upload: ChunkedUpload = get_object_or_404(
+        ChunkedUpload, upload_id=upload_id, owner=request.user
+    )
+    if request.method == "GET":
+        return JsonResponse(_upload_state(upload))
+    if request.method != "PUT":
+        return JsonResponse({"error": "GET or PUT required"}, status=405)
+
+    try:
+        offset: int = int(request.GET.get("offset", ""))
+        length: int = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return JsonResponse({"error": "offset must be a number of bytes"}, status=400)
+    try:
+        receive_chunk(
+            upload, offset, request, length, request.headers.get("X-Chunk-SHA256")
+        )
+    except UploadError as e:
+        upload.refresh_from_db()
+        return JsonResponse(
+            {"error": e.message, **_upload_state(upload)}, status=e.status
+        )
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+def UploadCompleteView(request: HttpRequest, upload_id: str) -> JsonResponse:
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    upload: ChunkedUpload = get_object_or_404(
+        ChunkedUpload, upload_id=upload_id, owner=request.user
+    )
+    try:
+        complete_upload(upload, request.POST.get("sha256"))
+    except UploadError as e:
+        return JsonResponse(
+            {"error": e.message, **_upload_state(upload)}, status=e.status
+        )
+    return JsonResponse(_upload_state(upload))
+
+
 """ Delete post """
 
 
@@ -445,9 +617,7 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def render_to_response(
         self, context, **response_kwargs
     ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)
-
-        if not is_user_verified(userobj):
+        if not self.request.viewer.is_verified:
             return redirect("profile")
 
         return super(PostDeleteView, self).render_to_response(context)
@@ -465,31 +635,28 @@ def about(request) -> HttpResponse:
 
 @login_required
 def search(request) -> HttpResponse:
-    userobj: Profile = Profile.objects.get(id=request.user.id)
-
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         return redirect("profile")
 
-    query = request.GET["query"]
-    query_results = {}
-    if len(query) >= 150 or len(query) < 1:
-        query_results["posts"] = Post.objects.none()
-    elif len(query.strip()) == 0:
-        query_results["posts"] = Post.objects.none()
-    else:
-        allpostsTitle: BaseManager[Post] = Post.objects.filter(title__icontains=query)
-        allpostsAuthor: BaseManager[Post] = Post.objects.filter(author__username=query)
-        query_results["posts"] = allpostsAuthor.union(allpostsTitle)
-
-        query_results["profiles"] = Profile.objects.filter(
-            Q(user__username__icontains=query)
-            | Q(user__first_name__icontains=query)
-            | Q(user__last_name__icontains=query)
-        )
-
-        query_results["events"] = Event.objects.filter(event_name__icontains=query)
-
-    params: dict[str, BaseManager[Post]] = {"query_results": query_results}
+    query: str = request.GET.get("query", "")[:150]
+    query_results: dict[str, SearchPage] = {}
+    for kind, param in (
+        (SearchDocument.POST, "posts"),
+        (SearchDocument.PROFILE, "profiles"),
+        (SearchDocument.EVENT, "events"),
+    ):
+        try:
+            page: int = int(request.GET.get(f"{param}_page", 1))
+        except ValueError:
+            page = 1
+        query_results[param] = search_documents(query, kind, page)
+    load_post_cards(query_results["posts"])
+
+    params: dict[str, Any] = {
+        "query": query,
+        "query_results": query_results,
+        "curr_dt": timezone.now(),
+    }
     return render(request, "blog/search_results.html", params)
 
 
@@ -498,14 +665,25 @@ def search(request) -> HttpResponse:
 
 @login_required
 def AllLikeView(request) -> HttpResponse:
-    userobj: Profile = Profile.objects.get(id=request.user.id)
-
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         return redirect("profile")
 
     user = request.user
-    liked_posts = user.blogpost.all()
-    context: dict[str, Any] = {"liked_posts": liked_posts}
+    # Most recently liked first, read off the like entries' (user, created) index
+    liked_posts: CursorPage = paginate_by_cursor(
+        request,
+        card_queryset(Post.objects.filter(like_entries__user=user)).annotate(
+            liked_at=F("like_entries__created"), like_id=F("like_entries__id")
+        ),
+        5,
+        date_field="liked_at",
+        id_field="like_id",
+    )
+    context: dict[str, Any] = {
+        "liked_posts": liked_posts,
+        "page_obj": liked_posts,
+        "liked_comment_ids": prepare_post_cards(user, liked_posts),
+    }
     return render(request, "blog/liked_posts.html", context)
 
 
@@ -514,12 +692,23 @@ def AllLikeView(request) -> HttpResponse:
 
 @login_required
 def AllSaveView(request) -> HttpResponse:
-    userobj: Profile = Profile.objects.get(id=request.user.id)
-
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         return redirect("profile")
 
     user = request.user
-    saved_posts = user.blogsave.all()
-    context: dict[str, Any] = {"saved_posts": saved_posts}
+    # Most recently saved first, read off the save entries' (user, created) index
+    saved_posts: CursorPage = paginate_by_cursor(
+        request,
+        card_queryset(Post.objects.filter(save_entries__user=user)).annotate(
+            saved_at=F("save_entries__created"), save_id=F("save_entries__id")
+        ),
+        5,
+        date_field="saved_at",
+        id_field="save_id",
+    )
+    context: dict[str, Any] = {
+        "saved_posts": saved_posts,
+        "page_obj": saved_posts,
+        "liked_comment_ids": prepare_post_cards(user, saved_posts),
+    }
     return render(request, "blog/saved_posts.html", context)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ChatConfig(AppConfig):
     name: str = "chat"
+
+    def ready(self) -> None:
+        import chat.signals  # noqa: F401
@@ -1,36 +1,70 @@
+import asyncio
 import json
+import logging
+import signal
+from typing import Optional
 
-from asgiref.sync import async_to_sync, sync_to_async  # noqa: F401
+from asgiref.sync import sync_to_async
+from channels.consumer import AsyncConsumer
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.db.models import Q
 
+from chat.history import history_page, serialize_message
 from chat.models import Chat, Room, Shout, ShoutBox
+from chat.persistence import (
+    RETRYABLE_ERRORS,
+    chat_message,
+    persist,
+    room_seen,
+    shout_message,
+    store_batch,
+    store_each,
+)
+from chat.unread import recipient_id
+from users.viewer import Viewer
 
-"""MESSAGE DB ENTRY"""
+"""CONNECTION LOOKUPS"""
 
 
 @sync_to_async
-def create_new_message(me, friend, message, room_id) -> Chat:
-    get_room: Room = Room.objects.filter(room_id=room_id)[0]
-    author_user: User = User.objects.filter(username=me)[0]
-    friend_user: User = User.objects.filter(username=friend)[0]
-    new_chat: Chat = Chat.objects.create(
-        author=author_user, friend=friend_user, room_id=get_room, text=message
+def find_member_room(room_id, user) -> Optional[Room]:
+    if not user.is_authenticated or not str(room_id).isdigit():
+        return None
+    return Room.objects.filter(Q(author=user) | Q(friend=user), room_id=room_id).first()
+
+
+@sync_to_async
+def find_member_shoutbox(shoutbox_id, user) -> Optional[ShoutBox]:
+    if not user.is_authenticated or not str(shoutbox_id).isdigit():
+        return None
+    return (
+        ShoutBox.objects.filter(
+            Q(author=user) | Q(participants=user), shoutbox_id=shoutbox_id
+        )
+        .distinct()
+        .first()
     )
-    return new_chat
 
 
-"""SHOUT DB ENTRY"""
+@sync_to_async
+def profile_image_url(user) -> str:
+    return Viewer(user).image_url
+
+
+"""OLDER MESSAGES"""
 
 
 @sync_to_async
-def create_new_shout(me, message, shoutbox_id) -> Shout:
-    shoutbox: ShoutBox = ShoutBox.objects.filter(shoutbox_id=shoutbox_id)[0]
-    author_user: User = User.objects.filter(username=me)[0]
-    new_shout: Shout = Shout.objects.create(
-        author=author_user, shoutbox=shoutbox, text=message
-    )
-    return new_shout
+def load_history(queryset, cursor) -> dict:
+    page = history_page(queryset, cursor)
+    return {
+        "type": "history",
+        # Oldest first, the order they are shown in
+        "messages": [serialize_message(message) for message in reversed(page)],
+        "cursor": page.next_cursor,
+    }
 
 
 class ChatRoomConsumer(AsyncWebsocketConsumer):
@@ -40,6 +74,15 @@ class ChatRoomConsumer(AsyncWebsocketConsumer):
         self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
         self.room_group_name = "chat_%s" % self.room_name
 
+        # Resolved once for the connection, messages need no lookups
+        self.user = self.scope["user"]
+        self.room: Optional[Room] = await find_member_room(self.room_name, self.user)
+        if self.room is None:
+            await self.close()
+            return
+        self.friend_id: int = recipient_id(self.room, self.user.pk)
+        self.user_image: str = await profile_image_url(self.user)
+
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
         await self.accept()
@@ -53,40 +96,48 @@ class ChatRoomConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
-        message = text_data_json["message"]
-        username = text_data_json["username"]
-        user_image = text_data_json["user_image"]
+        if text_data_json.get("type") == "history":
+            # Membership was checked on connect
+            history = await load_history(
+                Chat.objects.filter(room_id=self.room.pk), text_data_json.get("cursor")
+            )
+            await self.send(text_data=json.dumps(history))
+            return
+
+        # Queued once here by the sender's own connection, stored by the
+        # chat-persistence worker and broadcast with its id and date
+        chat: dict = chat_message(
+            self.user.pk, self.room.pk, self.friend_id, text_data_json["message"]
+        )
+        await persist(chat)
 
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "chatroom_message",
-                "message": message,
-                "username": username,
-                "user_image": user_image,
+                "id": chat["message_id"],
+                "date": chat["date"],
+                "message": chat["text"],
+                "username": self.user.username,
+                "user_image": self.user_image,
             },
         )
 
     """Messages"""
 
     async def chatroom_message(self, event):
-        message = event["message"]
-        username = event["username"]
-        user_image = event["user_image"]
-
-        await create_new_message(
-            me=self.scope["user"],
-            friend=username,
-            message=message,
-            room_id=self.room_name,
-        )
+        if event["username"] != self.user.username:
+            # The other member has the room open and sees the message live
+            await persist(room_seen(self.room.pk, self.user.pk))
 
         await self.send(
             text_data=json.dumps(
                 {
-                    "message": message,
-                    "username": username,
-                    "user_image": user_image,
+                    "id": event["id"],
+                    "date": event["date"],
+                    "message": event["message"],
+                    "username": event["username"],
+                    "user_image": event["user_image"],
                 }
             )
         )
@@ -99,6 +150,16 @@ class ShoutBoxConsumer(AsyncWebsocketConsumer):
         self.shoutbox_id = self.scope["url_route"]["kwargs"]["shoutbox_id"]
         self.shoutbox_group_name = "shoutbox_%s" % self.shoutbox_id
 
+        # Resolved once for the connection, messages need no lookups
+        self.user = self.scope["user"]
+        self.shoutbox: Optional[ShoutBox] = await find_member_shoutbox(
+            self.shoutbox_id, self.user
+        )
+        if self.shoutbox is None:
+            await self.close()
+            return
+        self.user_image: str = await profile_image_url(self.user)
+
         await self.channel_layer.group_add(self.shoutbox_group_name, self.channel_name)
 
         await self.accept()
@@ -114,37 +175,129 @@ class ShoutBoxConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
-        message = text_data_json["message"]
-        username = text_data_json["username"]
-        user_image = text_data_json["user_image"]
+        if text_data_json.get("type") == "history":
+            # Membership was checked on connect
+            history = await load_history(
+                Shout.objects.filter(shoutbox_id=self.shoutbox.pk),
+                text_data_json.get("cursor"),
+            )
+            await self.send(text_data=json.dumps(history))
+            return
+
+        # Queued once here by the sender's own connection, stored by the
+        # chat-persistence worker and broadcast with its id and date
+        shout: dict = shout_message(
+            self.user.pk, self.shoutbox.pk, text_data_json["message"]
+        )
+        await persist(shout)
 
         await self.channel_layer.group_send(
             self.shoutbox_group_name,
             {
                 "type": "shoutbox_message",
-                "message": message,
-                "username": username,
-                "user_image": user_image,
+                "id": shout["message_id"],
+                "date": shout["date"],
+                "message": shout["text"],
+                "username": self.user.username,
+                "user_image": self.user_image,
             },
         )
 
     """Messages"""
 
     async def shoutbox_message(self, event):
-        message = event["message"]
-        username = event["username"]
-        user_image = event["user_image"]
-
-        await create_new_shout(
-            me=self.scope["user"], message=message, shoutbox_id=self.shoutbox_id
-        )
-
         await self.send(
             text_data=json.dumps(
                 {
-                    "message": message,
-                    "username": username,
-                    "user_image": user_image,
+                    "id": event["id"],
+                    "date": event["date"],
+                    "message": event["message"],
+                    "username": event["username"],
+                    "user_image": event["user_image"],
                 }
             )
         )
+
+
+class ChatPersistenceConsumer(AsyncConsumer):
+    """Background worker storing chat and shout messages in batches, run with
+    `manage.py runworker chat-persistence`. Best effort: the buffer is flushed
+    when the worker is stopped, but a crash or SIGKILL loses what it buffered,
+    up to settings.CHAT_PERSISTENCE_INTERVAL of messages, or more while a failed
+    batch waits for its retry. Events the database rejects are dropped one by
+    one, and batches still failing after settings.CHAT_PERSISTENCE_MAX_RETRIES
+    retries are dropped whole."""
+
+    async def __call__(self, scope, receive, send):
+        self.pending: list[dict] = []
+        self.flush_lock: asyncio.Lock = asyncio.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+        # Failed flushes in a row, see retry
+        self.failures: int = 0
+        try:
+            # Stop on SIGTERM the way Ctrl-C does, so the finally below runs
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+        except ValueError:
+            pass  # Not the main thread, as when run by tests
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.flush()
+
+    async def persist_chat(self, event) -> None:
+        await self.add(event)
+
+    async def persist_shout(self, event) -> None:
+        await self.add(event)
+
+    async def persist_seen(self, event) -> None:
+        await self.add(event)
+
+    async def add(self, event: dict) -> None:
+        self.pending.append(event)
+        if len(self.pending) >= settings.CHAT_PERSISTENCE_BATCH_SIZE:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_later(settings.CHAT_PERSISTENCE_INTERVAL)
+
+    def flush_later(self, delay: float) -> None:
+        async def flush_after_delay() -> None:
+            await asyncio.sleep(delay)
+            self.flush_task = None
+            await self.flush()
+
+        self.flush_task = asyncio.ensure_future(flush_after_delay())
+
+    async def flush(self) -> None:
+        async with self.flush_lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            try:
+                await database_sync_to_async(store_batch)(batch)
+            except RETRYABLE_ERRORS as e:
+                self.retry(batch, e)
+                return
+            except Exception:
+                # An event the database will never accept, store the rest around it
+                try:
+                    await database_sync_to_async(store_each)(batch)
+                except RETRYABLE_ERRORS as e:
+                    self.retry(batch, e)
+                    return
+            self.failures = 0
+
+    def retry(self, batch: list[dict], error: Exception) -> None:
+        self.failures += 1
+        if self.failures > settings.CHAT_PERSISTENCE_MAX_RETRIES:
+            logging.error(
+                f"Dropping {len(batch)} chat event(s) after {self.failures - 1}"
+                f" retries: {error}"
+            )
+            self.failures = 0
+            return
+        # Kept and retried, stored messages are skipped on the next try
+        logging.error(f"Could not store {len(batch)} chat event(s): {error}")
+        self.pending[:0] = batch
+        if self.flush_task is None:
+            self.flush_later(settings.CHAT_PERSISTENCE_RETRY_DELAY)
@@ -0,0 +1,46 @@
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+from blog.pagination import CursorPage, CursorPaginator
+from chat.models import Chat, Shout
+
+
+def history_page(queryset: QuerySet, cursor: Optional[str] = None) -> CursorPage:
+    """
+    One page of chat history, the newest settings.CHAT_HISTORY_PAGE_SIZE messages
+    without a cursor and the ones before it with the next_cursor of a page.
+
+    Args:
+        queryset: Chat or Shout rows of one room or shoutbox
+        cursor: next_cursor of the page shown before, None for the newest messages
+
+    Returns:
+        CursorPage: Messages newest first, next_cursor is set when older ones remain
+    """
+    return CursorPaginator(
+        queryset.select_related("author__profile"),
+        settings.CHAT_HISTORY_PAGE_SIZE,
+        date_field="date",
+    ).page(cursor)
+
+
+def serialize_message(message: Chat | Shout) -> dict[str, Any]:
+    """
+    A stored message in the shape messages are broadcast to the sockets in.
+
+    Args:
+        message: Chat or Shout, with author__profile selected
+
+    Returns:
+        dict[str, Any]: message, username, user_image and the ISO 8601 date,
+        username and user_image are None for shouts of deleted users
+    """
+    author = message.author
+    return {
+        "message": message.text,
+        "username": author.username if author else None,
+        "user_image": author.profile.image.url if author else None,
+        "date": message.date.isoformat(),
+    }
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from typing import Any, Iterable, Iterator
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Model, OuterRef, QuerySet, Subquery
+
+from chat.models import Chat, Room, Shout
+
+DELETE_BATCH_SIZE: int = 1000
+
+
+def fan_out_groups(
+    rows: Iterable[dict[str, Any]], key: tuple[str, ...], window: timedelta
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Group the rows that are copies of one broadcast message.
+
+    Args:
+        rows: Rows with id, date and the key fields, ordered by key, date and id
+        key: Fields the copies of a message share
+        window: Longest time between the first and the last copy of a message
+
+    Yields:
+        list[dict[str, Any]]: Rows with the same key written within window of the
+        first of them, oldest first
+    """
+    group: list[dict[str, Any]] = []
+    for row in rows:
+        if group and (
+            any(row[field] != group[0][field] for field in key)
+            or row["date"] - group[0]["date"] > window
+        ):
+            yield group
+            group = []
+        group.append(row)
+    if group:
+        yield group
+
+
+def _delete(model: type[Model], ids: list[int]) -> None:
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        model.objects.filter(pk__in=ids[start : start + DELETE_BATCH_SIZE]).delete()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the copies of chat and shoutbox messages that every listening socket "
+        "stored before messages were stored once by the sender, keeping one row per "
+        "message and addressing kept chats to the other member of the room. Only "
+        "rows stored before then, which have no message_id, are looked at"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=1.0,
+            help="Seconds within which rows of the same message are copies",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many copies would be deleted",
+        )
+
+    def handle(self, *args, **options) -> None:
+        window: timedelta = timedelta(seconds=options["window"])
+        with transaction.atomic():
+            chats: int = self._dedupe_chats(window, options["dry_run"])
+            shouts: int = self._dedupe_shouts(window, options["dry_run"])
+
+        verb: str = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {chats} chat and {shouts} shout copies")
+        )
+
+    def _dedupe_chats(self, window: timedelta, dry_run: bool) -> int:
+        # Every socket stored the message with its own user as author and the
+        # sender as friend, so the copy of the sender's socket has author == friend.
+        # Groups without such a copy are messages stored once, and groups with more
+        # than one hold several messages that can not be told apart, both are left
+        # alone.
+        rows: Iterator[dict[str, Any]] = (
+            Chat.objects.filter(message_id__isnull=True)
+            .order_by("room_id", "friend_id", "text", "date", "id")
+            .values("id", "date", "room_id", "author_id", "friend_id", "text")
+            .iterator()
+        )
+        copies: list[int] = []
+        for group in fan_out_groups(rows, ("room_id", "friend_id", "text"), window):
+            own: list[dict[str, Any]] = [
+                row for row in group if row["author_id"] == row["friend_id"]
+            ]
+            if len(own) == 1:
+                copies.extend(row["id"] for row in group if row is not own[0])
+
+        if not dry_run:
+            _delete(Chat, copies)
+            self._readdress_chats()
+        return len(copies)
+
+    def _readdress_chats(self) -> None:
+        # The kept copies are the sender's, send them to the other member
+        own: QuerySet = Chat.objects.filter(
+            message_id__isnull=True, author_id=F("friend_id")
+        )
+        for member, other in (("author_id", "friend_id"), ("friend_id", "author_id")):
+            own.filter(**{f"room_id__{member}": F("author_id")}).update(
+                friend_id=Subquery(
+                    Room.objects.filter(pk=OuterRef("room_id")).values(other)[:1]
+                )
+            )
+
+    def _dedupe_shouts(self, window: timedelta, dry_run: bool) -> int:
+        # Each copy was stored with the user of the socket as author, the sender
+        # can not be told apart so the first copy is kept. A listener stores one
+        # copy of a message, so a group with an author twice holds several
+        # messages, such as two users sending the same text, and is left alone.
+        rows: Iterator[dict[str, Any]] = (
+            Shout.objects.filter(message_id__isnull=True)
+            .order_by("shoutbox_id", "text", "date", "id")
+            .values("id", "date", "shoutbox_id", "author_id", "text")
+            .iterator()
+        )
+        copies: list[int] = []
+        for group in fan_out_groups(rows, ("shoutbox_id", "text"), window):
+            if len({row["author_id"] for row in group}) == len(group):
+                copies.extend(row["id"] for row in group[1:])
+        if not dry_run:
+            _delete(Shout, copies)
+        return len(copies)
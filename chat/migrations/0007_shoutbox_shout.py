@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_auto_20210215_2113"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoutBox",
+            fields=[
+                ("shoutbox_id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "shoutbox_name",
+                    models.CharField(blank=True, max_length=120, null=True),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="author_shout_box",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "participants",
+                    models.ManyToManyField(
+                        blank=True,
+                        null=True,
+                        related_name="shoutbox_participants",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Shout",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.CharField(max_length=300)),
+                ("date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="author_shout_mesage",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "who_has_seen",
+                    models.ManyToManyField(
+                        blank=True,
+                        null=True,
+                        related_name="shoutbox_who_has_seen",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "shoutbox",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shouts",
+                        to="chat.shoutbox",
+                    ),
+                ),
+            ],
+        ),
+    ]
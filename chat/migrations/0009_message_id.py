@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_roomunread"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="message_id",
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="shout",
+            name="message_id",
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="chat",
+            name="date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="shout",
+            name="date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -29,13 +30,38 @@ class Chat(models.Model):
         User, on_delete=models.CASCADE, related_name="friend_msg"
     )
     text: models.CharField = models.CharField(max_length=300)
-    date: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    # Set by the socket that received the message, which stores it later, see
+    # chat.persistence
+    date: models.DateTimeField = models.DateTimeField(default=timezone.now)
+    message_id: models.UUIDField = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False
+    )
     has_seen: models.BooleanField = models.BooleanField(default=False)
 
     def __str__(self) -> str:
         return f"{self.id} - {self.date}"
 
 
+class RoomUnread(models.Model):
+    """Messages a member of a room received since they last opened it."""
+
+    room: models.ForeignKey = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name="unread_counts"
+    )
+    user: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="room_unread_counts"
+    )
+    count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "user"], name="unique_room_unread"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.room_id}-{self.user_id}: {self.count}"
+
+
 class ShoutBox(models.Model):
     shoutbox_id: models.AutoField = models.AutoField(primary_key=True)
     shoutbox_name: models.CharField = models.CharField(max_length=120, null=True, blank=True)
@@ -61,7 +87,10 @@ class Shout(models.Model):
         null=True,
     )
     text: models.CharField = models.CharField(max_length=300)
-    date: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    date: models.DateTimeField = models.DateTimeField(default=timezone.now)
+    message_id: models.UUIDField = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False
+    )
     who_has_seen: models.ManyToManyField = models.ManyToManyField(
         User, related_name="shoutbox_who_has_seen", null=True, blank=True
     )
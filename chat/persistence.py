@@ -0,0 +1,186 @@
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Iterable
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import InterfaceError, OperationalError, transaction
+from django.utils import timezone
+
+from chat.models import Chat, Shout
+from chat.unread import add_unread, mark_room_read
+
+# Channel the chat persistence workers consume, see chat.consumers
+CHAT_PERSISTENCE_CHANNEL: str = "chat-persistence"
+# Errors a batch is retried on, anything else is down to an event the database
+# will never accept
+RETRYABLE_ERRORS: tuple[type[Exception], ...] = (OperationalError, InterfaceError)
+
+
+def message_text(text: Any) -> str:
+    """Message text cut to what the text columns of Chat and Shout hold."""
+    return str(text)[: Chat._meta.get_field("text").max_length]
+
+
+def chat_message(author_id: int, room_id: int, friend_id: int, text: str) -> dict:
+    """
+    A chat message to be stored, with the id and date it is broadcast with.
+
+    Args:
+        author_id: Id of the sender
+        room_id: Id of the room it was sent in
+        friend_id: Id of the other member of the room
+        text: The message, cut to the length of the text column
+
+    Returns:
+        dict: persist.chat event for the persistence worker
+    """
+    return {
+        "type": "persist.chat",
+        "message_id": str(uuid.uuid4()),
+        "date": timezone.now().isoformat(),
+        "author_id": author_id,
+        "room_id": room_id,
+        "friend_id": friend_id,
+        "text": message_text(text),
+    }
+
+
+def shout_message(author_id: int, shoutbox_id: int, text: str) -> dict:
+    """
+    A shout to be stored, with the id and date it is broadcast with.
+
+    Args:
+        author_id: Id of the sender
+        shoutbox_id: Id of the shoutbox it was sent in
+        text: The message, cut to the length of the text column
+
+    Returns:
+        dict: persist.shout event for the persistence worker
+    """
+    return {
+        "type": "persist.shout",
+        "message_id": str(uuid.uuid4()),
+        "date": timezone.now().isoformat(),
+        "author_id": author_id,
+        "shoutbox_id": shoutbox_id,
+        "text": message_text(text),
+    }
+
+
+def room_seen(room_id: int, user_id: int) -> dict:
+    """persist.seen event resetting the unread messages of a user in a room."""
+    return {"type": "persist.seen", "room_id": room_id, "user_id": user_id}
+
+
+async def persist(event: dict) -> None:
+    """
+    Queue an event for the persistence workers. Should the channel layer fail,
+    it is stored right away instead. Storing is still best effort: events a
+    worker buffered but has not stored yet are lost if it crashes, up to
+    settings.CHAT_PERSISTENCE_INTERVAL worth of messages.
+
+    Args:
+        event: Built by chat_message, shout_message or room_seen
+    """
+    try:
+        await get_channel_layer().send(CHAT_PERSISTENCE_CHANNEL, event)
+    except Exception as e:
+        logging.error(f"Could not queue {event['type']} for persistence: {e}")
+        await database_sync_to_async(store_batch)([event])
+
+
+def _stored_ids(model: type[Chat | Shout], events: list[dict]) -> set[str]:
+    ids: list[str] = [event["message_id"] for event in events]
+    if not ids:
+        return set()
+    return {
+        str(message_id)
+        for message_id in model.objects.filter(message_id__in=ids).values_list(
+            "message_id", flat=True
+        )
+    }
+
+
+def store_batch(events: Iterable[dict[str, Any]]) -> None:
+    """
+    Store a batch of persistence events in one transaction, in the order they
+    were sent. Messages already stored are skipped, so a batch can be retried or
+    delivered twice.
+
+    Args:
+        events: persist.chat, persist.shout and persist.seen events
+    """
+    events = list(events)
+    chats: list[dict] = [e for e in events if e["type"] == "persist.chat"]
+    shouts: list[dict] = [e for e in events if e["type"] == "persist.shout"]
+
+    with transaction.atomic():
+        stored: set[str] = _stored_ids(Chat, chats) | _stored_ids(Shout, shouts)
+        # Per (room, member): whether the room was opened during the batch, and
+        # the messages received after that
+        unread: dict[tuple[int, int], list] = {}
+        new_chats: list[Chat] = []
+        new_shouts: list[Shout] = []
+        for event in events:
+            if event.get("message_id") in stored:
+                continue
+            if "message_id" in event:
+                # Delivered twice within the batch
+                stored.add(event["message_id"])
+            if event["type"] == "persist.chat":
+                new_chats.append(
+                    Chat(
+                        message_id=event["message_id"],
+                        date=datetime.fromisoformat(event["date"]),
+                        author_id=event["author_id"],
+                        room_id_id=event["room_id"],
+                        friend_id=event["friend_id"],
+                        text=event["text"],
+                    )
+                )
+                key: tuple[int, int] = (event["room_id"], event["friend_id"])
+                unread.setdefault(key, [False, 0])[1] += 1
+            elif event["type"] == "persist.shout":
+                new_shouts.append(
+                    Shout(
+                        message_id=event["message_id"],
+                        date=datetime.fromisoformat(event["date"]),
+                        author_id=event["author_id"],
+                        shoutbox_id=event["shoutbox_id"],
+                        text=event["text"],
+                    )
+                )
+            elif event["type"] == "persist.seen":
+                unread[(event["room_id"], event["user_id"])] = [True, 0]
+
+        Chat.objects.bulk_create(new_chats)
+        Shout.objects.bulk_create(new_shouts)
+        for (room_id, user_id), (seen, count) in unread.items():
+            if seen:
+                mark_room_read(room_id, user_id)
+            if count:
+                add_unread(room_id, user_id, count)
+
+
+def store_each(events: Iterable[dict[str, Any]]) -> None:
+    """
+    Store events one at a time, dropping the ones that fail with anything but
+    one of RETRYABLE_ERRORS, such as messages of a room deleted in the meantime,
+    so they do not hold up the rest.
+
+    Args:
+        events: Events of a batch store_batch failed on
+
+    Raises:
+        OperationalError, InterfaceError: The database is unavailable, the events
+        already stored are skipped when the batch is retried
+    """
+    for event in events:
+        try:
+            store_batch([event])
+        except RETRYABLE_ERRORS:
+            raise
+        except Exception as e:
+            logging.error(f"Dropping {event} that can not be stored: {e}")
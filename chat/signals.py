@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from chat.models import RoomUnread
+from chat.unread import invalidate_unread
+
+""" Keeping the cached unread totals in step, see chat.unread """
+
+
+@receiver(post_delete, sender=RoomUnread)
+def room_unread_deleted_update_total(sender, instance, **kwargs) -> None:
+    # Deleted along with its room or user
+    if instance.count:
+        invalidate_unread(instance.user_id)
@@ -1,3 +1,291 @@
-from django.test import TestCase  # noqa: F401
+import asyncio
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DataError, OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat import persistence
+from chat.consumers import ChatPersistenceConsumer
+from chat.models import Chat, Room, RoomUnread, Shout, ShoutBox
+from chat.persistence import chat_message, store_batch
+from chat.unread import (
+    UNREAD_TOTAL_KEY,
+    add_unread,
+    mark_room_read,
+    recipient_id,
+    unread_total,
+)
+
+
+class RoomUnreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.friend = User.objects.create_user("friend", password="password")
+        cls.other = User.objects.create_user("other", password="password")
+        cls.room = Room.objects.create(author=cls.author, friend=cls.friend)
+        cls.other_room = Room.objects.create(author=cls.other, friend=cls.friend)
+
+    def setUp(self) -> None:
+        keys: list[str] = [
+            UNREAD_TOTAL_KEY.format(user_id=user.pk)
+            for user in (self.author, self.friend, self.other)
+        ]
+        cache.delete_many(keys)
+        self.addCleanup(cache.delete_many, keys)
+
+    def receive(self, room: Room, sender: User) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            add_unread(room.pk, recipient_id(room, sender.pk))
+
+    def test_messages_count_for_the_other_member(self) -> None:
+        self.assertEqual(unread_total(self.friend.pk), 0)
+
+        self.receive(self.room, self.author)
+        self.receive(self.room, self.author)
+        self.receive(self.other_room, self.other)
+
+        counter = RoomUnread.objects.get(room=self.room, user=self.friend)
+        self.assertEqual(counter.count, 2)
+        self.assertFalse(RoomUnread.objects.filter(user=self.author).exists())
+        # The cached total was moved along rather than summed again
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_total(self.friend.pk), 3)
+
+    def test_opening_a_room_resets_only_that_room(self) -> None:
+        self.receive(self.room, self.author)
+        self.receive(self.other_room, self.other)
+        self.assertEqual(unread_total(self.friend.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(mark_room_read(self.room.pk, self.friend.pk))
+        self.assertEqual(unread_total(self.friend.pk), 1)
+        self.assertEqual(
+            RoomUnread.objects.get(room=self.other_room, user=self.friend).count, 1
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(mark_room_read(self.room.pk, self.friend.pk))
+
+    def test_deleting_a_room_drops_its_messages_from_the_total(self) -> None:
+        self.receive(self.room, self.author)
+        self.receive(self.other_room, self.other)
+        self.assertEqual(unread_total(self.friend.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_room.delete()
+        self.assertEqual(unread_total(self.friend.pk), 1)
+
+
+class StoreBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.friend = User.objects.create_user("friend", password="password")
+        cls.room = Room.objects.create(author=cls.author, friend=cls.friend)
+
+    def setUp(self) -> None:
+        key: str = UNREAD_TOTAL_KEY.format(user_id=self.friend.pk)
+        cache.delete(key)
+        self.addCleanup(cache.delete, key)
+
+    def store(self, events: list[dict]) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            store_batch(events)
+
+    def test_messages_delivered_twice_are_stored_once(self) -> None:
+        first = chat_message(self.author.pk, self.room.pk, self.friend.pk, "Hi")
+        second = chat_message(self.author.pk, self.room.pk, self.friend.pk, "Hey")
+
+        # Twice within a batch, then the whole batch again as after a retry
+        self.store([first, first, second])
+        self.store([first, second])
+
+        chats = Chat.objects.filter(room_id=self.room).order_by("date", "id")
+        self.assertEqual([chat.text for chat in chats], ["Hi", "Hey"])
+        self.assertEqual(str(chats[0].message_id), first["message_id"])
+        self.assertEqual(chats[0].date.isoformat(), first["date"])
+        self.assertEqual(
+            RoomUnread.objects.get(room=self.room, user=self.friend).count, 2
+        )
+        self.assertEqual(unread_total(self.friend.pk), 2)
+
+
+class PersistenceWorkerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user("author", password="password")
+        cls.friend = User.objects.create_user("friend", password="password")
+        cls.room = Room.objects.create(author=cls.author, friend=cls.friend)
+
+    def setUp(self) -> None:
+        self.worker = ChatPersistenceConsumer()
+        self.worker.pending = []
+        self.worker.flush_lock = asyncio.Lock()
+        self.worker.flush_task = None
+        self.worker.failures = 0
+        # Stored on the test's own connection, inside its transaction
+        patcher = mock.patch("chat.consumers.database_sync_to_async", sync_to_async)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def message(self, text: str) -> dict:
+        return chat_message(self.author.pk, self.room.pk, self.friend.pk, text)
+
+    def flush(self, events: list[dict]) -> None:
+        async def run() -> None:
+            self.worker.pending.extend(events)
+            await self.worker.flush()
+            if self.worker.flush_task is not None:
+                self.worker.flush_task.cancel()
+                self.worker.flush_task = None
+
+        async_to_sync(run)()
+
+    def test_over_long_messages_are_cut_to_the_column(self) -> None:
+        self.assertEqual(len(self.message("x" * 400)["text"]), 300)
+
+    def test_events_the_database_rejects_are_dropped(self) -> None:
+        store = persistence.store_batch
+
+        def reject_bad(events: list[dict]) -> None:
+            if any(event.get("text") == "bad" for event in events):
+                raise DataError("value too long")
+            store(events)
+
+        events = [self.message("first"), self.message("bad"), self.message("last")]
+        with mock.patch("chat.consumers.store_batch", reject_bad), mock.patch(
+            "chat.persistence.store_batch", reject_bad
+        ):
+            self.flush(events)
+
+        self.assertEqual(
+            list(Chat.objects.order_by("date").values_list("text", flat=True)),
+            ["first", "last"],
+        )
+        self.assertEqual(self.worker.pending, [])
+
+    @override_settings(CHAT_PERSISTENCE_MAX_RETRIES=2)
+    def test_unavailable_database_is_retried_a_limited_number_of_times(self) -> None:
+        events = [self.message("Hi")]
+        with mock.patch(
+            "chat.consumers.store_batch", side_effect=OperationalError("gone away")
+        ):
+            self.flush(events)
+            self.assertEqual(self.worker.pending, events)
+            self.flush([])
+            self.assertEqual(self.worker.pending, events)
+            self.flush([])
+            self.assertEqual(self.worker.pending, [])
+
+        self.flush([self.message("Back")])
+        self.assertEqual(list(Chat.objects.values_list("text", flat=True)), ["Back"])
+        self.assertEqual(self.worker.failures, 0)
+
+
+class DedupeMessagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.sender = User.objects.create_user("sender", password="password")
+        cls.friend = User.objects.create_user("friend", password="password")
+        cls.listener = User.objects.create_user("listener", password="password")
+        cls.room = Room.objects.create(author=cls.sender, friend=cls.friend)
+        cls.shoutbox = ShoutBox.objects.create(author=cls.sender)
+        cls.now = timezone.now()
+
+    def chat(self, author: User, text: str, seconds: float = 0, **kwargs) -> Chat:
+        # Stored the old way by the socket of author, addressed from the sender
+        return Chat.objects.create(
+            room_id=self.room,
+            author=author,
+            friend=self.sender,
+            text=text,
+            date=self.now + timedelta(seconds=seconds),
+            **kwargs,
+        )
+
+    def shout(self, author: User, text: str, seconds: float = 0, **kwargs) -> Shout:
+        return Shout.objects.create(
+            shoutbox=self.shoutbox,
+            author=author,
+            text=text,
+            date=self.now + timedelta(seconds=seconds),
+            **kwargs,
+        )
+
+    def dedupe(self, *args: str) -> str:
+        out = StringIO()
+        call_command("dedupe_messages", *args, stdout=out)
+        return out.getvalue()
+
+    def test_chat_copies_keep_the_senders_row_addressed_to_the_friend(self) -> None:
+        own = self.chat(self.sender, "Hi")
+        self.chat(self.friend, "Hi", seconds=0.2)
+        # Sent again later, and stored once while the friend was away
+        later = self.chat(self.sender, "Hi", seconds=5)
+
+        self.dedupe()
+
+        chats = Chat.objects.order_by("id")
+        self.assertEqual([chat.pk for chat in chats], [own.pk, later.pk])
+        for chat in chats:
+            self.assertEqual((chat.author, chat.friend), (self.sender, self.friend))
+
+    def test_identical_chats_of_one_sender_are_kept(self) -> None:
+        for seconds in (0, 0.1):
+            self.chat(self.sender, "+1", seconds=seconds)
+            self.chat(self.friend, "+1", seconds=seconds + 0.05)
+
+        self.assertIn("Deleted 0 chat", self.dedupe())
+        self.assertEqual(Chat.objects.count(), 4)
+
+    def test_shout_copies_are_stored_once(self) -> None:
+        kept = self.shout(self.friend, "Hello")
+        self.shout(self.sender, "Hello", seconds=0.1)
+        self.shout(self.listener, "Hello", seconds=0.2)
+
+        self.dedupe()
+
+        self.assertEqual(list(Shout.objects.values_list("id", flat=True)), [kept.pk])
+
+    def test_the_same_shout_from_two_users_is_kept(self) -> None:
+        # Both users and the listener stored both messages
+        for seconds in (0, 0.1):
+            for user in (self.sender, self.friend, self.listener):
+                self.shout(user, "lol", seconds=seconds)
+
+        self.assertIn("0 shout copies", self.dedupe())
+        self.assertEqual(Shout.objects.count(), 6)
+
+    def test_messages_stored_once_by_the_sender_are_left_alone(self) -> None:
+        for _ in range(2):
+            self.chat(self.sender, "lol", message_id=uuid.uuid4())
+            self.shout(self.sender, "lol", message_id=uuid.uuid4())
+            self.shout(self.friend, "lol", message_id=uuid.uuid4())
+
+        self.dedupe()
+
+        self.assertEqual(Chat.objects.count(), 2)
+        self.assertEqual(Shout.objects.count(), 4)
+        self.assertFalse(Chat.objects.exclude(friend=self.sender).exists())
+
+    def test_dry_run_deletes_nothing(self) -> None:
+        self.chat(self.sender, "Hi")
+        self.chat(self.friend, "Hi")
+        self.shout(self.sender, "Hi")
+        self.shout(self.friend, "Hi")
+
+        self.assertIn(
+            "Would delete 1 chat and 1 shout copies", self.dedupe("--dry-run")
+        )
+        self.assertEqual(Chat.objects.count(), 2)
+        self.assertEqual(Shout.objects.count(), 2)
+        self.assertEqual(Chat.objects.filter(friend=self.sender).count(), 2)
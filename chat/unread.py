@@ -0,0 +1,96 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from chat.models import Room, RoomUnread
+
+UNREAD_TOTAL_KEY: str = "chat:unread-total:{user_id}"
+
+
+def _total_key(user_id: int) -> str:
+    return UNREAD_TOTAL_KEY.format(user_id=user_id)
+
+
+def unread_total(user_id: int) -> int:
+    """
+    Number of chat messages a user received in all their rooms since last opening
+    each of them, summed off the database only when the cached total is missing.
+
+    Args:
+        user_id: Id of the user
+
+    Returns:
+        int: The number of unread chat messages
+    """
+    total: Optional[int] = cache.get(_total_key(user_id))
+    if total is None:
+        total = (
+            RoomUnread.objects.filter(user_id=user_id).aggregate(total=Sum("count"))[
+                "total"
+            ]
+            or 0
+        )
+        cache.add(_total_key(user_id), total, settings.CHAT_UNREAD_CACHE_TTL)
+    return total
+
+
+def recipient_id(room: Room, sender_id: int) -> int:
+    """The member of a two person room that a message of sender_id is sent to."""
+    return room.friend_id if room.author_id == sender_id else room.author_id
+
+
+def add_unread(room_id: int, user_id: int, count: int = 1) -> None:
+    """
+    Count messages received by a user in a room, and move their cached total
+    once the current transaction commits.
+
+    Args:
+        room_id: Id of the room the messages were sent in
+        user_id: Id of the member who received them
+        count: Number of messages
+    """
+    counter = RoomUnread.objects.filter(room_id=room_id, user_id=user_id)
+    if not counter.update(count=F("count") + count):
+        try:
+            with transaction.atomic():
+                RoomUnread.objects.create(room_id=room_id, user_id=user_id, count=count)
+        except IntegrityError:
+            # Created by a concurrent message in between
+            counter.update(count=F("count") + count)
+
+    def adjust() -> None:
+        try:
+            cache.incr(_total_key(user_id), count)
+        except ValueError:
+            pass
+
+    transaction.on_commit(adjust)
+
+
+def invalidate_unread(user_id: int) -> None:
+    """Drop the cached total of a user, it is summed again on the next read."""
+    transaction.on_commit(lambda: cache.delete(_total_key(user_id)))
+
+
+def mark_room_read(room_id: int, user_id: int) -> bool:
+    """
+    Reset the unread messages of a user in a room when they open it. The cached
+    total is dropped rather than decremented, as messages may arrive between
+    reading the room count and resetting it.
+
+    Args:
+        room_id: Id of the room
+        user_id: Id of the member who opened it
+
+    Returns:
+        bool: Whether there were unread messages
+    """
+    changed: int = RoomUnread.objects.filter(
+        room_id=room_id, user_id=user_id, count__gt=0
+    ).update(count=0)
+    if changed:
+        invalidate_unread(user_id)
+    return bool(changed)
@@ -5,7 +5,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User, UserManager
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Subquery
 from django.db.models.manager import BaseManager
 from django.http import (
     HttpResponse,
@@ -14,18 +14,27 @@ from django.http import (
 )
 from django.shortcuts import redirect, render
 
-from blog.utils import is_user_verified
-from chat.models import Chat, Room, Shout, ShoutBox
+from blog.pagination import CursorPage
+from chat.history import history_page
+from chat.models import Chat, Room, RoomUnread, Shout, ShoutBox
+from chat.unread import mark_room_read
 from friend.models import FriendList
-from users.models import Profile
 
 
 @login_required
 def room_enroll(request) -> HttpResponse:
     friends = FriendList.objects.filter(user=request.user)[0].friends.all()
-    all_rooms: BaseManager = Room.objects.filter(
-        Q(author=request.user) | Q(friend=request.user)
-    ).order_by("-created")
+    all_rooms: BaseManager = (
+        Room.objects.filter(Q(author=request.user) | Q(friend=request.user))
+        .annotate(
+            unread=Subquery(
+                RoomUnread.objects.filter(
+                    room=OuterRef("pk"), user=request.user
+                ).values("count")[:1]
+            )
+        )
+        .order_by("-created")
+    )
 
     context: dict[str, Any] = {
         "all_rooms": all_rooms,
@@ -66,15 +75,19 @@ def room_choice(
 def room(
     request, room_name, friend_id
 ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
-    all_rooms: BaseManager = Room.objects.filter(room_id=room_name)
+    all_rooms: BaseManager = Room.objects.filter(
+        Q(author=request.user) | Q(friend=request.user), room_id=room_name
+    )
     if not all_rooms:
         messages.error(request, "Invalid Room ID")
         return redirect("room-enroll")
 
-    chats: BaseManager = Chat.objects.filter(room_id=room_name).order_by("date")
+    mark_room_read(all_rooms[0].pk, request.user.id)
+    chats: CursorPage = history_page(Chat.objects.filter(room_id=room_name))
 
     context: dict[str, Any] = {
         "old_chats": chats,
+        "history_cursor": chats.next_cursor,
         "my_name": request.user,
         "friend_name": User.objects.get(pk=friend_id),
         "room_name": room_name,
@@ -104,7 +117,6 @@ def shoutbox(
     request, shoutbox_id
 ) -> Union[HttpResponseRedirect, HttpResponsePermanentRedirect, HttpResponse]:
     shoutbox: Optional[ShoutBox] = None
-    userobj: Profile = Profile.objects.get(id=request.user.id)
     try:
         shoutbox = ShoutBox.objects.get(shoutbox_id=shoutbox_id)
     except ShoutBox.DoesNotExist:
@@ -113,17 +125,18 @@ def shoutbox(
     if shoutbox:
         if shoutbox.shoutbox_name.lower() == "admin" and not request.user.is_staff:
             raise PermissionDenied()  # Only Admins/staff in admin chat
-        elif not is_user_verified(userobj):
+        elif not request.viewer.is_verified:
             raise PermissionDenied()  # Only verified individuals can get into group chat
         else:
             if request.user not in shoutbox.participants.all():
-                logging.debug(f"Adding user {userobj} to {shoutbox}")
+                logging.debug(f"Adding user {request.user} to {shoutbox}")
                 shoutbox.participants.add(request.user)
 
-    shouts: BaseManager = Shout.objects.filter(shoutbox_id=shoutbox_id).order_by("date")
+    shouts: CursorPage = history_page(Shout.objects.filter(shoutbox_id=shoutbox_id))
 
     context: dict[str, Any] = {
         "old_shouts": shouts,
+        "history_cursor": shouts.next_cursor,
         "my_name": request.user,
         "shoutbox_id": shoutbox_id,
     }
@@ -11,7 +11,7 @@ import os
 
 import django
 from channels.auth import AuthMiddlewareStack
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 
 import chat.routing
@@ -20,9 +20,21 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
 
 django.setup()
 
+# Importing models needs the app registry
+from blog.consumers import ImageProcessingConsumer  # noqa: E402
+from blog.images import IMAGE_CHANNEL  # noqa: E402
+from chat.consumers import ChatPersistenceConsumer  # noqa: E402
+from chat.persistence import CHAT_PERSISTENCE_CHANNEL  # noqa: E402
+
 application = ProtocolTypeRouter(
     {
         "http": get_asgi_application(),
         "websocket": AuthMiddlewareStack(URLRouter(chat.routing.websocket_urlpatterns)),
+        "channel": ChannelNameRouter(
+            {
+                IMAGE_CHANNEL: ImageProcessingConsumer.as_asgi(),
+                CHAT_PERSISTENCE_CHANNEL: ChatPersistenceConsumer.as_asgi(),
+            }
+        ),
     }
 )
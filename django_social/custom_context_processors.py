@@ -1,43 +1,27 @@
-import logging
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict
 
-from django.db.models import Q
-from django.db.models.manager import BaseManager
+from chat.unread import unread_total
+from notification.unread import latest_unread, unread_count
 
-from chat.models import Room
-from notification.models import Notification
 
-
-def notifications_processor(request) -> Dict[str, List[Notification]]:
-    notifications_list: List[Notification] = []
+def notifications_processor(request) -> Dict[str, Any]:
+    unread_notifications_count: int = 0
+    latest_unread_notifications: Callable[[], list] = list
     if request.user.is_authenticated:
-        notifications: Optional[BaseManager] = Notification.objects.filter(user=request.user)
-
-        for notification in notifications:
-            if not notification.is_seen:
-                logging.debug(f"{notification=}")
-                notifications_list.append(notification)
+        unread_notifications_count = unread_count(request.user.id)
+        # Called by the template only when it shows the list
+        latest_unread_notifications = partial(latest_unread, request.user.id)
 
-    return {"notifications_list": notifications_list}
+    return {
+        "unread_notifications_count": unread_notifications_count,
+        "latest_unread_notifications": latest_unread_notifications,
+    }
 
 
 def chat_notifications_processor(request) -> Dict[str, int]:
     chat_notifications_count: int = 0
-
     if request.user.is_authenticated:
-        all_rooms: BaseManager = Room.objects.filter(
-            Q(author=request.user) | Q(friend=request.user)
-        ).order_by("-created")
-
-        for room in all_rooms:
-            try:
-                if room.friend == request.user and room.chats.all().last().author != request.user:
-                    chat_notifications_count += 1
-            except AttributeError:
-                # If a user has no chats, the above line throws an AttributeError, this catches
-                # And ignores it silently
-                pass
-
-    logging.debug(f"Chat notifications count for {request.user}: {chat_notifications_count}")
+        chat_notifications_count = unread_total(request.user.id)
 
     return {"chat_notifications_count": chat_notifications_count}
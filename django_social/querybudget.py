@@ -0,0 +1,204 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:%s|\?|, )+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+# Per URL name, since the process started: requests seen, total and most queries
+# of one request, and the most repeated query shape with its repetitions
+QUERY_STATS: dict[str, dict[str, Any]] = {}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view or block of code ran more queries than it is allowed to."""
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Shape of a query with every literal and IN list collapsed, so the queries of
+    an N+1 loop all share one fingerprint.
+
+    Args:
+        sql: The SQL as sent to the database
+
+    Returns:
+        str: The normalized SQL
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def _template_origin() -> Optional[str]:
+    # Innermost template node on the stack, i.e. the tag or variable that queried
+    frame = sys._getframe(2)
+    while frame is not None:
+        node: Any = frame.f_locals.get("self")
+        # type() rather than isinstance(), which would evaluate lazy objects such
+        # as request.user and query from inside the wrapper
+        if issubclass(type(node), Node) and getattr(node, "token", None) is not None:
+            origin = getattr(node, "origin", None)
+            name: str = getattr(origin, "template_name", None) or str(origin)
+            return f"{name}:{node.token.lineno}"
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """Database execute wrapper recording the fingerprint of every query it sees."""
+
+    def __init__(self, trace_templates: bool = False) -> None:
+        self.trace_templates: bool = trace_templates
+        self.queries: list[tuple[str, Optional[str]]] = []
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: Any
+    ) -> Any:
+        origin: Optional[str] = _template_origin() if self.trace_templates else None
+        self.queries.append((fingerprint(sql), origin))
+        return execute(sql, params, many, context)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    @contextmanager
+    def record(self) -> Iterator["QueryRecorder"]:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold: int) -> list[tuple[str, int, list[str]]]:
+        """
+        Query shapes run at least threshold times, the signature of an N+1.
+
+        Args:
+            threshold: Minimum number of repetitions reported
+
+        Returns:
+            list[tuple[str, int, list[str]]]: Fingerprint, count and the distinct
+            template lines it was run from, most repeated first
+        """
+        counts: Counter = Counter(sql for sql, _ in self.queries)
+        return [
+            (
+                sql,
+                count,
+                sorted(
+                    {
+                        origin
+                        for shape, origin in self.queries
+                        if shape == sql and origin
+                    }
+                ),
+            )
+            for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def report(self) -> str:
+        counts: Counter = Counter(sql for sql, _ in self.queries)
+        return "\n".join(f"{count:4}x {sql}" for sql, count in counts.most_common())
+
+
+def record_stats(url_name: str, recorder: QueryRecorder) -> dict[str, Any]:
+    """
+    Add the queries of one request to QUERY_STATS.
+
+    Args:
+        url_name: Resolved URL name of the request
+        recorder: The queries the request ran
+
+    Returns:
+        dict[str, Any]: The updated stats of the URL name
+    """
+    stats: dict[str, Any] = QUERY_STATS.setdefault(
+        url_name,
+        {"requests": 0, "queries": 0, "max": 0, "duplicate": None, "repeats": 0},
+    )
+    stats["requests"] += 1
+    stats["queries"] += len(recorder)
+    stats["max"] = max(stats["max"], len(recorder))
+    shapes: Counter = Counter(sql for sql, _ in recorder.queries)
+    if shapes:
+        sql, count = shapes.most_common(1)[0]
+        if count > 1 and count > stats["repeats"]:
+            stats["duplicate"], stats["repeats"] = sql, count
+    return stats
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryRecorder]:
+    """
+    Fail when the block runs more than limit queries, listing them by shape.
+
+    Usage:
+        with assert_max_queries(12):
+            self.client.get(reverse("blog-home"))
+
+    Args:
+        limit: Number of queries allowed
+    """
+    recorder: QueryRecorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+    if len(recorder) > limit:
+        raise QueryBudgetExceeded(
+            f"{len(recorder)} queries, budget is {limit}:\n{recorder.report()}"
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries of every GET request against settings.QUERY_BUDGETS, keyed
+    by URL name. Over budget requests are logged, or raise QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is set (as in tests), and query shapes repeated
+    QUERY_BUDGET_REPEAT_THRESHOLD times are logged as likely N+1s together with
+    the template lines that ran them.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        recorder: QueryRecorder = QueryRecorder(trace_templates=True)
+        with recorder.record():
+            response: HttpResponse = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        url_name: str = (match.view_name if match else None) or request.path
+        record_stats(url_name, recorder)
+        for sql, count, origins in recorder.repeated(
+            settings.QUERY_BUDGET_REPEAT_THRESHOLD
+        ):
+            logger.warning(
+                f"Possible N+1 in {url_name}: {count}x {sql[:300]}"
+                f" (from {', '.join(origins) or 'view code'})"
+            )
+
+        # Budgets describe page views, writes are only checked for N+1 patterns
+        budget: Optional[int] = None
+        if request.method in ("GET", "HEAD"):
+            budget = settings.QUERY_BUDGETS.get(url_name)
+        response["X-Query-Count"] = str(len(recorder))
+        if budget is not None and len(recorder) > budget:
+            message: str = f"{url_name} ran {len(recorder)} queries, budget is {budget}"
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(f"{message}:\n{recorder.report()}")
+            logger.warning(message)
+        return response
@@ -151,11 +151,13 @@ INSTALLED_APPS: list[str] = [
 ]
 
 MIDDLEWARE: list[str] = [
+    "django_social.querybudget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.viewer.ViewerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -340,6 +342,104 @@ CKEDITOR_UPLOAD_PATH: Path = MEDIA_ROOT.joinpath("uploads")
 
 CRISPY_TEMPLATE_PACK: str = "bootstrap4"
 
+# Number of a followed user's most recent posts copied into a feed on follow
+FEED_BACKFILL_LIMIT: int = 200
+
+# Top level comments per page and replies per comment loaded into a comment thread
+COMMENTS_PAGE_SIZE: int = 20
+REPLIES_PAGE_SIZE: int = 10
+
+# Messages of a chat room or shoutbox rendered when it is opened, and sent per
+# "history" request for older ones over its websocket
+CHAT_HISTORY_PAGE_SIZE: int = 50
+
+# Results per category on one page of search results
+SEARCH_PAGE_SIZE: int = 10
+
+# "You can follow" suggestions on the home page, and how long (seconds) the user id
+# range they are sampled from is cached
+FOLLOW_SUGGESTIONS: int = 3
+USER_ID_BOUNDS_TTL: int = 600
+
+# Thumbnail sizes the image processing workers generate for post images, and after
+# how many seconds an image stuck in "processing" is handed out again
+IMAGE_PROCESSING_SIZES: list[str] = ["small", "large"]
+IMAGE_PROCESSING_TIMEOUT: int = 600
+
+# Widths (px) and encoder quality of the responsive WebP/AVIF copies of post images
+IMAGE_VARIANT_WIDTHS: list[int] = [320, 640, 960, 1280]
+IMAGE_VARIANT_QUALITY: int = 75
+
+# Top feed ranking: weight of each like, save, comment and follower of the author,
+# and the age (seconds) that costs a post as much as ten times its engagement
+RANKING_WEIGHTS: dict[str, float] = {
+    "like": 1.0,
+    "save": 2.0,
+    "comment": 3.0,
+    "follower": 0.1,
+}
+RANKING_DECAY: int = 12 * 60 * 60
+
+# Trending sidebar: sliding window and bucket size (seconds) likes and comments are
+# counted in, number of posts shown and how often (seconds) the leaderboard is rebuilt
+TRENDING_WINDOW: int = 24 * 60 * 60
+TRENDING_BUCKET: int = 60 * 60
+TRENDING_SIZE: int = 5
+TRENDING_REFRESH: int = 5 * 60
+
+# Chunked uploads: largest chunk and file accepted (bytes), and after how many
+# seconds without a new chunk an unfinished or unattached upload is purged
+UPLOAD_CHUNK_SIZE: int = 5 * 1024 * 1024
+UPLOAD_MAX_SIZE: int = 50 * 1024 * 1024
+UPLOAD_EXPIRY: int = 24 * 60 * 60
+
+# Unread notifications shown in the navbar dropdown, and how long (seconds) the
+# cached unread counters and lists live without being touched
+NOTIFICATION_LATEST_SIZE: int = 5
+NOTIFICATION_CACHE_TTL: int = 24 * 60 * 60
+
+# Seconds the gate flags of request.viewer (verified, can see images, profile
+# picture) stay cached, they are also dropped whenever the profile is saved
+VIEWER_FLAGS_TTL: int = 60 * 60
+
+# Chat and shout messages are stored by the chat-persistence worker in batches of
+# up to this many, at most this many seconds after they were sent, and a batch the
+# database failed on is retried after this many seconds, up to this many times.
+# Storing is best effort, messages buffered by a worker that crashes, up to the
+# interval worth, are lost
+CHAT_PERSISTENCE_BATCH_SIZE: int = 200
+CHAT_PERSISTENCE_INTERVAL: float = 0.02
+CHAT_PERSISTENCE_RETRY_DELAY: float = 1.0
+CHAT_PERSISTENCE_MAX_RETRIES: int = 60
+
+# Seconds the cached total of unread chat messages of a user lives without being touched
+CHAT_UNREAD_CACHE_TTL: int = 24 * 60 * 60
+
+# Query budgets: counted per request when QUERY_BUDGET is "True" (defaults to DEBUG),
+# over budget views raise instead of logging when QUERY_BUDGET_STRICT is "True" (for
+# tests), and a query shape repeated this many times in one request is logged as N+1
+QUERY_BUDGET_ENABLED: bool = os.environ.get("QUERY_BUDGET", DEBUG) == "True"
+QUERY_BUDGET_STRICT: bool = os.environ.get("QUERY_BUDGET_STRICT", "False") == "True"
+QUERY_BUDGET_REPEAT_THRESHOLD: int = 5
+
+# Most queries one GET request of each URL name may run, with a logged in user, the
+# sessions in the database and the caches it reads cold. Views missing here are
+# only checked for N+1 patterns
+QUERY_BUDGETS: dict[str, int] = {
+    "blog-home": 22,
+    "posts-follow-view": 14,
+    "post-detail": 13,
+    "post-comments": 10,
+    "user-posts": 14,
+    "all-like": 10,
+    "all-save": 10,
+    "search": 8,
+    "notification:show-notifications": 8,
+    "blog-about": 6,
+    "profile-detail-view": 17,
+    "room": 10,
+}
+
 LOGIN_REDIRECT_URL: str = "blog-home"
 LOGIN_URL: str = "account_login"
 
@@ -380,6 +480,15 @@ CHANNEL_LAYERS: dict[str, dict[str, str]] = {
     },
 }
 
+# Shared by every web and worker process, so a cached value dropped or updated by
+# one process is seen by all of them
+CACHES: dict[str, dict[str, str]] = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_CACHE_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+
 SITE_ID: int = 2  # considering 2nd site in 'Sites' to be 127.0.0.1 (for dev)
 
 SOCIALACCOUNT_PROVIDERS: dict[str, dict[str, list[str]]] = {
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.benchmark import log_in
+from blog.models import Comment, Post
+from chat.models import Chat, Room
+from django_social.querybudget import assert_max_queries
+from friend.models import FriendList
+from users.models import Profile
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """
+    The budgeted pages stay within settings.QUERY_BUDGETS with enough rows on
+    them that a query per post, comment or message would go over.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.viewer = User.objects.create_user("viewer", password="password")
+        cls.friend = User.objects.create_user("friend", password="password")
+        others = [
+            User.objects.create_user(f"reader{i}", password="password")
+            for i in range(3)
+        ]
+        for user in (cls.viewer, cls.friend, *others):
+            user.profile.verified = True
+            user.profile.save()
+            if user != cls.friend:
+                user.profile.following.add(cls.friend)
+        FriendList.objects.get(user=cls.viewer).friends.add(cls.friend)
+        FriendList.objects.get(user=cls.friend).friends.add(cls.viewer, *others)
+
+        for i in range(8):
+            post = Post.objects.create(title=f"Post {i}", author=cls.friend)
+            post.likes.add(*others)
+            for author in others:
+                comment = Comment.objects.create(name=author, post=post, body="Hi")
+                Comment.objects.create(
+                    name=cls.friend, post=post, body="Hey", reply=comment, is_reply=True
+                )
+        cls.post = post
+
+        cls.room = Room.objects.create(author=cls.viewer, friend=cls.friend)
+        for i in range(20):
+            sender, receiver = (
+                (cls.viewer, cls.friend) if i % 2 else (cls.friend, cls.viewer)
+            )
+            Chat.objects.create(
+                room_id=cls.room, author=sender, friend=receiver, text=f"Message {i}"
+            )
+
+    def setUp(self) -> None:
+        # The relationship status was dropped from Profile but is still read by
+        # blog.utils.can_user_see_images
+        patcher = mock.patch.object(Profile, "relationship_status", None, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        log_in(self.client, self.viewer)
+
+    def assertWithinBudget(self, url_name: str, url: str) -> None:
+        with assert_max_queries(settings.QUERY_BUDGETS[url_name]):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_home(self) -> None:
+        self.assertWithinBudget("blog-home", reverse("blog-home"))
+
+    def test_post_detail(self) -> None:
+        self.assertWithinBudget(
+            "post-detail", reverse("post-detail", kwargs={"pk": self.post.pk})
+        )
+
+    def test_profile(self) -> None:
+        self.assertWithinBudget(
+            "profile-detail-view",
+            reverse("profile-detail-view", kwargs={"pk": self.friend.profile.pk}),
+        )
+
+    def test_chat_room(self) -> None:
+        self.assertWithinBudget(
+            "room", reverse("room", args=[self.room.room_id, self.friend.pk])
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+import events.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+        ("users", "0002_blocklist_remove_profile_relationship_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="event",
+            name="event_description",
+            field=models.CharField(max_length=10000),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="event_id",
+            field=models.CharField(
+                default="34d44f92-1acf-475c-b867-84cfc43b7e47", max_length=100
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="event",
+            name="event_participants",
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="event_poster",
+            field=models.ImageField(
+                blank=True, null=True, upload_to=events.models.get_image_filename
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="event_participants",
+            field=models.ManyToManyField(
+                blank=True,
+                null=True,
+                related_name="event_participants",
+                to="users.profile",
+            ),
+        ),
+    ]
@@ -12,7 +12,9 @@ from django.template import Context, Template  # noqa: F401
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-from blog.utils import is_ajax, is_user_verified
+from blog.models import ChunkedUpload
+from blog.uploads import take_uploads
+from blog.utils import is_ajax
 from events.forms import NewEventForm
 from events.models import Event, Participant
 from events.tables import EventsTable
@@ -49,7 +51,7 @@ def events_home(request: HttpRequest) -> HttpResponse:
 
     # assign additional info to display on webpage
     user_email: str = ""
-    userobj: Profile = Profile.objects.get(id=uid)
+    userobj: Profile = request.viewer.profile
     user_email = userobj.user.email
 
     # automatically remove events from the database which are ongoing or are finished
@@ -106,7 +108,7 @@ def newevent(request: HttpRequest) -> HttpResponse:
 
         form: NewEventForm = NewEventForm(request.POST, request.FILES)
 
-        form.instance.event_author = Profile.objects.get(id=uid)
+        form.instance.event_author = request.viewer.profile
 
         if form.is_valid():
             event_start = form.cleaned_data.get("event_start")
@@ -171,6 +173,13 @@ def newevent(request: HttpRequest) -> HttpResponse:
                     },
                 )
 
+            posters: list[str] = take_uploads(
+                request.user,
+                ChunkedUpload.EVENT_POSTER,
+                request.POST.getlist("poster_upload_id"),
+            )
+            if posters:
+                form.instance.event_poster = posters[0]
             form.save()
             logging.info(f"Event Created: {form.fields}")
             # redirect to home page once event is created
@@ -200,7 +209,7 @@ def allevent(request: HttpRequest) -> HttpResponse:
 
     expired_event_id_list: List[Event] = []
     all_events_list: List[Event] = []
-    userobj: Profile = Profile.objects.get(id=uid)
+    userobj: Profile = request.viewer.profile
     user_name: str = userobj.user.first_name
     user_email: str = userobj.user.email
 
@@ -267,7 +276,7 @@ def explore(request: HttpRequest) -> HttpResponse:
     expired_eventid_lst: List[Event] = []
     participation_list: List[Event] = []
 
-    userobj: Profile = Profile.objects.get(id=uid)
+    userobj: Profile = request.viewer.profile
     user_name: str = userobj.user.first_name
     user_email: str = userobj.user.email
 
@@ -329,9 +338,7 @@ def participate(request: HttpRequest, event_id: str) -> HttpResponse:
 def viewparticipant(request: HttpRequest, event_id: str):
     uid = request.user.id
 
-    userobj: Profile = Profile.objects.get(id=request.user.id)
-
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         return redirect("profile")
 
     event: Event = Event.objects.get(event_id=event_id)
@@ -370,13 +377,13 @@ def is_user_participating(event_pk: str, user_id: str) -> bool:
 
 @login_required
 def ParticipateView(request: HttpRequest) -> Optional[JsonResponse]:
-    userobj: Profile = Profile.objects.get(id=request.user.id)
+    userobj: Profile = request.viewer.profile
     event_pk: str = request.POST.get("event_pk")
 
     event: Event = get_object_or_404(Event, pk=event_pk)
     participants = event.event_participants.all()
 
-    if not is_user_verified(userobj):
+    if not request.viewer.is_verified:
         raise PermissionDenied()
 
     participating: bool = False
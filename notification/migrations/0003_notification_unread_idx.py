@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0016_trending_indexes"),
+        ("notification", "0002_auto_20210201_1854"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "is_seen", "-date"], name="notification_unread_idx"
+            ),
+        ),
+    ]
@@ -34,5 +34,13 @@ class Notification(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     is_seen = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Unread counts and the latest unread list, see notification.unread
+            models.Index(
+                fields=["user", "is_seen", "-date"], name="notification_unread_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.id} - {self.post} - {self.sender} - {self.user} - {self.notification_type}"
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from notification.models import Notification
+from notification.unread import adjust_unread, invalidate_unread
+
+""" Keeping the cached unread counters in step, see notification.unread """
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved_update_unread(
+    sender, instance, created, raw=False, **kwargs
+) -> None:
+    if raw:
+        return
+    if created:
+        adjust_unread(instance.user_id, 0 if instance.is_seen else 1)
+    else:
+        # Whether is_seen changed is unknown here, notification_status goes
+        # through set_seen instead
+        invalidate_unread(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted_update_unread(sender, instance, **kwargs) -> None:
+    adjust_unread(instance.user_id, 0 if instance.is_seen else -1)
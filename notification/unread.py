@@ -0,0 +1,120 @@
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from notification.models import Notification
+
+UNREAD_COUNT_KEY: str = "notification:unread-count:{user_id}"
+LATEST_UNREAD_KEY: str = "notification:latest-unread:{user_id}"
+
+
+def _count_key(user_id: int) -> str:
+    return UNREAD_COUNT_KEY.format(user_id=user_id)
+
+
+def _latest_key(user_id: int) -> str:
+    return LATEST_UNREAD_KEY.format(user_id=user_id)
+
+
+def unread_count(user_id: int) -> int:
+    """
+    Number of unread notifications of a user, counted off the database only when
+    the cached counter is missing.
+
+    Args:
+        user_id: Id of the user
+
+    Returns:
+        int: The number of unread notifications
+    """
+    count: Optional[int] = cache.get(_count_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_seen=False).count()
+        cache.add(_count_key(user_id), count, settings.NOTIFICATION_CACHE_TTL)
+    return count
+
+
+def latest_unread(user_id: int) -> list[dict[str, Any]]:
+    """
+    The newest settings.NOTIFICATION_LATEST_SIZE unread notifications of a user,
+    cached until one of their notifications changes.
+
+    Args:
+        user_id: Id of the user
+
+    Returns:
+        list[dict[str, Any]]: id, notification_type, sender, post_id, text_preview
+        and date of each notification, newest first
+    """
+    latest: Optional[list[dict[str, Any]]] = cache.get(_latest_key(user_id))
+    if latest is None:
+        latest = [
+            {
+                "id": notification.pk,
+                "notification_type": notification.notification_type,
+                "sender": notification.sender.username,
+                "post_id": notification.post_id,
+                "text_preview": notification.text_preview,
+                "date": notification.date,
+            }
+            for notification in Notification.objects.filter(
+                user_id=user_id, is_seen=False
+            )
+            .select_related("sender")
+            .order_by("-date", "-id")[: settings.NOTIFICATION_LATEST_SIZE]
+        ]
+        cache.set(_latest_key(user_id), latest, settings.NOTIFICATION_CACHE_TTL)
+    return latest
+
+
+def adjust_unread(user_id: int, delta: int) -> None:
+    """
+    Move the unread counter of a user by delta and drop their latest unread list,
+    once the current transaction commits. A counter that is not cached is left to
+    be counted on the next read.
+
+    Args:
+        user_id: Id of the user the notifications belong to
+        delta: Change in the number of unread notifications, 0 when only the
+        latest list is affected
+    """
+
+    def adjust() -> None:
+        cache.delete(_latest_key(user_id))
+        if delta:
+            try:
+                cache.incr(_count_key(user_id), delta)
+            except ValueError:
+                pass
+
+    transaction.on_commit(adjust)
+
+
+def invalidate_unread(user_id: int) -> None:
+    """Drop the cached counter and latest list of a user, both are rebuilt on read."""
+    transaction.on_commit(
+        lambda: cache.delete_many([_count_key(user_id), _latest_key(user_id)])
+    )
+
+
+def set_seen(notification: Notification, seen: bool) -> bool:
+    """
+    Mark a notification as read or unread with a conditional update, so the
+    counter moves exactly once however often the request is repeated.
+
+    Args:
+        notification: The notification, is_seen is updated on it
+        seen: Whether it has been read
+
+    Returns:
+        bool: Whether the notification changed
+    """
+    changed: int = Notification.objects.filter(
+        pk=notification.pk, is_seen=not seen
+    ).update(is_seen=seen)
+    notification.is_seen = seen
+    if changed:
+        adjust_unread(notification.user_id, -1 if seen else 1)
+    return bool(changed)
@@ -4,11 +4,12 @@ from typing import Optional, Union
 from django.contrib.auth.decorators import login_required
 from django.db.models.manager import BaseManager
 from django.http import HttpResponse, JsonResponse
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.template.loader import render_to_string
 
 from blog.utils import is_ajax
 from notification.models import Notification
+from notification.unread import set_seen
 
 # Create your views here.
 
@@ -30,19 +31,14 @@ def ShowNotifications(request) -> HttpResponse:
 @login_required
 def notification_status(request) -> Optional[JsonResponse]:
     notification_id: str = request.POST.get("notification_id")
-    notification: Notification = Notification.objects.get(id=notification_id)
+    notification: Notification = get_object_or_404(
+        Notification, id=notification_id, user=request.user
+    )
 
     # Simple toggle switch for this bool
-    if not notification.is_seen:
-        logging.debug(f"Before {notification.id=}:{notification.is_seen=}")
-        notification.is_seen = True
-        logging.debug(f"After {notification.id=}:{notification.is_seen=}")
-    else:
-        logging.debug(f"Before {notification.id=}:{notification.is_seen=}")
-        notification.is_seen = False
-        logging.debug(f"After {notification.id=}:{notification.is_seen=}")
-
-    notification.save()
+    logging.debug(f"Before {notification.id=}:{notification.is_seen=}")
+    set_seen(notification, not notification.is_seen)
+    logging.debug(f"After {notification.id=}:{notification.is_seen=}")
 
     context: dict[str, Union[Notification, bool]] = {
         "notification": notification,
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlockList",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("email", models.EmailField(max_length=254, null=True, unique=True)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name="profile",
+            name="relationship_status",
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="facebook_link",
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="how_did_you_hear_about_us",
+            field=models.CharField(max_length=350, null=True),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="instagram_link",
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="twitter_link",
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name="profile",
+            name="bio",
+            field=models.CharField(default="", max_length=350, null=True),
+        ),
+        migrations.AlterField(
+            model_name="profile",
+            name="date_of_birth",
+            field=models.DateField(null=True),
+        ),
+    ]
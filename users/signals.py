@@ -5,6 +5,7 @@ from django.dispatch import receiver
 from friend.models import FriendList
 
 from .models import Profile, Relationship
+from .viewer import invalidate_viewer
 
 """ Creating profile when an user creates an account """
 
@@ -23,6 +24,14 @@ def save_profile(sender, instance, **kwargs) -> None:
     instance.profile.save()
 
 
+""" Dropping the cached viewer flags, saving a user saves their profile too """
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved_invalidate_viewer(sender, instance, **kwargs) -> None:
+    invalidate_viewer(instance.user_id)
+
+
 @receiver(post_save, sender=Relationship)
 def post_save_add_to_friends(sender, created, instance, **kwargs) -> None:
     sender_ = instance.sender
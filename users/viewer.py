@@ -0,0 +1,84 @@
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.functional import cached_property
+
+from blog.utils import can_user_see_images, is_user_verified
+from users.models import Profile
+
+VIEWER_FLAGS_KEY: str = "users:viewer-flags:{user_id}"
+
+
+def viewer_flags_key(user_id: int) -> str:
+    return VIEWER_FLAGS_KEY.format(user_id=user_id)
+
+
+def invalidate_viewer(user_id: int) -> None:
+    cache.delete(viewer_flags_key(user_id))
+
+
+class Viewer:
+    """
+    The user making a request along with the gate flags views check on every
+    request. The flags are cached per user until their profile is saved, so
+    checking them costs no query, and the profile itself is only loaded when a
+    view needs it, at most once per request.
+    """
+
+    def __init__(self, user: User | AnonymousUser) -> None:
+        self.user: User | AnonymousUser = user
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.user.is_authenticated
+
+    @cached_property
+    def profile(self) -> Optional[Profile]:
+        if not self.is_authenticated:
+            return None
+        profile: Profile = Profile.objects.get(user_id=self.user.pk)
+        # Spare the gate checks and templates reading user.profile their own query
+        profile.user = self.user
+        self.user.profile = profile
+        return profile
+
+    @cached_property
+    def _flags(self) -> dict[str, Any]:
+        return cache.get(viewer_flags_key(self.user.pk), {})
+
+    def _flag(self, name: str, compute: Callable[[Profile], Any]) -> Any:
+        # Computed one at a time, so a failing check does not block the others
+        if name not in self._flags:
+            self._flags[name] = compute(self.profile)
+            cache.set(
+                viewer_flags_key(self.user.pk), self._flags, settings.VIEWER_FLAGS_TTL
+            )
+        return self._flags[name]
+
+    @cached_property
+    def is_verified(self) -> bool:
+        return self.is_authenticated and self._flag("verified", is_user_verified)
+
+    @cached_property
+    def can_see_images(self) -> bool:
+        return self.is_authenticated and self._flag("images", can_user_see_images)
+
+    @cached_property
+    def image_url(self) -> Optional[str]:
+        if not self.is_authenticated:
+            return None
+        return self._flag("image_url", lambda profile: profile.image.url)
+
+
+class ViewerMiddleware:
+    """Expose the Viewer of every request as request.viewer."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.viewer = Viewer(request.user)
+        return self.get_response(request)
@@ -89,7 +89,7 @@ def follow_unfollow_profile(request: HttpRequest) -> HttpResponse:
         HttpResponse: Redirects to the previous page or profile list
     """
     if request.method == "POST":
-        my_profile: Profile = Profile.objects.get(user=request.user)
+        my_profile: Profile = request.viewer.profile
         pk: str = request.POST.get("profile_pk", "")
         obj: Profile = Profile.objects.get(pk=pk)
 
@@ -219,8 +219,7 @@ class ProfileListView(LoginRequiredMixin, ListView):
         Returns:
             HttpResponse: Rendered response or redirect
         """
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)  # type: ignore
-        if not userobj.verified:
+        if not self.request.viewer.profile.verified:  # type: ignore
             return redirect("profile")
         return super().render_to_response(context)
 
@@ -239,7 +238,7 @@ class ProfileDetailView(LoginRequiredMixin, DetailView):
     def get_object(self, queryset=None) -> Profile:
         """Get the profile object based on the URL parameter."""
         pk = self.kwargs.get("pk")
-        return Profile.objects.get(pk=pk)
+        return Profile.objects.select_related("user").get(pk=pk)
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         """
@@ -249,12 +248,16 @@ class ProfileDetailView(LoginRequiredMixin, DetailView):
             dict: Context data including friend status and following information
         """
         context: Dict[str, Any] = super().get_context_data(**kwargs)
-        view_profile: Profile = self.get_object()
-        my_profile: Profile = Profile.objects.get(user=self.request.user)
+        view_profile: Profile = self.object
+        my_profile: Profile = self.request.viewer.profile  # type: ignore
 
         # Following status
         context["follow"] = view_profile.user in my_profile.following.all()
 
+        # Followers and followed users, with what their names are rendered from
+        context["followers"] = list(view_profile.user.following.select_related("user"))
+        context["following"] = list(view_profile.following.select_related("user"))
+
         # Friend list handling
         account: User = view_profile.user
         friend_list: FriendList
@@ -311,7 +314,9 @@ class ProfileDetailView(LoginRequiredMixin, DetailView):
         Returns:
             HttpResponse: Rendered response or redirect
         """
-        userobj: Profile = Profile.objects.get(id=self.request.user.id)  # type: ignore
-        if not userobj.verified and self.request.user != self.get_object().user:
+        if (
+            not self.request.viewer.profile.verified  # type: ignore
+            and self.request.user != self.object.user
+        ):
             return redirect("profile")
         return super().render_to_response(context)